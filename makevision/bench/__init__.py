@@ -0,0 +1,15 @@
+from .harness import (
+    BENCHMARKS,
+    BenchmarkConfig,
+    BenchmarkResult,
+    compare_reports,
+    measure,
+    run_benchmarks,
+    write_report,
+)
+from .synthetic import (
+    blob_color_ranges,
+    generate_blob_video,
+    generate_charuco_images,
+    render_charuco_views,
+)
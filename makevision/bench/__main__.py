@@ -0,0 +1,54 @@
+import argparse
+import json
+import logging
+
+from .harness import BENCHMARKS, BenchmarkConfig, compare_reports, run_benchmarks, write_report
+
+
+def main():
+    """
+    Run the benchmarks from the command line and write the report.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark MakeVision on synthetic video.")
+    parser.add_argument("--output", default="makevision_bench.json",
+                        help="Path of the JSON report.")
+    parser.add_argument("--baseline", required=False,
+                        help="Path of a previous report to compare against.")
+    parser.add_argument("--only", required=False,
+                        help=f"Comma separated benchmarks to run, from: {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--frames", type=int, default=300,
+                        help="Number of measured frames per benchmark.")
+    parser.add_argument("--size", default="1280x720",
+                        help="Width and height of the synthetic frames, e.g. 1280x720.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the synthetic video and board poses.")
+    parser.add_argument("--work-dir", required=False,
+                        help="Keep the generated fixtures in this directory.")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="Run every benchmark in this process instead of a fresh one.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    try:
+        width, height = (int(value) for value in args.size.lower().split("x"))
+    except ValueError:
+        parser.error(f"Invalid size: {args.size}")
+
+    config = BenchmarkConfig(frames=args.frames, width=width, height=height,
+                             seed=args.seed, work_dir=args.work_dir)
+    names = args.only.split(",") if args.only else None
+    report = run_benchmarks(config, names, isolate=not args.no_isolate)
+    write_report(report, args.output)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        for name, ratios in compare_reports(baseline, report).items():
+            changes = ", ".join(f"{key} x{value:.2f}" for key, value in ratios.items())
+            print(f"{name}: {changes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from importlib.metadata import PackageNotFoundError, version
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from makevision.calibration import WebcamCalibrator
+from makevision.detection import ColorDetector
+from makevision.model import ColorModel
+from makevision.reader import VideoReader
+from makevision.reader.video_reader import VideoFrameData
+from makevision.utils.profiler import StreamingHistogram
+from .synthetic import blob_color_ranges, generate_blob_video, generate_charuco_images
+
+logger = logging.getLogger(__name__)
+
+# Version of the report layout, increased when fields change meaning
+REPORT_VERSION = 1
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parameters shared by every benchmark of a run."""
+    frames: int = 300
+    width: int = 1280
+    height: int = 720
+    seed: int = 0
+    warmup: int = 10
+    calibration_images: int = 20
+    work_dir: Optional[str] = None
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of a single benchmark."""
+    name: str
+    frames: int
+    seconds: float
+    fps: float
+    latency_ms: Dict[str, float]
+    peak_rss_mb: Optional[float]
+    extra: Dict[str, float] = field(default_factory=dict)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Get the peak resident set size of the current process.
+
+    Returns:
+        Optional[float]: Peak RSS in MiB, or None where it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(name: str, step: Callable[[], bool], frames: int, warmup: int = 0) -> BenchmarkResult:
+    """
+    Call a step repeatedly, measuring the latency of each call.
+
+    Args:
+        name (str): Name of the benchmark.
+        step (Callable[[], bool]): Processes one frame, returning False when
+            there are no more frames.
+        frames (int): Maximum number of measured calls.
+        warmup (int): Number of unmeasured calls made first.
+
+    Returns:
+        BenchmarkResult: The measurements.
+    """
+    for _ in range(warmup):
+        if not step():
+            break
+
+    histogram = StreamingHistogram()
+    start = time.perf_counter()
+    for _ in range(frames):
+        call_start = time.perf_counter()
+        if not step():
+            break
+        histogram.record(time.perf_counter() - call_start)
+    seconds = time.perf_counter() - start
+
+    latency = histogram.summary()
+    return BenchmarkResult(
+        name=name,
+        frames=histogram.count,
+        seconds=seconds,
+        fps=histogram.count / seconds if seconds > 0 else 0.0,
+        latency_ms={key: latency[key] * 1000 for key in ("mean", "p50", "p95", "p99", "max")},
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def prepare_fixtures(config: BenchmarkConfig, work_dir: str) -> Dict[str, str]:
+    """
+    Generate the synthetic video and calibration images.
+
+    Args:
+        config (BenchmarkConfig): The benchmark parameters.
+        work_dir (str): Directory the fixtures are written to.
+
+    Returns:
+        Dict[str, str]: Paths of the video, calibration images and the
+        calibration data file, which is only written when a benchmark
+        calibrates from the images.
+    """
+    size = (config.width, config.height)
+    video = generate_blob_video(
+        os.path.join(work_dir, "blobs.avi"),
+        config.frames + config.warmup, size, seed=config.seed)
+    images = generate_charuco_images(
+        os.path.join(work_dir, "charuco"), config.calibration_images, size, seed=config.seed)
+    return {
+        "video": video,
+        "images": images,
+        "calibration": os.path.join(work_dir, "calibration.json"),
+    }
+
+
+def _load_frames(video: str, count: int) -> List[np.ndarray]:
+    reader = VideoReader(video, cap_fps=False)
+    frames = []
+    while len(frames) < count:
+        success, frame = reader.read()
+        if not success:
+            break
+        frames.append(frame.frame.copy())
+    reader.release()
+    return frames
+
+
+def _calibrated(fixtures: Dict[str, str]) -> WebcamCalibrator:
+    # The benchmarks keep no undistorted frame, so the output buffers can be reused
+    calibrator = WebcamCalibrator(fixtures["calibration"], cache_maps=False, pool_size=2)
+    calibrator.calibrate(fixtures["images"], cache_corners=False)
+    return calibrator
+
+
+def _cycle(frames: List[np.ndarray], process: Callable[[VideoFrameData], None]) -> Callable[[], bool]:
+    index = [0]
+
+    def step() -> bool:
+        # Wrap the decoded frame each time, as processing may replace it
+        process(VideoFrameData(frames[index[0] % len(frames)]))
+        index[0] += 1
+        return True
+
+    return step
+
+
+def bench_video_reader(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Decode the synthetic video with VideoReader."""
+    reader = VideoReader(fixtures["video"], cap_fps=False)
+    try:
+        return measure("video_reader", lambda: reader.read()[0], config.frames, config.warmup)
+    finally:
+        reader.release()
+
+
+def bench_video_reader_prefetch(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Decode the synthetic video with a prefetching VideoReader."""
+    reader = VideoReader(fixtures["video"], cap_fps=False, prefetch=True)
+    try:
+        return measure("video_reader_prefetch", lambda: reader.read()[0],
+                       config.frames, config.warmup)
+    finally:
+        reader.release()
+
+
+def bench_calibrate(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Calibrate from the rendered ChArUco images, one measured call."""
+    if os.path.exists(fixtures["calibration"]):
+        os.remove(fixtures["calibration"])
+    calibrator = WebcamCalibrator(fixtures["calibration"], cache_maps=False)
+    done = []
+
+    def step() -> bool:
+        if done:
+            return False
+        calibrator.calibrate(fixtures["images"], cache_corners=False)
+        done.append(True)
+        return True
+
+    result = measure("calibrate", step, 1)
+    result.extra["images"] = config.calibration_images
+    return result
+
+
+def bench_undistort(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Undistort decoded frames with WebcamCalibrator."""
+    calibrator = _calibrated(fixtures)
+    frames = _load_frames(fixtures["video"], 30)
+    return measure("undistort", _cycle(frames, calibrator.undistort),
+                   config.frames, config.warmup)
+
+
+def bench_color_detector(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Detect the blob colors in decoded frames with ColorDetector."""
+    detector = ColorDetector(ColorModel(blob_color_ranges()))
+    frames = _load_frames(fixtures["video"], 30)
+    return measure("color_detector", _cycle(frames, detector.detect),
+                   config.frames, config.warmup)
+
+
+def bench_color_detector_fast(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Detect the blob colors in decoded frames with the lookup table ColorDetector."""
+    detector = ColorDetector(ColorModel(blob_color_ranges()), fast=True)
+    frames = _load_frames(fixtures["video"], 30)
+    return measure("color_detector_fast", _cycle(frames, detector.detect),
+                   config.frames, config.warmup)
+
+
+def bench_color_blobs(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Extract the blobs of each color from decoded frames with ColorDetector."""
+    detector = ColorDetector(ColorModel(blob_color_ranges()), fast=True, blobs=True, min_area=20)
+    frames = _load_frames(fixtures["video"], 30)
+    return measure("color_blobs", _cycle(frames, detector.detect),
+                   config.frames, config.warmup)
+
+
+def bench_pipeline(config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    """Read, undistort and detect each frame, as the loop of BasicPipeline does."""
+    calibrator = _calibrated(fixtures)
+    detector = ColorDetector(ColorModel(blob_color_ranges()), fast=True, blobs=True, min_area=20)
+    reader = VideoReader(fixtures["video"], cap_fps=False)
+
+    def step() -> bool:
+        success, frame = reader.read()
+        if not success:
+            return False
+        calibrator.undistort(frame)
+        detector.detect(frame)
+        return True
+
+    try:
+        return measure("pipeline", step, config.frames, config.warmup)
+    finally:
+        reader.release()
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkConfig, Dict[str, str]], BenchmarkResult]] = {
+    "video_reader": bench_video_reader,
+    "video_reader_prefetch": bench_video_reader_prefetch,
+    "calibrate": bench_calibrate,
+    "undistort": bench_undistort,
+    "color_detector": bench_color_detector,
+    "color_detector_fast": bench_color_detector_fast,
+    "color_blobs": bench_color_blobs,
+    "pipeline": bench_pipeline,
+}
+
+
+def _run_benchmark(name: str, config: BenchmarkConfig, fixtures: Dict[str, str]) -> BenchmarkResult:
+    return BENCHMARKS[name](config, fixtures)
+
+
+def run_benchmarks(config: BenchmarkConfig = BenchmarkConfig(),
+                   names: Optional[List[str]] = None, isolate: bool = True) -> Dict:
+    """
+    Generate the fixtures and run the benchmarks.
+
+    Args:
+        config (BenchmarkConfig): The benchmark parameters.
+        names (Optional[List[str]]): Benchmarks to run, defaults to all.
+        isolate (bool): Run each benchmark in a fresh process, so the peak
+            RSS of one benchmark does not include the memory of another.
+
+    Returns:
+        Dict: The report, with the run metadata and a result per benchmark.
+    """
+    names = names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="makevision-bench-") as temp_dir:
+        work_dir = config.work_dir or temp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        logger.info(f"Generating fixtures in {work_dir}")
+        fixtures = prepare_fixtures(config, work_dir)
+        _calibrated(fixtures)
+
+        results = []
+        for name in names:
+            logger.info(f"Running benchmark '{name}'")
+            if isolate:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(_run_benchmark, name, config, fixtures).result()
+            else:
+                result = _run_benchmark(name, config, fixtures)
+            logger.info(
+                f"{name}: {result.fps:.1f} FPS, p50 {result.latency_ms['p50']:.2f}ms, "
+                f"p99 {result.latency_ms['p99']:.2f}ms")
+            results.append(result)
+
+    return {
+        "version": REPORT_VERSION,
+        "metadata": _metadata(config, isolate),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def write_report(report: Dict, path: str) -> None:
+    """
+    Write a benchmark report to a JSON file.
+
+    Args:
+        report (Dict): The report returned by run_benchmarks.
+        path (str): Path to the JSON file.
+    """
+    with open(path, "w") as file:
+        json.dump(report, file, indent=4)
+
+
+def compare_reports(baseline: Dict, current: Dict) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the results of two reports.
+
+    Args:
+        baseline (Dict): The report to compare against.
+        current (Dict): The new report.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For each benchmark in both reports, the
+        ratio of the current to the baseline FPS, p99 latency and peak RSS.
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    comparison = {}
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        ratios = {
+            "fps": _ratio(result["fps"], old["fps"]),
+            "p99": _ratio(result["latency_ms"]["p99"], old["latency_ms"]["p99"]),
+        }
+        if result["peak_rss_mb"] and old["peak_rss_mb"]:
+            ratios["peak_rss"] = _ratio(result["peak_rss_mb"], old["peak_rss_mb"])
+        comparison[result["name"]] = ratios
+    return comparison
+
+
+def _ratio(value: float, baseline: float) -> float:
+    return value / baseline if baseline else float("nan")
+
+
+def _metadata(config: BenchmarkConfig, isolate: bool) -> Dict:
+    try:
+        makevision_version = version("makevision")
+    except PackageNotFoundError:
+        makevision_version = "unknown"
+
+    return {
+        "makevision": makevision_version,
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "isolated": isolate,
+        "config": {key: value for key, value in asdict(config).items() if key != "work_dir"},
+    }
@@ -0,0 +1,130 @@
+import os
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from makevision.core import ArucoBoardDef
+from makevision.calibration.webcam_calibration import create_aruco_board
+
+# BGR color of each synthetic blob and the HSV range detecting it
+BLOB_COLORS = {
+    "red": ((40, 40, 220), (np.array([0, 120, 120]), np.array([8, 255, 255]))),
+    "green": ((60, 200, 60), (np.array([50, 120, 120]), np.array([70, 255, 255]))),
+    "blue": ((220, 80, 40), (np.array([100, 120, 120]), np.array([125, 255, 255]))),
+    "yellow": ((40, 220, 230), (np.array([20, 120, 120]), np.array([35, 255, 255]))),
+}
+
+
+def blob_color_ranges() -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Get the HSV ranges matching the synthetic blobs, for a ColorModel.
+
+    Returns:
+        Dict[str, Tuple[np.ndarray, np.ndarray]]: Lower and upper HSV bounds by color name.
+    """
+    return {name: hsv_range for name, (_, hsv_range) in BLOB_COLORS.items()}
+
+
+def generate_blob_video(path: str, frames: int = 300, size: Tuple[int, int] = (1280, 720),
+                        fps: int = 30, blobs: int = 12, seed: int = 0) -> str:
+    """
+    Write a video of colored blobs moving over a noisy background.
+
+    The same arguments always produce the same video, so runs of the
+    benchmark can be compared.
+
+    Args:
+        path (str): Path of the video file, written as MJPG.
+        frames (int): Number of frames.
+        size (Tuple[int, int]): Width and height of the frames.
+        fps (int): Frame rate stored in the file.
+        blobs (int): Number of blobs, cycling through the colors.
+        seed (int): Seed of the random positions, sizes and velocities.
+
+    Returns:
+        str: The path of the video file.
+    """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    colors = [color for color, _ in BLOB_COLORS.values()]
+    positions = rng.uniform((0, 0), (w, h), (blobs, 2))
+    velocities = rng.uniform(-8, 8, (blobs, 2))
+    radii = rng.integers(max(h // 40, 4), max(h // 10, 8), blobs)
+    background = rng.integers(60, 110, (h, w, 3), dtype=np.uint8)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+    if not writer.isOpened():
+        raise ValueError(f"Could not open video writer: {path}")
+    try:
+        for _ in range(frames):
+            frame = background.copy()
+            for index, (x, y) in enumerate(positions):
+                cv2.circle(frame, (int(x), int(y)), int(radii[index]),
+                           colors[index % len(colors)], -1, cv2.LINE_AA)
+            writer.write(frame)
+
+            # Bounce the blobs off the edges
+            positions += velocities
+            outside = (positions < 0) | (positions > (w, h))
+            velocities[outside] *= -1
+            positions = np.clip(positions, 0, (w, h))
+    finally:
+        writer.release()
+    return path
+
+
+def render_charuco_views(count: int = 20, size: Tuple[int, int] = (1280, 720),
+                         aruco_board_def: ArucoBoardDef = ArucoBoardDef(),
+                         seed: int = 0) -> List[np.ndarray]:
+    """
+    Render grayscale views of a ChArUco board under random perspectives.
+
+    Args:
+        count (int): Number of views.
+        size (Tuple[int, int]): Width and height of the views.
+        aruco_board_def (ArucoBoardDef): Aruco board definition.
+        seed (int): Seed of the random poses.
+
+    Returns:
+        List[np.ndarray]: The rendered views.
+    """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    board = create_aruco_board(aruco_board_def).board.generateImage(
+        (800, 1066), marginSize=20)
+    board_h, board_w = board.shape
+    source = np.float32([[0, 0], [board_w, 0], [board_w, board_h], [0, board_h]])
+    corners = np.float32([[-board_w, -board_h], [board_w, -board_h],
+                          [board_w, board_h], [-board_w, board_h]]) / 2
+
+    views = []
+    for _ in range(count):
+        scale = rng.uniform(0.25, 0.5) * h / 720
+        center = rng.uniform((0.2 * w, 0.25 * h), (0.8 * w, 0.75 * h))
+        target = corners * scale + rng.normal(0, 25 * h / 720, corners.shape) + center
+        transform = cv2.getPerspectiveTransform(source, target.astype(np.float32))
+        views.append(cv2.warpPerspective(board, transform, (w, h), borderValue=128))
+    return views
+
+
+def generate_charuco_images(directory: str, count: int = 20, size: Tuple[int, int] = (1280, 720),
+                            aruco_board_def: ArucoBoardDef = ArucoBoardDef(),
+                            seed: int = 0) -> str:
+    """
+    Write rendered ChArUco board views as calibration images.
+
+    Args:
+        directory (str): Directory the images are written to.
+        count (int): Number of images.
+        size (Tuple[int, int]): Width and height of the images.
+        aruco_board_def (ArucoBoardDef): Aruco board definition.
+        seed (int): Seed of the random poses.
+
+    Returns:
+        str: The images path prefix expected by WebcamCalibrator.calibrate.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for index, view in enumerate(render_charuco_views(count, size, aruco_board_def, seed)):
+        cv2.imwrite(os.path.join(directory, f"board_{index:03d}.jpg"), view)
+    return os.path.join(directory, "")
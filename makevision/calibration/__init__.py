@@ -1 +1,2 @@
-from .webcam_calibration import WebcamCalibrator
\ No newline at end of file
+from .webcam_calibration import WebcamCalibrator
+from .live_calibration import LiveCalibrator
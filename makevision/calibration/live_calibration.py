@@ -0,0 +1,268 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from makevision.core import ArucoBoardDef, CalibrationData, FrameData, Reader
+from makevision.file_handling import CalibrationDataFileManager, DefaultFileManagerFactory
+from .webcam_calibration import create_aruco_board, detect_charuco_corners, solve_charuco_calibration
+
+logger = logging.getLogger(__name__)
+
+
+class LiveCalibrator:
+    """
+    Calibrates a camera from a stream of frames showing a ChArUco board.
+
+    Frames are handed to a background thread which detects the board and
+    accumulates the observations in memory. While a detection is running
+    newly submitted frames are skipped, so capture is never blocked. Once
+    enough observations cover enough of the image, the calibration is
+    solved again every few observations, starting from the previous
+    solution, until the reprojection error falls below the target.
+    """
+
+    def __init__(self, path: str, aruco_board_def: ArucoBoardDef = ArucoBoardDef(),
+                 min_observations: int = 15, target_coverage: float = 0.6,
+                 target_error: float = 0.5, solve_every: int = 5,
+                 min_corners: int = 6, min_interval: float = 0.2,
+                 coverage_grid: Tuple[int, int] = (8, 6)) -> None:
+        """
+        Initialise the live calibrator.
+
+        Args:
+            path (str): Path to save the calibration data to.
+            aruco_board_def (ArucoBoardDef): Aruco board definition.
+            min_observations (int): Observations required before solving.
+            target_coverage (float): Fraction of the coverage grid cells which
+                must contain a corner before solving.
+            target_error (float): RMS reprojection error in pixels at which
+                the calibration is complete.
+            solve_every (int): Number of new observations between solves.
+            min_corners (int): Minimum corners for a frame to be used.
+            min_interval (float): Minimum time in seconds between observations,
+                avoiding many near identical views.
+            coverage_grid (Tuple[int, int]): Columns and rows of the grid used
+                to measure image coverage.
+        """
+        self.file_manager = CalibrationDataFileManager(
+            DefaultFileManagerFactory(), path)
+        self.aruco_board = create_aruco_board(aruco_board_def)
+        self.min_observations = min_observations
+        self.target_coverage = target_coverage
+        self.target_error = target_error
+        self.solve_every = solve_every
+        self.min_corners = min_corners
+        self.min_interval = min_interval
+        self.coverage_grid = coverage_grid
+
+        self.calibration_data: Optional[CalibrationData] = None
+        self.error: Optional[float] = None
+        self.img_size: Optional[Tuple[int, int]] = None
+        self.skipped = 0
+
+        self._corners: List[np.ndarray] = []
+        self._ids: List[np.ndarray] = []
+        self._covered = np.zeros(coverage_grid[::-1], dtype=bool)
+        self._since_solve = 0
+        self._last_observation = 0.0
+        self._lock = threading.Lock()
+        self._frames = queue.Queue(maxsize=1)
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def observations(self) -> int:
+        """Number of accepted board observations."""
+        return len(self._corners)
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of the coverage grid cells containing a detected corner."""
+        return float(self._covered.mean())
+
+    @property
+    def done(self) -> bool:
+        """Whether the calibration reached the target error."""
+        return self._done.is_set()
+
+    def start(self) -> None:
+        """Start the detection thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._detect_loop, name="makevision-live-calibration", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the detection thread once the current detection finishes."""
+        if self._thread is None:
+            return
+        while self._thread.is_alive():
+            try:
+                self._frames.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, frame: FrameData) -> bool:
+        """
+        Hand a frame to the detection thread without waiting.
+
+        Args:
+            frame (FrameData): The frame to look for the board in.
+
+        Returns:
+            bool: False if the frame was skipped because a detection is
+            still running.
+        """
+        if self._frames.full():
+            self.skipped += 1
+            return False
+
+        # Copy the frame as the reader may reuse its buffer
+        gray = frame.frame.copy() if frame.frame.ndim == 2 else cv2.cvtColor(
+            frame.frame, cv2.COLOR_BGR2GRAY)
+        try:
+            self._frames.put_nowait(gray)
+        except queue.Full:
+            self.skipped += 1
+            return False
+        return True
+
+    def run(self, reader: Reader, max_frames: Optional[int] = None,
+            timeout: Optional[float] = None) -> Optional[CalibrationData]:
+        """
+        Read frames from the reader until the calibration is complete.
+
+        Args:
+            reader (Reader): The source of frames.
+            max_frames (Optional[int]): Stop after this many frames.
+            timeout (Optional[float]): Stop after this many seconds.
+
+        Returns:
+            Optional[CalibrationData]: The saved calibration data, or None if
+            there were not enough observations to calibrate.
+        """
+        self.start()
+        start = time.perf_counter()
+        frames = 0
+        try:
+            while not self.done:
+                success, frame = reader.read()
+                if not success:
+                    break
+                self.submit(frame)
+                frames += 1
+                if max_frames is not None and frames >= max_frames:
+                    break
+                if timeout is not None and time.perf_counter() - start >= timeout:
+                    break
+        finally:
+            self.stop()
+        return self.finish()
+
+    def finish(self) -> Optional[CalibrationData]:
+        """
+        Solve with every observation and save the calibration data.
+
+        Returns:
+            Optional[CalibrationData]: The saved calibration data, or None if
+            there were not enough observations to calibrate.
+        """
+        with self._lock:
+            if self._since_solve or self.calibration_data is None:
+                if self.observations < max(self.min_observations // 2, 3):
+                    logger.warning(
+                        f"Only {self.observations} board observations, calibration skipped.")
+                    return None
+                self._solve()
+
+        logger.info(
+            f"Calibrated from {self.observations} observations, coverage "
+            f"{self.coverage:.0%}, reprojection error {self.error:.3f}px")
+        self.file_manager.save(self.calibration_data)
+        return self.calibration_data
+
+    def _detect_loop(self) -> None:
+        while True:
+            gray = self._frames.get()
+            if gray is None:
+                break
+
+            now = time.perf_counter()
+            if now - self._last_observation < self.min_interval:
+                continue
+
+            added = False
+            try:
+                corners, ids = detect_charuco_corners(gray, self.aruco_board)
+                if corners is None or len(corners) < self.min_corners:
+                    continue
+
+                with self._lock:
+                    added = self._add_observation(gray.shape, corners, ids)
+                    if not added:
+                        continue
+                    self._last_observation = now
+                    if self._ready_to_solve():
+                        self._solve()
+                        if self.error <= self.target_error:
+                            self._done.set()
+            except Exception as e:
+                # e.g. cv2.error from a degenerate set of views, the thread keeps going
+                logger.warning(f"Board observation dropped: {e}")
+                if added:
+                    with self._lock:
+                        self._drop_last_observation()
+
+    def _add_observation(self, shape: Tuple, corners: np.ndarray, ids: np.ndarray) -> bool:
+        h, w = shape[:2]
+        if self.img_size is None:
+            self.img_size = (w, h)
+        elif self.img_size != (w, h):
+            logger.warning(
+                f"Ignoring frame of size {(w, h)}, calibrating for {self.img_size}.")
+            return False
+
+        self._corners.append(corners)
+        self._ids.append(ids)
+        self._since_solve += 1
+        self._mark_coverage(corners)
+        return True
+
+    def _drop_last_observation(self) -> None:
+        self._corners.pop()
+        self._ids.pop()
+        self._since_solve = max(self._since_solve - 1, 0)
+        self._covered[:] = False
+        for corners in self._corners:
+            self._mark_coverage(corners)
+
+    def _mark_coverage(self, corners: np.ndarray) -> None:
+        """Mark the grid cells the corners fall in."""
+        w, h = self.img_size
+        cols, rows = self.coverage_grid
+        points = corners.reshape(-1, 2)
+        cells_x = np.clip((points[:, 0] * cols / w).astype(int), 0, cols - 1)
+        cells_y = np.clip((points[:, 1] * rows / h).astype(int), 0, rows - 1)
+        self._covered[cells_y, cells_x] = True
+
+    def _ready_to_solve(self) -> bool:
+        return (self.observations >= self.min_observations
+                and self.coverage >= self.target_coverage
+                and self._since_solve >= self.solve_every)
+
+    def _solve(self) -> None:
+        self.calibration_data, self.error = solve_charuco_calibration(
+            self._corners, self._ids, self.aruco_board, self.img_size,
+            initial=self.calibration_data)
+        self._since_solve = 0
+        logger.info(
+            f"Solved with {self.observations} observations, reprojection error {self.error:.3f}px")
@@ -1,27 +1,75 @@
 import glob
-from typing import List, Tuple
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
 from cv2 import aruco
 
-from makevision.core import ArucoBoard, ArucoBoardDef, Calibrator, CalibrationData, FrameData
-from makevision.file_handling import CalibrationDataFileManager, DefaultFileManagerFactory
+from makevision.core import ArucoBoard, ArucoBoardDef, Calibrator, CalibrationData, CharucoCornerCache, FrameData, Reader
+from makevision.file_handling import (CalibrationDataFileManager, CharucoCornerCacheFileManager,
+                                      DefaultFileManagerFactory, UndistortMapCache)
+
+logger = logging.getLogger(__name__)
+
+# Name of the corner cache file, appended to the calibration images path
+CORNER_CACHE_FILE = ".charuco_cache.json"
 
 
 class WebcamCalibrator(Calibrator):
     """Calibrates a webcam using ChArUco boards."""
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, output_size: Optional[Tuple[int, int]] = None,
+                 color_conversion: Optional[int] = None, pool_size: int = 0,
+                 cache_maps: bool = True) -> None:
+        """
+        Initialise the calibrator.
+
+        Args:
+            path (str): Path to the calibration data file.
+            output_size (Optional[Tuple[int, int]]): Width and height to resize
+                undistorted frames to, done by the remap itself.
+            color_conversion (Optional[int]): OpenCV color conversion code
+                applied to undistorted frames, e.g. cv2.COLOR_BGR2HSV.
+            pool_size (int): Number of output buffers reused per frame size,
+                0 to allocate a new frame on every call. With reuse, an
+                undistorted frame is overwritten pool_size frames later.
+            cache_maps (bool): Save the undistortion maps next to the
+                calibration data file and memory map them on later runs.
+        """
+        if pool_size < 0:
+            raise ValueError("Pool size must not be negative.")
         file_manager_factory = DefaultFileManagerFactory()
         self.file_manager = CalibrationDataFileManager(
             file_manager_factory, path)
         self.calibration_data = None
         self.undistort_maps = None
+        self.output_size = output_size
+        self.color_conversion = color_conversion
+        self.pool_size = pool_size
+        self.map_cache = UndistortMapCache(path) if cache_maps else None
+        self._buffers: Dict[Tuple, List[Optional[np.ndarray]]] = {}
+        self._buffer_index: Dict[Tuple, int] = {}
+
+    def calibrate(self, images_path: str, aruco_board_def: ArucoBoardDef = ArucoBoardDef(),
+                  workers: Optional[int] = None, cache_corners: bool = True) -> None:
+        """
+        Load the calibration data, or calibrate from the images if there is none.
 
-    def calibrate(self, images_path: str, aruco_board_def: ArucoBoardDef = ArucoBoardDef()) -> None:
+        Args:
+            images_path (str): Path prefix of the calibration images.
+            aruco_board_def (ArucoBoardDef): Aruco board definition.
+            workers (Optional[int]): Number of processes detecting corners,
+                defaults to the number of CPUs.
+            cache_corners (bool): Cache the corners detected in each image
+                so that only new images are processed on the next run.
+        """
         self.calibration_data = self.file_manager.load()
         if self.calibration_data:
-            self.undistort_maps = self.calibration_data.calculate_undistort_maps()
+            self.undistort_maps = self._load_undistort_maps()
             return
 
         if not images_path:
@@ -33,77 +81,185 @@ class WebcamCalibrator(Calibrator):
         # Load images
         images, img_size = self._load_images(images_path)
         all_charuco_ids, all_charuco_corners = self._get_charuco_corners_and_ids(
-            images, aruco_board)
+            images, aruco_board_def, workers,
+            images_path + CORNER_CACHE_FILE if cache_corners else None)
 
         # Calibrate the camera
-        _, camera_mtx, dist_coeffs, _, _ = cv2.aruco.calibrateCameraCharuco(
-            all_charuco_corners, all_charuco_ids,
-            aruco_board.board, img_size,
-            None, None)
-
-        h, w = img_size[:2]
-        newcamera_mtx, roi = cv2.getOptimalNewCameraMatrix(
-            camera_mtx, dist_coeffs, (w, h), 1, (w, h))
-
-        # Create CalibrationData object
-        calibration_data = {"camera_mtx": camera_mtx,
-                            "dist_coeffs": dist_coeffs,
-                            "newcamera_mtx": newcamera_mtx,
-                            "roi": roi,
-                            "img_size": (w, h)}
-        self.calibration_data = CalibrationData(calibration_data)
+        self.calibration_data, _ = solve_charuco_calibration(
+            all_charuco_corners, all_charuco_ids, aruco_board, (img_size[1], img_size[0]))
 
         # Calculate undistort maps
-        self.undistort_maps = self.calibration_data.calculate_undistort_maps()
+        self.undistort_maps = self._load_undistort_maps()
 
         # Attempt to save the calibration data
         self.file_manager.save(self.calibration_data)
 
+    def calibrate_live(self, reader: Reader, aruco_board_def: ArucoBoardDef = ArucoBoardDef(),
+                       max_frames: Optional[int] = None, timeout: Optional[float] = None,
+                       **kwargs) -> bool:
+        """
+        Calibrate from frames of a reader showing a ChArUco board, without
+        writing images to disk. The calibration data is saved to the
+        calibrator's path.
+
+        Args:
+            reader (Reader): The source of frames.
+            aruco_board_def (ArucoBoardDef): Aruco board definition.
+            max_frames (Optional[int]): Stop after this many frames.
+            timeout (Optional[float]): Stop after this many seconds.
+            **kwargs: Extra arguments passed to LiveCalibrator.
+
+        Returns:
+            bool: Whether calibration data was produced.
+        """
+        from .live_calibration import LiveCalibrator
+
+        live_calibrator = LiveCalibrator(
+            self.file_manager.path, aruco_board_def, **kwargs)
+        calibration_data = live_calibrator.run(reader, max_frames, timeout)
+        if calibration_data is None:
+            return False
+
+        self.calibration_data = calibration_data
+        self.undistort_maps = self._load_undistort_maps()
+        return True
+
     def undistort(self, frame: FrameData) -> FrameData:
         if frame is None or frame.frame is None or \
                 self.calibration_data is None or self.undistort_maps is None:
             return frame
 
-        # Remap using ROI optimized maps
-        undistorted_frame = cv2.remap(
-            frame.frame,
-            self.undistort_maps[0],
-            self.undistort_maps[1],
-            cv2.INTER_LINEAR,
-        )
+        # Remap using ROI optimized maps into a reused buffer
+        undistorted_frame = self._into_pool(
+            ("remap", frame.frame.shape, frame.frame.dtype.str),
+            lambda dst: cv2.remap(
+                frame.frame,
+                self.undistort_maps[0],
+                self.undistort_maps[1],
+                cv2.INTER_LINEAR,
+                dst=dst,
+            ))
+
+        if self.color_conversion is not None:
+            undistorted_frame = self._into_pool(
+                ("convert", undistorted_frame.shape, undistorted_frame.dtype.str),
+                lambda dst: cv2.cvtColor(
+                    undistorted_frame, self.color_conversion, dst=dst))
 
         frame.frame = undistorted_frame
 
         return frame
 
+    def _load_undistort_maps(self) -> Tuple:
+        """
+        Get the undistortion maps of the calibration data, from the map cache
+        if they were saved before, otherwise by calculating them.
+
+        Returns:
+            Tuple: A tuple containing the x and y undistortion maps.
+        """
+        if self.map_cache is None:
+            return self.calibration_data.calculate_undistort_maps(self.output_size)
+
+        fingerprint = self.calibration_data.fingerprint(self.output_size)
+        maps = self.map_cache.load(fingerprint)
+        if maps is not None:
+            return maps
+
+        maps = self.calibration_data.calculate_undistort_maps(self.output_size)
+        try:
+            self.map_cache.save(fingerprint, maps)
+        except IOError as e:
+            logger.warning(f"Could not cache undistort maps: {e}")
+        return maps
+
+    def _into_pool(self, key: Tuple, operation: Callable[[Optional[np.ndarray]], np.ndarray]) -> np.ndarray:
+        """
+        Run an operation writing into the next buffer of a pool.
+
+        The buffers of each pool are used in turn. Without a pool size, the
+        operation allocates its output every time. A buffer is allocated by
+        the operation the first time it is used, and is only reallocated if
+        the operation's output no longer fits.
+
+        Args:
+            key (Tuple): Key of the pool, describing the operation's input.
+            operation (Callable): Function taking the destination buffer
+                (None if not yet allocated) and returning its output.
+
+        Returns:
+            np.ndarray: The output of the operation.
+        """
+        if self.pool_size == 0:
+            return operation(None)
+        pool = self._buffers.setdefault(key, [None] * self.pool_size)
+        index = self._buffer_index.get(key, 0)
+        self._buffer_index[key] = (index + 1) % self.pool_size
+        pool[index] = operation(pool[index])
+        return pool[index]
+
     def _get_charuco_corners_and_ids(
-        self, images: List[str], aruco_board: ArucoBoard
+        self, images: List[str], aruco_board_def: ArucoBoardDef,
+        workers: Optional[int] = None, cache_path: Optional[str] = None
     ) -> Tuple[List, List]:
         """
         Get ChArUco corners and IDs from the images.
 
+        Images are processed in parallel across a pool of processes. When a
+        cache path is given, the result of each image is cached by path,
+        modification time and board definition, so only new or modified
+        images are processed on the next run.
+
         Args:
             images (List[str]): List of image file paths for calibration.
-            aruco_board (ArucoBoard): Aruco board object containing the board and detector.
+            aruco_board_def (ArucoBoardDef): Aruco board definition object.
+            workers (Optional[int]): Number of worker processes. Defaults to
+                the number of CPUs, 1 processes the images in this process.
+            cache_path (Optional[str]): Path to the JSON corner cache file.
 
         Returns:
             Tuple[List, List]: List of ChArUco corners and IDs.
         """
+        board_key = repr(astuple(aruco_board_def))
+        cache_manager = CharucoCornerCacheFileManager(
+            DefaultFileManagerFactory(), cache_path) if cache_path else None
+        cache = cache_manager.load() if cache_manager else CharucoCornerCache()
+
+        mtimes = {image_file: os.stat(image_file).st_mtime_ns for image_file in images}
+        results = {image_file: cache.get(image_file, mtimes[image_file], board_key)
+                   for image_file in images}
+        pending = [image_file for image_file, result in results.items() if result is None]
+
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, len(pending))
+            if workers > 1:
+                with ProcessPoolExecutor(workers) as executor:
+                    detected = executor.map(
+                        _detect_charuco_in_file, pending, [aruco_board_def] * len(pending),
+                        chunksize=max(1, len(pending) // (workers * 4)))
+                    detected = list(detected)
+            else:
+                detected = [_detect_charuco_in_file(image_file, aruco_board_def)
+                            for image_file in pending]
+
+            for image_file, (charuco_corners, charuco_ids) in zip(pending, detected):
+                results[image_file] = (charuco_corners, charuco_ids)
+                cache.set(image_file, mtimes[image_file], board_key,
+                          charuco_corners, charuco_ids)
+
+            if cache_manager:
+                try:
+                    cache_manager.save(cache)
+                except IOError as e:
+                    logger.warning(f"Could not save the ChArUco corner cache: {e}")
+
         all_charuco_ids = []
         all_charuco_corners = []
-
         for image_file in images:
-            image = cv2.imread(image_file)
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            marker_corners, marker_ids, _ = aruco_board.detector.detectMarkers(
-                gray)
-
-            if len(marker_ids) > 0:
-                ret, charuco_corners, charuco_ids = aruco.interpolateCornersCharuco(
-                    marker_corners, marker_ids, gray, aruco_board.board)
-                if ret > 0:
-                    all_charuco_corners.append(charuco_corners)
-                    all_charuco_ids.append(charuco_ids)
+            charuco_corners, charuco_ids = results[image_file]
+            if charuco_corners is not None:
+                all_charuco_corners.append(charuco_corners)
+                all_charuco_ids.append(charuco_ids)
 
         return all_charuco_ids, all_charuco_corners
 
@@ -117,14 +273,7 @@ class WebcamCalibrator(Calibrator):
         Returns:
             ArucoBoard: Aruco board object containing the board and detector.
         """
-        def_aruco_dict = aruco.getPredefinedDictionary(aruco_board.aruco_dict)
-        board = aruco.CharucoBoard(aruco_board.aruco_size,
-                                   aruco_board.square_length,
-                                   aruco_board.marker_length,
-                                   def_aruco_dict)
-        params = cv2.aruco.DetectorParameters()
-        detector = cv2.aruco.ArucoDetector(def_aruco_dict, params)
-        return ArucoBoard(board, params, detector)
+        return create_aruco_board(aruco_board)
 
     def _load_images(self, images_path: str) -> Tuple[list, tuple]:
         """
@@ -149,3 +298,124 @@ class WebcamCalibrator(Calibrator):
         image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         img_size = image.shape
         return images, img_size
+
+
+def create_aruco_board(aruco_board: ArucoBoardDef) -> ArucoBoard:
+    """
+    Create an ArucoBoard object from the given ArucoBoardDef.
+
+    Args:
+        aruco_board (ArucoBoardDef): Aruco board definition object.
+
+    Returns:
+        ArucoBoard: Aruco board object containing the board and detector.
+    """
+    def_aruco_dict = aruco.getPredefinedDictionary(aruco_board.aruco_dict)
+    board = aruco.CharucoBoard(aruco_board.aruco_size,
+                               aruco_board.square_length,
+                               aruco_board.marker_length,
+                               def_aruco_dict)
+    params = cv2.aruco.DetectorParameters()
+    detector = cv2.aruco.ArucoDetector(def_aruco_dict, params)
+    return ArucoBoard(board, params, detector)
+
+
+def detect_charuco_corners(gray: np.ndarray, aruco_board: ArucoBoard) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Detect the ChArUco corners in a grayscale image.
+
+    Args:
+        gray (np.ndarray): The grayscale image.
+        aruco_board (ArucoBoard): Aruco board object containing the board and detector.
+
+    Returns:
+        Tuple[Optional[np.ndarray], Optional[np.ndarray]]: The corners and
+        their ids, or None for both if no corners were found.
+    """
+    marker_corners, marker_ids, _ = aruco_board.detector.detectMarkers(gray)
+
+    if marker_ids is not None and len(marker_ids) > 0:
+        ret, charuco_corners, charuco_ids = aruco.interpolateCornersCharuco(
+            marker_corners, marker_ids, gray, aruco_board.board)
+        if ret > 0:
+            return charuco_corners, charuco_ids
+    return None, None
+
+
+def solve_charuco_calibration(all_charuco_corners: List, all_charuco_ids: List,
+                              aruco_board: ArucoBoard, img_size: Tuple[int, int],
+                              initial: Optional[CalibrationData] = None) -> Tuple[CalibrationData, float]:
+    """
+    Calibrate the camera from ChArUco observations.
+
+    Args:
+        all_charuco_corners (List): Corners detected in each image.
+        all_charuco_ids (List): Corner ids detected in each image.
+        aruco_board (ArucoBoard): Aruco board object containing the board and detector.
+        img_size (Tuple[int, int]): Width and height of the images.
+        initial (Optional[CalibrationData]): Earlier calibration used as the
+            starting point of the solver.
+
+    Returns:
+        Tuple[CalibrationData, float]: The calibration data and the RMS
+        reprojection error in pixels.
+    """
+    # Views with fewer than 4 corners cannot be solved for a pose
+    views = [(corners, ids) for corners, ids in zip(all_charuco_corners, all_charuco_ids)
+             if corners is not None and len(corners) >= 4]
+    if len(views) < len(all_charuco_corners):
+        logger.warning(f"Ignoring {len(all_charuco_corners) - len(views)} views with fewer "
+                       f"than 4 ChArUco corners.")
+    if not views:
+        raise ValueError("No view has enough ChArUco corners to calibrate.")
+    all_charuco_corners = [corners for corners, _ in views]
+    all_charuco_ids = [ids for _, ids in views]
+
+    w, h = img_size
+    camera_mtx, dist_coeffs, flags = None, None, 0
+    if initial is not None and initial.camera_mtx is not None:
+        camera_mtx = initial.camera_mtx.copy()
+        dist_coeffs = initial.dist_coeffs.copy()
+        flags = cv2.CALIB_USE_INTRINSIC_GUESS
+
+    try:
+        error, camera_mtx, dist_coeffs, _, _ = cv2.aruco.calibrateCameraCharuco(
+            all_charuco_corners, all_charuco_ids,
+            aruco_board.board, (w, h),
+            camera_mtx, dist_coeffs, flags=flags)
+    except cv2.error:
+        if not flags:
+            raise
+        # The earlier solution is not a usable starting point, solve from scratch
+        error, camera_mtx, dist_coeffs, _, _ = cv2.aruco.calibrateCameraCharuco(
+            all_charuco_corners, all_charuco_ids,
+            aruco_board.board, (w, h),
+            None, None)
+
+    newcamera_mtx, roi = cv2.getOptimalNewCameraMatrix(
+        camera_mtx, dist_coeffs, (w, h), 1, (w, h))
+
+    # Create CalibrationData object
+    calibration_data = {"camera_mtx": camera_mtx,
+                        "dist_coeffs": dist_coeffs,
+                        "newcamera_mtx": newcamera_mtx,
+                        "roi": roi,
+                        "img_size": (w, h)}
+    return CalibrationData(calibration_data), error
+
+
+# Boards are created once per worker process
+_worker_boards: Dict[Tuple, ArucoBoard] = {}
+
+
+def _detect_charuco_in_file(image_file: str, aruco_board_def: ArucoBoardDef) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Read an image and detect its ChArUco corners, run in worker processes."""
+    key = astuple(aruco_board_def)
+    if key not in _worker_boards:
+        _worker_boards[key] = create_aruco_board(aruco_board_def)
+
+    image = cv2.imread(image_file, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        logger.warning(f"Could not read calibration image {image_file}.")
+        return None, None
+    return detect_charuco_corners(image, _worker_boards[key])
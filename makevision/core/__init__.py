@@ -5,6 +5,9 @@ from .state import State
 from .model import Model
 from .file_manager import FileManager, Data
 from .reader import Reader, FrameData
-from .calibration import Calibrator, CalibrationData, ArucoBoard, ArucoBoardDef
+from .calibration import Calibrator, CalibrationData, CharucoCornerCache, ArucoBoard, ArucoBoardDef
 from .filter import Filter
 from .obstructions import ObstructionDetector
+from .tracker import Tracker
+from .serializer import Serializer
+from .decoder import VideoDecoder
@@ -1,6 +1,7 @@
+import hashlib
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -84,7 +85,7 @@ class CalibrationData(Data):
             raise ValueError(
                 f"Error converting calibration data to dictionary: {e}")
 
-    def calculate_undistort_maps(self) -> Tuple:
+    def calculate_undistort_maps(self, output_size: Optional[Tuple[int, int]] = None) -> Tuple:
         """
         Calculate the undistortion maps for the camera.
         This crops the image to the ROI obtained from calibration
@@ -93,6 +94,11 @@ class CalibrationData(Data):
         This is more efficient than generating maps for the entire image.
         The maps are used for remapping the image to undistort it.
 
+        Args:
+            output_size (Optional[Tuple[int, int]]): Width and height of the
+                undistorted image. The ROI is scaled to this size as part of
+                the remap, avoiding a separate resize. Defaults to the ROI size.
+
         Returns:
             Tuple: A tuple containing the x and y undistortion maps.
         """
@@ -112,18 +118,47 @@ class CalibrationData(Data):
         roi_camera_mtx[0, 2] = roi_camera_mtx[0, 2] - x
         roi_camera_mtx[1, 2] = roi_camera_mtx[1, 2] - y
 
+        if output_size is not None and tuple(output_size) != (w, h):
+            # Scale the camera matrix so the remap also resizes the ROI
+            scale_x, scale_y = output_size[0] / w, output_size[1] / h
+            roi_camera_mtx[0, 0] *= scale_x
+            roi_camera_mtx[1, 1] *= scale_y
+            roi_camera_mtx[0, 2] = (roi_camera_mtx[0, 2] + 0.5) * scale_x - 0.5
+            roi_camera_mtx[1, 2] = (roi_camera_mtx[1, 2] + 0.5) * scale_y - 0.5
+            w, h = output_size
+
         # Generate maps only for the ROI region
         maps = cv2.initUndistortRectifyMap(
             self.camera_mtx,
             self.dist_coeffs,
             R,
             roi_camera_mtx,
-            (w, h),  # Only map the ROI size
+            (int(w), int(h)),  # Only map the ROI size
             cv2.CV_16SC2
         )
 
         return maps
 
+    def fingerprint(self, output_size: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Get a hash identifying the undistortion maps of this calibration.
+
+        Args:
+            output_size (Optional[Tuple[int, int]]): Output size passed to
+                calculate_undistort_maps.
+
+        Returns:
+            str: A hex digest of the calibration parameters and output size.
+        """
+        digest = hashlib.sha256()
+        for value in (self.camera_mtx, self.dist_coeffs, self.newcamera_mtx,
+                      self.roi, self.img_size, output_size):
+            array = np.ascontiguousarray(
+                value if value is not None else [], dtype=np.float64)
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
     def to_dict(self) -> Dict:
         """
         Convert the calibration data to a dictionary format.
@@ -165,6 +200,80 @@ class CalibrationData(Data):
                 f"Error converting calibration data to numpy format: {e}")
 
 
+class CharucoCornerCache(Data):
+    """Holds the ChArUco corners detected in calibration images."""
+
+    def __init__(self, data: Optional[Dict] = None) -> None:
+        """
+        Initialise the cache.
+
+        Args:
+            data (Optional[Dict]): Cached entries keyed by image path.
+        """
+        self.entries = dict(data) if data else {}
+
+    @property
+    def data(self) -> Dict:
+        """
+        Get the cached entries.
+
+        Returns:
+            Dict: Entries keyed by image path, holding the image modification
+            time, the board key and the detected corners and ids.
+        """
+        return self.entries
+
+    def convert(self) -> Dict:
+        """
+        Convert the cache to a dictionary format.
+
+        Returns:
+            Dict: A dictionary representation of the cache.
+        """
+        return self.entries
+
+    def get(self, path: str, mtime: int, board_key: str) -> Optional[Tuple]:
+        """
+        Get the detection result of an image.
+
+        Args:
+            path (str): Path to the image.
+            mtime (int): Modification time of the image in nanoseconds.
+            board_key (str): Key of the board definition used for detection.
+
+        Returns:
+            Optional[Tuple]: None if the image is not cached for this board,
+            otherwise a tuple of corners and ids, which are both None if no
+            corners were found.
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry["mtime"] != mtime or entry["board"] != board_key:
+            return None
+        if entry["corners"] is None:
+            return None, None
+        return (np.array(entry["corners"], dtype=np.float32),
+                np.array(entry["ids"], dtype=np.int32))
+
+    def set(self, path: str, mtime: int, board_key: str,
+            corners: Optional[np.ndarray], ids: Optional[np.ndarray]) -> None:
+        """
+        Store the detection result of an image.
+
+        Args:
+            path (str): Path to the image.
+            mtime (int): Modification time of the image in nanoseconds.
+            board_key (str): Key of the board definition used for detection.
+            corners (Optional[np.ndarray]): Detected corners, None if not found.
+            ids (Optional[np.ndarray]): Detected corner ids, None if not found.
+        """
+        self.entries[path] = {
+            "mtime": mtime,
+            "board": board_key,
+            "corners": corners.tolist() if corners is not None else None,
+            "ids": ids.tolist() if ids is not None else None,
+        }
+
+
 class Calibrator(ABC):
     @abstractmethod
     def calibrate(self, images_path: str, aruco_board: ArucoBoardDef, *args, **kwargs) -> None:
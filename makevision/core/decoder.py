@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class VideoDecoder(ABC):
+    """
+    Abstract base class for the video decoding backends of VideoReader.
+
+    Decoders return every ``step``-th frame as a BGR array, the first of
+    each group of ``step`` frames: after seeking to frame ``start`` the
+    frames read are ``start``, ``start + step``, ``start + 2 * step``, and
+    so on, so the frame seeked to, often a keyframe, is always returned.
+    """
+
+    def __init__(self, path: str, step: int = 1) -> None:
+        """
+        Initialise the decoder.
+
+        Args:
+            path (str): Path to the video file.
+            step (int): Return every step-th frame only.
+        """
+        if step < 1:
+            raise ValueError("Frame step must be at least 1.")
+        self.path = path
+        self.step = step
+
+    @abstractmethod
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Decode the next frame.
+        This method should be implemented by plugins.
+
+        Args:
+            buffer (Optional[np.ndarray]): Array the frame is decoded into if
+                it has the right shape, otherwise a new array is returned.
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray]]: A success flag and the frame.
+        """
+        pass
+
+    @abstractmethod
+    def seek(self, frame: int) -> None:
+        """
+        Move to a frame, so it is the next one read.
+        This method should be implemented by plugins.
+
+        Args:
+            frame (int): Index of the frame.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def position(self) -> int:
+        """Index of the next frame read."""
+        pass
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Number of frames of the video, or None if unknown."""
+        return None
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Frame rate of the video, or None if unknown."""
+        return None
+
+    def keyframes(self) -> Optional[List[int]]:
+        """
+        Find the keyframes of the video, which can be seeked to without
+        decoding the frames before them.
+
+        Returns:
+            Optional[List[int]]: Indices of the keyframes, or None if the
+            backend cannot tell.
+        """
+        return None
+
+    def release(self) -> None:
+        """Release the resources of the decoder."""
+        pass
@@ -29,6 +29,18 @@ class Detector(ABC):
         """
         pass
 
+    def detect_batch(self, frames: List[FrameData], *args, **kwargs) -> List[List]:
+        """
+        Detect objects in several frames at once.
+        Detectors which can run a single forward pass over many frames
+        should override this, the default runs detect on each frame.
+        Args:
+            frames (List[FrameData]): The frames to detect objects in.
+        Returns:
+            result (List[List]): The detections of each frame, in order.
+        """
+        return [self.detect(frame, *args, **kwargs) for frame in frames]
+
     @abstractmethod
     def visualize(self, frame: FrameData, results: Optional[List], *args, **kwargs) -> None:
         """
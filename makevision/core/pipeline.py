@@ -1,8 +1,39 @@
 from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
 
 
 class Pipeline(ABC):
-    """Abstract base class for program pipelines."""
+    """
+    Abstract base class for program pipelines.
+
+    Every concrete subclass is added to ``Pipeline.registry`` under its
+    qualified name when its class is created, so the pipeline of a script
+    can be found without importing the script again.
+    """
+
+    registry: Dict[str, Type["Pipeline"]] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # ABCMeta sets __abstractmethods__ only after this runs
+        if not any(getattr(getattr(cls, name, None), "__isabstractmethod__", False)
+                   for name in dir(cls)):
+            Pipeline.registry[f"{cls.__module__}.{cls.__qualname__}"] = cls
+
+    @classmethod
+    def registered(cls, module: Optional[str] = None) -> List[Type["Pipeline"]]:
+        """
+        Get the registered pipelines, in the order they were defined.
+
+        Args:
+            module (Optional[str]): Only return the pipelines defined in this module.
+
+        Returns:
+            List[Type[Pipeline]]: The pipeline classes.
+        """
+        return [pipeline for pipeline in cls.registry.values()
+                if module is None or pipeline.__module__ == module]
+
     @abstractmethod
     def run(self, *args, **kwargs) -> None:
         """
@@ -1,17 +1,47 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Hashable, Optional, Tuple
 
 import numpy as np
 
 
 class FrameData(ABC):
-    """Generic class for frame data."""
+    """
+    Generic class for frame data.
+
+    Readers stamp frames with the time.monotonic() time they were captured,
+    their sequence number in the source and the id of the source, which are
+    None for frames that were not stamped.
+    """
+    timestamp: Optional[float] = None
+    sequence: Optional[int] = None
+    source_id: Optional[Hashable] = None
+
     @property
     @abstractmethod
     def frame(self) -> np.ndarray:
         """Get the frame data."""
         pass
 
+    def stamp(self, sequence: Optional[int], source_id: Optional[Hashable] = None,
+              timestamp: Optional[float] = None) -> "FrameData":
+        """
+        Set the metadata of the frame.
+
+        Args:
+            sequence (Optional[int]): Number of the frame in its source.
+            source_id (Optional[Hashable]): Id of the source.
+            timestamp (Optional[float]): Capture time from time.monotonic(),
+                defaults to now.
+
+        Returns:
+            FrameData: The frame.
+        """
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.sequence = sequence
+        self.source_id = source_id
+        return self
+
 
 class Reader(ABC):
     """Abstract base class for reading data from a source."""
@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class Serializer(ABC):
+    """Abstract base class for encoding the data sent by networks."""
+
+    @abstractmethod
+    def encode(self, data: Any, *args, **kwargs) -> bytes:
+        """
+        Encode data to be sent.
+        This method should be implemented by plugins.
+
+        Args:
+            data (Any): The data to encode.
+
+        Returns:
+            bytes: The encoded payload.
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, payload: bytes, *args, **kwargs) -> Any:
+        """
+        Decode a payload produced by encode.
+        This method should be implemented by plugins.
+
+        Args:
+            payload (bytes): The encoded payload.
+
+        Returns:
+            Any: The decoded data.
+        """
+        pass
+
+    def reset(self, *args, **kwargs) -> None:
+        """Forget any state shared with the other end, e.g. after a lost message."""
+        pass
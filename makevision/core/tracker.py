@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+
+class Tracker(ABC):
+    """Abstract base class for trackers following detections across frames."""
+
+    @abstractmethod
+    def update(self, results: Optional[List], *args, **kwargs) -> List:
+        """
+        Associate the detections of a new frame with the existing tracks.
+        This method should be implemented by plugins.
+
+        Args:
+            results (Optional[List]): Detection results of the frame, or None
+                if detection was skipped and the tracks should only be predicted.
+
+        Returns:
+            List: The tracked detections of the frame.
+        """
+        pass
+
+    def reset(self, *args, **kwargs) -> None:
+        """Forget every track."""
+        pass
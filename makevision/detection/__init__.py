@@ -1,2 +1,7 @@
 from .yolo_detection import YoloDetector
-from .color_detection import ColorDetector
+from .onnx_detection import OnnxDetector
+from .postprocess import Detections, YoloDecoder, non_max_suppression, box_iou
+from .color_detection import ColorDetector, ColorBlob, ColorMasks
+from .batching import FrameBatcher, BatchItem
+from .scheduling import ScheduledDetector, ScheduleStats
+from .tiling import TiledDetector, CropFrameData, grid_regions, merge_regions
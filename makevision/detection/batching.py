@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterator, List, Tuple, Union
+
+from makevision.core import Detector, FrameData, Reader
+
+
+@dataclass
+class BatchItem:
+    """A frame of a batch along with its source and detections."""
+    source_id: Hashable
+    frame: FrameData
+    detections: List
+
+
+class FrameBatcher:
+    """
+    Collects frames from one or more readers into micro-batches.
+
+    Every reader is read on its own thread. A batch is closed once it holds
+    ``max_batch_size`` frames or ``max_delay`` seconds after its first frame
+    arrived, whichever comes first, so a slow source never holds back the
+    others for long.
+    """
+
+    def __init__(self, readers: Union[Dict[Hashable, Reader], List[Reader]],
+                 max_batch_size: int = 8, max_delay: float = 0.01) -> None:
+        """
+        Initialise the batcher.
+
+        Args:
+            readers (Union[Dict[Hashable, Reader], List[Reader]]): Readers to
+                collect frames from, keyed by source id. When a list is given
+                the index of each reader is used as its source id.
+            max_batch_size (int): Maximum number of frames in a batch.
+            max_delay (float): Maximum time in seconds to wait for a batch to
+                fill up after its first frame arrived.
+        """
+        if max_batch_size < 1:
+            raise ValueError("Batch size must be at least 1.")
+        if not isinstance(readers, dict):
+            readers = dict(enumerate(readers))
+
+        self.readers = readers
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue(max_batch_size * 2)
+        self._active = 0
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start reading from every reader."""
+        if self._running:
+            return
+        self._running = True
+        self._active = len(self.readers)
+        self._threads = [
+            threading.Thread(target=self._read_loop, args=(source_id, reader),
+                             name=f"makevision-batcher-{source_id}", daemon=True)
+            for source_id, reader in self.readers.items()]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop reading and release the readers."""
+        self._running = False
+        # Unblock readers waiting on a full queue
+        while any(thread.is_alive() for thread in self._threads):
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                time.sleep(0.001)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for reader in self.readers.values():
+            reader.release()
+
+    def next_batch(self) -> List[Tuple[Hashable, FrameData]]:
+        """
+        Wait for the next batch of frames.
+
+        Returns:
+            List[Tuple[Hashable, FrameData]]: Source ids and frames of the
+            batch. The list is empty once every reader is exhausted.
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.max_batch_size and (self._active or not self._queue.empty()):
+            timeout = None if deadline is None else max(
+                0.0, deadline - time.perf_counter())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            # A reader finished
+            if item is None:
+                self._active -= 1
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.perf_counter() + self.max_delay
+        return batch
+
+    def __iter__(self) -> Iterator[List[Tuple[Hashable, FrameData]]]:
+        self.start()
+        try:
+            while True:
+                batch = self.next_batch()
+                if not batch:
+                    break
+                yield batch
+        finally:
+            self.stop()
+
+    def detect(self, detector: Detector, **kwargs: Any) -> Iterator[List[BatchItem]]:
+        """
+        Run a detector over the batches.
+
+        Args:
+            detector (Detector): The detector to use, its detect_batch
+                method is called once per batch.
+            **kwargs: Extra arguments passed to detect_batch.
+
+        Yields:
+            List[BatchItem]: The frames of each batch with their detections.
+        """
+        for batch in self:
+            frames = [frame for _, frame in batch]
+            results = detector.detect_batch(frames, **kwargs)
+            yield [BatchItem(source_id, frame, detections)
+                   for (source_id, frame), detections in zip(batch, results)]
+
+    def _read_loop(self, source_id: Hashable, reader: Reader) -> None:
+        # Prefetching readers reuse their buffers on the next read
+        copy = getattr(reader, "prefetcher", None) is not None
+        while self._running:
+            success, frame = reader.read()
+            if not success:
+                break
+            if copy:
+                frame.frame = frame.frame.copy()
+            self._queue.put((source_id, frame))
+        self._queue.put(None)
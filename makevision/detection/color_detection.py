@@ -1,20 +1,135 @@
+import sys
+from dataclasses import dataclass
 from makevision.core import Detector
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import cv2
 import numpy as np
 from makevision.core import Model, FrameData
 
+# Smallest bit-packed label type able to hold a bit per color
+_LABEL_TYPES = ((8, np.uint8), (16, np.uint16), (32, np.int32))
+
+# Index (starting at 1) of the lowest set bit of every byte value,
+# offset by 8 for every following byte of a wider label type
+_LOWEST_BIT = [np.array([0] + [(value & -value).bit_length() + 8 * byte for value in range(1, 256)],
+                        dtype=np.uint8) for byte in range(4)]
+
+
+@dataclass
+class ColorBlob:
+    """A connected region of a detected color."""
+    name: str
+    bbox: Tuple[int, int, int, int]
+    centroid: Tuple[float, float]
+    area: int
+    contour: Optional[np.ndarray] = None
+
+
+class ColorMasks(Sequence):
+    """
+    Masks of every color, computed lazily from a bit-packed label map.
+
+    Bit ``i`` of a pixel in the label map is set when the pixel lies in the
+    range of the ``i``-th color. Iterating or indexing yields
+    ``(name, mask)`` tuples like the masks returned by ``ColorDetector``,
+    but each mask is only built the first time it is accessed.
+    """
+
+    def __init__(self, names: List[str], bits: np.ndarray) -> None:
+        """
+        Initialise the masks.
+
+        Args:
+            names (List[str]): Name of each color, in bit order.
+            bits (np.ndarray): The bit-packed label map.
+        """
+        self.names = names
+        self.bits = bits
+        self._masks: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> Tuple[str, np.ndarray]:
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError("Color index out of range.")
+        return self.names[index], self.mask(index)
+
+    def __iter__(self) -> Iterator[Tuple[str, np.ndarray]]:
+        for index in range(len(self.names)):
+            yield self[index]
+
+    def mask(self, color: Union[int, str]) -> np.ndarray:
+        """
+        Get the mask of a color.
+
+        Args:
+            color (Union[int, str]): Index or name of the color.
+
+        Returns:
+            np.ndarray: A mask which is 255 where the color was detected.
+        """
+        index = self.names.index(color) if isinstance(color, str) else color
+        if index not in self._masks:
+            bit = np.array(1 << index, dtype=np.uint64).astype(self.bits.dtype)
+            self._masks[index] = cv2.compare(
+                cv2.bitwise_and(self.bits, np.full_like(self.bits, bit)), 0, cv2.CMP_NE)
+        return self._masks[index]
+
+    def labels(self) -> np.ndarray:
+        """
+        Get a single label image of the frame.
+
+        Pixels matching several colors are labelled with the first of them.
+
+        Returns:
+            np.ndarray: A uint8 image holding the index of the matching color
+            plus one, or 0 where no color matched.
+        """
+        if self.bits.dtype == np.uint8:
+            return cv2.LUT(self.bits, _LOWEST_BIT[0])
+
+        labels = np.zeros(self.bits.shape, dtype=np.uint8)
+        packed = cv2.split(self.bits.view(np.uint8).reshape(
+            self.bits.shape + (self.bits.itemsize,)))
+        if sys.byteorder == "big":
+            packed = packed[::-1]
+        # Go from the highest byte down so the lowest matching color wins
+        for byte in reversed(range(len(packed))):
+            byte_labels = cv2.LUT(packed[byte], _LOWEST_BIT[byte])
+            cv2.copyTo(byte_labels, byte_labels, labels)
+        return labels
+
 
 class ColorDetector(Detector):
-    def __init__(self, model: Model, streaming: bool = False) -> None:
+    def __init__(self, model: Model, streaming: bool = False, fast: bool = False,
+                 blobs: bool = False, min_area: int = 0, contours: bool = False,
+                 hsv_input: bool = False) -> None:
         """
         Initialise the color detector with a model.
 
         Args:
             model (Model): The model to use for color detection.
+            fast (bool): Label every color in a single pass using lookup
+                tables and return masks lazily as ColorMasks. Supports up to
+                32 colors.
+            blobs (bool): Return a ColorBlob per connected region instead
+                of full frame masks.
+            min_area (int): Minimum area in pixels of a returned blob.
+            contours (bool): Include the outer contour of each blob.
+            hsv_input (bool): Frames are already in HSV, e.g. converted by
+                the calibrator while undistorting.
         """
         self._model = model
         self.colors = model.colors
+        self.fast = fast
+        self.blobs = blobs
+        self.min_area = min_area
+        self.contours = contours
+        self.hsv_input = hsv_input
+        self._luts = self._build_luts() if fast else None
 
     def detect(self, frame: FrameData) -> List:
         """
@@ -24,16 +139,46 @@ class ColorDetector(Detector):
             frame (FrameData): The frame to detect colors in.
 
         Returns:
-            List: A list of color names and their corresponding masks.
+            List: A list of color names and their corresponding masks,
+            or a list of ColorBlob if blobs is enabled.
         """
+        frame = frame.frame if self.hsv_input else cv2.cvtColor(
+            frame.frame, cv2.COLOR_BGR2HSV)
+        if self.fast:
+            masks = ColorMasks(list(self.colors), self.label(frame))
+            return self._extract_blobs(masks) if self.blobs else masks
+
         masks = []
-        frame = cv2.cvtColor(frame.frame, cv2.COLOR_BGR2HSV)
+        blobs = []
         for name, (lower_bound, upper_bound) in self.colors.items():
             # Create a mask for each color range
             mask = cv2.inRange(frame, lower_bound, upper_bound)
-            masks.append((name, mask))
+            if self.blobs:
+                # Extract the blobs straight away so the mask can be dropped
+                blobs.extend(self._extract_blobs([(name, mask)]))
+            else:
+                masks.append((name, mask))
+
+        return blobs if self.blobs else masks
 
-        return masks
+    def label(self, hsv: np.ndarray) -> np.ndarray:
+        """
+        Label every pixel of an HSV image with the colors it matches.
+
+        Args:
+            hsv (np.ndarray): The image in HSV.
+
+        Returns:
+            np.ndarray: A bit-packed label map with bit ``i`` set where the
+            ``i``-th color matched.
+        """
+        if self._luts is None:
+            self._luts = self._build_luts()
+        channels = cv2.split(hsv)
+        bits = cv2.LUT(channels[0], self._luts[0])
+        for channel, lut in zip(channels[1:], self._luts[1:]):
+            cv2.bitwise_and(bits, cv2.LUT(channel, lut), dst=bits)
+        return bits
 
     def visualize(self, frame: FrameData, masks: List) -> None:
         """
@@ -43,8 +188,80 @@ class ColorDetector(Detector):
             image (np.ndarray): The image to visualize the detections on.
             masks (List): A list containing the name and mask of each detected color.
         """
+        if masks and isinstance(masks[0], ColorBlob):
+            self._visualize_blobs(frame, masks)
+            return
+
         for (name, mask) in masks:
             masked_frame = cv2.bitwise_and(frame.frame, frame.frame, mask=mask)
             cv2.imshow(f"{name} Detection", masked_frame)
 
         cv2.imshow("Original Frame", frame.frame)
+
+    def _visualize_blobs(self, frame: FrameData, blobs: List[ColorBlob]) -> None:
+        """Draw the bounding box and name of each blob on the frame."""
+        for blob in blobs:
+            x, y, w, h = blob.bbox
+            cv2.rectangle(frame.frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(frame.frame, blob.name, (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            if blob.contour is not None:
+                cv2.drawContours(frame.frame, [blob.contour], -1, (0, 0, 255), 1)
+
+        cv2.imshow("Detection", frame.frame)
+
+    def _extract_blobs(self, masks: Sequence[Tuple[str, np.ndarray]]) -> List[ColorBlob]:
+        """
+        Find the connected regions of each mask.
+
+        Args:
+            masks (Sequence[Tuple[str, np.ndarray]]): Color names and masks.
+
+        Returns:
+            List[ColorBlob]: The blobs of at least min_area pixels.
+        """
+        blobs = []
+        for name, mask in masks:
+            count, labels, stats, centroids = cv2.connectedComponentsWithStats(
+                mask, connectivity=8)
+            # Label 0 is the background
+            keep = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] >= self.min_area) + 1
+            for label in keep:
+                x, y, w, h, area = stats[label].tolist()
+                contour = None
+                if self.contours:
+                    region = cv2.compare(
+                        labels[y:y + h, x:x + w], int(label), cv2.CMP_EQ)
+                    found, _ = cv2.findContours(
+                        region, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x, y))
+                    contour = max(found, key=cv2.contourArea) if found else None
+                blobs.append(ColorBlob(name, (x, y, w, h),
+                                       tuple(centroids[label].tolist()), area, contour))
+        return blobs
+
+    def _build_luts(self) -> List[np.ndarray]:
+        """
+        Build a lookup table per HSV channel mapping a channel value to the
+        set of colors whose range contains it. Since a color range is a box
+        in HSV space, a pixel matches a color when all three lookups have
+        the color's bit set.
+
+        Returns:
+            List[np.ndarray]: The lookup tables of the H, S and V channels.
+        """
+        for max_colors, dtype in _LABEL_TYPES:
+            if len(self.colors) <= max_colors:
+                break
+        else:
+            raise ValueError(
+                f"Fast color detection supports up to {_LABEL_TYPES[-1][0]} colors, got {len(self.colors)}.")
+
+        values = np.arange(256)
+        luts = [np.zeros(256, dtype=np.int64) for _ in range(3)]
+        for i, (lower_bound, upper_bound) in enumerate(self.colors.values()):
+            for channel in range(3):
+                inside = (values >= lower_bound[channel]) & (
+                    values <= upper_bound[channel])
+                luts[channel][inside] |= 1 << i
+        # Wrap the top bit into the sign bit for signed types
+        return [lut.astype(np.uint64).astype(dtype) for lut in luts]
@@ -0,0 +1,44 @@
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from makevision.core import FrameData
+from .postprocess import Detections, as_detections
+
+
+def draw_detections(frame: FrameData, detections: List, labels: Dict[int, str]) -> None:
+    """
+    Draw the boxes, labels and keypoints of detection results on the frame.
+
+    Args:
+        frame (FrameData): The frame to draw on.
+        detections (List): Detections or ultralytics results.
+        labels (Dict[int, str]): Class names by class id.
+    """
+    for result in detections:
+        result = as_detections(result, labels)
+        boxes = result.xyxy.astype(np.int32)
+
+        # Visualise keypoints if available
+        if result.keypoints is not None:
+            draw_keypoints(frame, result)
+
+        track_ids = result.track_id if result.track_id is not None else [None] * len(result)
+        for (x1, y1, x2, y2), conf, cls_id, track_id in zip(boxes, result.conf, result.cls, track_ids):
+            label = f"{labels.get(cls_id, cls_id)}: {conf:.2f}"
+            if track_id is not None:
+                label = f"#{track_id} {label}"
+
+            cv2.rectangle(frame.frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame.frame, label, (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+
+def draw_keypoints(frame: FrameData, detections: Detections) -> None:
+    """Draw the keypoints of detections with a confidence above 0.5."""
+    points = detections.keypoints.reshape(-1, detections.keypoints.shape[-1])
+    if points.shape[1] > 2:
+        points = points[points[:, 2] > 0.5]
+    for x, y in points[:, :2]:
+        cv2.circle(frame.frame, (int(x), int(y)), 5, (0, 0, 255), -1)
@@ -0,0 +1,88 @@
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from makevision.core import Detector, FrameData, Model
+from .drawing import draw_detections
+from .postprocess import YoloDecoder
+
+
+class OnnxDetector(Detector):
+    """Detects objects with a YOLO model exported to ONNX, without torch or ultralytics."""
+
+    def __init__(self, model: Model, streaming: bool = False, agnostic_nms: bool = True,
+                 max_detections: int = 300, nms_method: str = "greedy") -> None:
+        """
+        Initialise the detector.
+
+        Args:
+            model (Model): An OnnxModel.
+            streaming (bool): Kept for compatibility with the other detectors.
+            agnostic_nms (bool): Suppress overlapping boxes regardless of class.
+            max_detections (int): Maximum number of detections per frame.
+            nms_method (str): "greedy" or "fast", see non_max_suppression.
+        """
+        self._model = model
+        self.model = model.model
+        self.streaming = streaming
+        self.decoder = YoloDecoder(model.labels, model.kpt_shape, agnostic_nms,
+                                   max_detections, nms_method)
+        self._input: Optional[np.ndarray] = None
+        self._padded: Optional[np.ndarray] = None
+
+    def detect(self, frame: FrameData, conf: float = 0.5, iou: float = 0.45) -> List:
+        """Detect objects in the given frame using the ONNX model, returning a list of Detections."""
+        blob, letterbox = self._preprocess([frame.frame])
+        output = self.model.run(None, {self._model.input_name: blob})[0]
+        return [self.decoder(output[0], conf, iou, letterbox[0], frame.frame.shape[:2])]
+
+    def detect_batch(self, frames: List[FrameData], conf: float = 0.5, iou: float = 0.45) -> List[List]:
+        """Detect objects in several frames, with a single run if the model has a dynamic batch size."""
+        if not frames:
+            return []
+        if not self._model.dynamic_batch:
+            return [self.detect(frame, conf, iou) for frame in frames]
+
+        blob, letterbox = self._preprocess([frame.frame for frame in frames])
+        output = self.model.run(None, {self._model.input_name: blob})[0]
+        return [[self.decoder(prediction, conf, iou, box, frame.frame.shape[:2])]
+                for prediction, box, frame in zip(output, letterbox, frames)]
+
+    def visualize(self, frame: FrameData, detections: List) -> None:
+        """Visualize the detection results on the frame."""
+        draw_detections(frame, detections, self._model.labels)
+        cv2.imshow("Detection", frame.frame)
+
+    def _preprocess(self, images: List[np.ndarray]) -> Tuple[np.ndarray, List[Tuple[float, int, int]]]:
+        """
+        Letterbox the images into the reused input tensor.
+
+        Returns:
+            Tuple[np.ndarray, List[Tuple[float, int, int]]]: The input tensor,
+            and the scale and left and top padding of each image.
+        """
+        height, width = self._model.input_size
+        shape = (len(images), 3, height, width)
+        if self._input is None or self._input.shape != shape:
+            self._input = np.empty(shape, dtype=self._model.input_dtype)
+            self._padded = np.empty((height, width, 3), dtype=np.uint8)
+
+        letterbox = []
+        for index, image in enumerate(images):
+            image_height, image_width = image.shape[:2]
+            scale = min(height / image_height, width / image_width)
+            resized_width = int(round(image_width * scale))
+            resized_height = int(round(image_height * scale))
+            left = (width - resized_width) // 2
+            top = (height - resized_height) // 2
+
+            self._padded.fill(114)
+            cv2.resize(image, (resized_width, resized_height),
+                       dst=self._padded[top:top + resized_height, left:left + resized_width],
+                       interpolation=cv2.INTER_LINEAR)
+            # BGR HWC uint8 to RGB CHW in [0, 1], written straight into the tensor
+            np.multiply(self._padded[..., ::-1].transpose(2, 0, 1), 1 / 255,
+                        out=self._input[index], casting="unsafe")
+            letterbox.append((scale, left, top))
+        return self._input, letterbox
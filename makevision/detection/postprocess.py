@@ -0,0 +1,459 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Offset separating the boxes of each class for class-aware NMS
+CLASS_OFFSET = 7680.0
+
+NMS_METHODS = ("greedy", "fast")
+
+
+@dataclass
+class Detections:
+    """
+    Detections in a frame stored as a struct of arrays.
+
+    Row ``i`` of every array describes the ``i``-th detection, so detections
+    can be filtered, sorted and sent without a Python object per box, e.g.
+    ``detections[detections.conf > 0.6]``. The ``boxes`` property returns the
+    detections themselves, so code written for ultralytics results reading
+    ``result.boxes.xyxy`` also works on them.
+    """
+    xyxy: np.ndarray
+    conf: np.ndarray
+    cls: np.ndarray
+    keypoints: Optional[np.ndarray] = None
+    names: Dict[int, str] = field(default_factory=dict)
+    track_id: Optional[np.ndarray] = None
+    masks: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None,
+              kpt_shape: Optional[Tuple[int, int]] = None) -> "Detections":
+        """
+        Create detections without any boxes.
+
+        Args:
+            names (Optional[Dict[int, str]]): Class names by class id.
+            kpt_shape (Optional[Tuple[int, int]]): Keypoints per box and values
+                per keypoint, if the detections have keypoints.
+
+        Returns:
+            Detections: The empty detections.
+        """
+        keypoints = np.zeros((0, kpt_shape[0], 3), dtype=np.float32) if kpt_shape else None
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int32), keypoints, names or {})
+
+    @classmethod
+    def from_ultralytics(cls, result: Any, names: Optional[Dict[int, str]] = None) -> "Detections":
+        """
+        Convert an ultralytics result, copying its boxes from the device once.
+
+        Args:
+            result (Any): The ultralytics result.
+            names (Optional[Dict[int, str]]): Class names by class id,
+                defaults to the names of the result.
+
+        Returns:
+            Detections: The converted detections.
+        """
+        data = as_numpy(result.boxes.data).astype(np.float32, copy=False)
+        keypoints = None
+        if getattr(result, "keypoints", None) is not None:
+            keypoints = as_numpy(result.keypoints.data).astype(np.float32, copy=False)
+        masks = None
+        if getattr(result, "masks", None) is not None:
+            masks = as_numpy(result.masks.data) > 0.5
+        # Results of ultralytics trackers hold the track id between box and confidence
+        track_id = data[:, 4].astype(np.int64) if data.shape[1] == 7 else None
+        return cls(np.ascontiguousarray(data[:, :4]), data[:, -2].copy(),
+                   data[:, -1].astype(np.int32), keypoints,
+                   names if names is not None else dict(getattr(result, "names", {})),
+                   track_id, masks)
+
+    @classmethod
+    def from_blobs(cls, blobs: Sequence[Any], names: Dict[int, str]) -> "Detections":
+        """
+        Convert the ColorBlob records of a ColorDetector, with a confidence of 1.
+
+        Args:
+            blobs (Sequence[Any]): The blobs.
+            names (Dict[int, str]): Class names by class id, including the
+                name of every blob.
+
+        Returns:
+            Detections: The converted detections.
+        """
+        class_ids = {name: class_id for class_id, name in names.items()}
+        xyxy = np.array([(x, y, x + w, y + h) for x, y, w, h in (blob.bbox for blob in blobs)],
+                        dtype=np.float32).reshape(-1, 4)
+        return cls(xyxy, np.ones(len(blobs), dtype=np.float32),
+                   np.array([class_ids[blob.name] for blob in blobs], dtype=np.int32),
+                   names=names)
+
+    @classmethod
+    def from_color_masks(cls, masks: Sequence[Tuple[str, np.ndarray]]) -> "Detections":
+        """
+        Convert the (name, mask) results of a ColorDetector, one detection per color.
+
+        Each detection holds the mask of its color and the box around it, all
+        zeros if the color was not found, with a confidence of 1.
+
+        Args:
+            masks (Sequence[Tuple[str, np.ndarray]]): Color names and masks,
+                e.g. ColorMasks.
+
+        Returns:
+            Detections: The converted detections, with class ids in the order
+            of the colors.
+        """
+        names, stacked = {}, []
+        xyxy = np.zeros((len(masks), 4), dtype=np.float32)
+        for index, (name, mask) in enumerate(masks):
+            names[index] = name
+            mask = mask > 0
+            rows, columns = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+            if rows.size:
+                xyxy[index] = columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+            stacked.append(mask)
+        return cls(xyxy, np.ones(len(names), dtype=np.float32),
+                   np.arange(len(names), dtype=np.int32), names=names,
+                   masks=np.stack(stacked) if stacked else None)
+
+    @classmethod
+    def concatenate(cls, detections: Sequence["Detections"]) -> "Detections":
+        """
+        Join several detections, e.g. of the tiles of a frame.
+
+        Args:
+            detections (Sequence[Detections]): The detections to join.
+
+        Returns:
+            Detections: All the detections, in order.
+        """
+        if not detections:
+            return cls.empty()
+        keypoints = None
+        if all(item.keypoints is not None for item in detections):
+            keypoints = np.concatenate([item.keypoints for item in detections])
+        track_id = None
+        if all(item.track_id is not None for item in detections):
+            track_id = np.concatenate([item.track_id for item in detections])
+        masks = None
+        if all(item.masks is not None for item in detections) and \
+                len({item.masks.shape[1:] for item in detections}) == 1:
+            masks = np.concatenate([item.masks for item in detections])
+        return cls(np.concatenate([item.xyxy for item in detections]),
+                   np.concatenate([item.conf for item in detections]),
+                   np.concatenate([item.cls for item in detections]),
+                   keypoints, detections[0].names, track_id, masks)
+
+    @property
+    def boxes(self) -> "Detections":
+        """The detections, for code reading ``result.boxes`` of ultralytics results."""
+        return self
+
+    @property
+    def xywh(self) -> np.ndarray:
+        """Boxes as centre x, centre y, width and height."""
+        return xyxy_to_xywh(self.xyxy)
+
+    @property
+    def labels(self) -> List[str]:
+        """Class name of every detection."""
+        return [self.names.get(int(class_id), str(class_id)) for class_id in self.cls]
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> "Detections":
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index],
+                          None if self.keypoints is None else self.keypoints[index],
+                          self.names,
+                          None if self.track_id is None else self.track_id[index],
+                          None if self.masks is None else self.masks[index])
+
+    def to_dict(self) -> Dict[str, List]:
+        """
+        Convert to a JSON serialisable dictionary of lists.
+
+        Returns:
+            Dict[str, List]: The boxes, confidences, class ids, labels and, if
+            present, keypoints and track ids. Masks are left out, see
+            BinarySerializer to send them.
+        """
+        data = {
+            "xyxy": self.xyxy.tolist(),
+            "conf": self.conf.tolist(),
+            "cls": self.cls.tolist(),
+            "labels": self.labels,
+        }
+        if self.keypoints is not None:
+            data["keypoints"] = self.keypoints.tolist()
+        if self.track_id is not None:
+            data["track_id"] = self.track_id.tolist()
+        return data
+
+
+def as_numpy(value: Any) -> np.ndarray:
+    """Convert a torch tensor or array-like value to a numpy array."""
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        return value.numpy()
+    return np.asarray(value)
+
+
+def as_detections(result: Any, names: Optional[Dict[int, str]] = None) -> Detections:
+    """
+    Get the detections of a result from any detector.
+
+    Args:
+        result (Any): Detections, or an ultralytics result.
+        names (Optional[Dict[int, str]]): Class names used for ultralytics results.
+
+    Returns:
+        Detections: The detections.
+    """
+    if isinstance(result, Detections):
+        return result
+    return Detections.from_ultralytics(result, names)
+
+
+def xywh_to_xyxy(boxes: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert boxes from centre, width and height to corners.
+
+    Args:
+        boxes (np.ndarray): Boxes of shape (n, 4).
+        out (Optional[np.ndarray]): Array of shape (n, 4) written to, which
+            must not be ``boxes``.
+
+    Returns:
+        np.ndarray: The converted boxes.
+    """
+    if out is None:
+        out = np.empty(boxes.shape, dtype=np.float32)
+    np.multiply(boxes[:, 2:4], 0.5, out=out[:, 2:])
+    np.subtract(boxes[:, :2], out[:, 2:], out=out[:, :2])
+    np.add(boxes[:, :2], out[:, 2:], out=out[:, 2:])
+    return out
+
+
+def xyxy_to_xywh(boxes: np.ndarray) -> np.ndarray:
+    """Convert boxes from corners to centre, width and height."""
+    out = np.empty(boxes.shape, dtype=np.float32)
+    np.subtract(boxes[:, 2:], boxes[:, :2], out=out[:, 2:])
+    np.add(boxes[:, :2], out[:, 2:] / 2, out=out[:, :2])
+    return out
+
+
+def box_iou(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Intersection over union of every pair of boxes.
+
+    Args:
+        boxes (np.ndarray): Boxes of shape (n, 4) as x1, y1, x2, y2.
+        others (np.ndarray): Boxes of shape (m, 4) as x1, y1, x2, y2.
+
+    Returns:
+        np.ndarray: IoU matrix of shape (n, m).
+    """
+    top_left = np.maximum(boxes[:, None, :2], others[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], others[None, :, 2:])
+    size = np.clip(bottom_right - top_left, 0, None)
+    intersection = size[..., 0] * size[..., 1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    other_areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    return intersection / (areas[:, None] + other_areas[None, :] - intersection + 1e-9)
+
+
+def confidence_filter(scores: np.ndarray, threshold: float,
+                      mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Get the indices of the scores above a threshold.
+
+    Args:
+        scores (np.ndarray): Score of each candidate.
+        threshold (float): Minimum score, exclusive.
+        mask (Optional[np.ndarray]): Boolean array of the same shape reused
+            for the comparison.
+
+    Returns:
+        np.ndarray: Indices of the candidates kept.
+    """
+    return np.flatnonzero(np.greater(scores, threshold, out=mask))
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou: float,
+                        class_ids: Optional[np.ndarray] = None, max_detections: int = 300,
+                        method: str = "greedy", max_candidates: int = 30000) -> np.ndarray:
+    """
+    Remove boxes overlapping a box with a higher score.
+
+    Args:
+        boxes (np.ndarray): Boxes of shape (n, 4) as x1, y1, x2, y2.
+        scores (np.ndarray): Score of each box.
+        iou (float): Boxes overlapping a kept box by more than this are removed.
+        class_ids (Optional[np.ndarray]): Class of each box. If given, boxes
+            only suppress boxes of the same class.
+        max_detections (int): Maximum number of boxes kept.
+        method (str): "greedy" for standard NMS, one vectorized step per kept
+            box, or "fast" to compute a single IoU matrix and remove every box
+            overlapping any higher scoring box. Fast NMS is quicker when many
+            of a few hundred candidates are kept, as in crowded scenes, but
+            may remove slightly more boxes.
+        max_candidates (int): Only the highest scoring candidates are considered.
+
+    Returns:
+        np.ndarray: Indices of the kept boxes, by descending score.
+    """
+    if method not in NMS_METHODS:
+        raise ValueError(f"Unknown NMS method: {method}, expected one of {NMS_METHODS}")
+    if not len(scores):
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind="stable")[:max_candidates]
+    if class_ids is not None:
+        # Move each class to its own region so boxes of different classes never overlap
+        boxes = boxes + class_ids[:, None].astype(np.float32) * CLASS_OFFSET
+
+    if method == "fast":
+        candidates = boxes[order]
+        overlaps = np.triu(box_iou(candidates, candidates), k=1)
+        return order[overlaps.max(axis=0, initial=0.0) <= iou][:max_detections]
+
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size and len(keep) < max_detections:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        top_left = np.maximum(boxes[best, :2], boxes[rest, :2])
+        bottom_right = np.minimum(boxes[best, 2:], boxes[rest, 2:])
+        size = np.clip(bottom_right - top_left, 0, None)
+        intersection = size[:, 0] * size[:, 1]
+        overlap = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=np.int64)
+
+
+def scale_boxes(boxes: np.ndarray, letterbox: Tuple[float, int, int],
+                image_shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Map boxes from a letterboxed input back to the image, in place.
+
+    Args:
+        boxes (np.ndarray): Boxes of shape (n, 4) as x1, y1, x2, y2.
+        letterbox (Tuple[float, int, int]): Scale and left and top padding.
+        image_shape (Tuple[int, int]): Height and width of the image.
+
+    Returns:
+        np.ndarray: The boxes, clipped to the image.
+    """
+    scale, left, top = letterbox
+    height, width = image_shape[:2]
+    boxes -= np.array((left, top, left, top), dtype=boxes.dtype)
+    boxes /= scale
+    np.clip(boxes, 0, np.array((width, height, width, height), dtype=boxes.dtype), out=boxes)
+    return boxes
+
+
+def scale_keypoints(keypoints: np.ndarray, letterbox: Tuple[float, int, int]) -> np.ndarray:
+    """Map keypoints of shape (n, k, 2 or 3) from a letterboxed input back to the image, in place."""
+    scale, left, top = letterbox
+    keypoints[..., :2] -= np.array((left, top), dtype=keypoints.dtype)
+    keypoints[..., :2] /= scale
+    return keypoints
+
+
+class YoloDecoder:
+    """
+    Decodes raw YOLOv8 outputs of shape (channels, anchors) into detections.
+
+    The per-anchor scores, class ids and masks are written to arrays
+    allocated once per anchor count, so only the candidates above the
+    confidence threshold are allocated for each frame.
+    """
+
+    def __init__(self, names: Optional[Dict[int, str]] = None,
+                 kpt_shape: Optional[Tuple[int, int]] = None, agnostic: bool = True,
+                 max_detections: int = 300, nms_method: str = "greedy") -> None:
+        """
+        Initialise the decoder.
+
+        Args:
+            names (Optional[Dict[int, str]]): Class names by class id.
+            kpt_shape (Optional[Tuple[int, int]]): Keypoints per box and values
+                per keypoint, for pose models.
+            agnostic (bool): Suppress overlapping boxes regardless of class.
+            max_detections (int): Maximum number of detections per frame.
+            nms_method (str): NMS method, see non_max_suppression.
+        """
+        if nms_method not in NMS_METHODS:
+            raise ValueError(f"Unknown NMS method: {nms_method}, expected one of {NMS_METHODS}")
+        self.names = names or {}
+        self.kpt_shape = kpt_shape
+        self.agnostic = agnostic
+        self.max_detections = max_detections
+        self.nms_method = nms_method
+        self._scores: Optional[np.ndarray] = None
+        self._class_ids: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+
+    def __call__(self, prediction: np.ndarray, conf: float, iou: float,
+                 letterbox: Tuple[float, int, int] = (1.0, 0, 0),
+                 image_shape: Optional[Tuple[int, int]] = None) -> Detections:
+        """
+        Decode a prediction.
+
+        Args:
+            prediction (np.ndarray): Raw output of shape (channels, anchors).
+            conf (float): Minimum confidence of a detection.
+            iou (float): IoU threshold of NMS.
+            letterbox (Tuple[float, int, int]): Scale and left and top padding
+                of the letterboxed input.
+            image_shape (Optional[Tuple[int, int]]): Height and width of the
+                original image, boxes are clipped to it if given.
+
+        Returns:
+            Detections: The detections, by descending confidence.
+        """
+        keypoint_values = int(np.prod(self.kpt_shape)) if self.kpt_shape else 0
+        class_scores = prediction[4:prediction.shape[0] - keypoint_values]
+        anchors = prediction.shape[1]
+        if self._scores is None or self._scores.shape[0] != anchors:
+            self._scores = np.empty(anchors, dtype=prediction.dtype)
+            self._class_ids = np.empty(anchors, dtype=np.int64)
+            self._mask = np.empty(anchors, dtype=bool)
+
+        np.max(class_scores, axis=0, out=self._scores)
+        candidates = confidence_filter(self._scores, conf, self._mask)
+        if not len(candidates):
+            return Detections.empty(self.names, self.kpt_shape)
+
+        selected = prediction[:, candidates].T.astype(np.float32)
+        class_ids = np.argmax(class_scores[:, candidates], axis=0)
+        scores = self._scores[candidates].astype(np.float32)
+        boxes = xywh_to_xyxy(selected[:, :4])
+
+        keep = non_max_suppression(
+            boxes, scores, iou, None if self.agnostic else class_ids,
+            self.max_detections, self.nms_method)
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+        if image_shape is not None:
+            scale_boxes(boxes, letterbox, image_shape)
+
+        keypoints = None
+        if keypoint_values:
+            keypoints = selected[keep, -keypoint_values:].reshape(len(keep), *self.kpt_shape)
+            scale_keypoints(keypoints, letterbox)
+            if keypoints.shape[-1] == 2:
+                keypoints = np.concatenate(
+                    [keypoints, np.ones((*keypoints.shape[:2], 1), np.float32)], axis=-1)
+
+        return Detections(boxes, scores, class_ids.astype(np.int32), keypoints, self.names)
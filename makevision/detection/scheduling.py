@@ -0,0 +1,204 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from makevision.core import Detector, FrameData
+
+# Weight of the newest measurement in the moving averages of timings
+_SMOOTHING = 0.2
+
+
+@dataclass
+class ScheduleStats:
+    """Counts of the frames a ScheduledDetector ran or skipped inference on."""
+    frames: int = 0
+    inferences: int = 0
+    motion_triggered: int = 0
+    interval: int = 1
+
+    @property
+    def skipped(self) -> int:
+        """Frames the previous results were reused or propagated for."""
+        return self.frames - self.inferences
+
+
+class ScheduledDetector(Detector):
+    """
+    Runs a detector on some frames only, reusing its results in between.
+
+    Inference runs every ``interval`` frames, or sooner when the frame has
+    changed by more than ``motion_threshold`` since the last inference,
+    measured on a small grayscale thumbnail. On other frames the previous
+    results are returned, or passed through ``propagate`` (e.g. a tracker
+    predicting where the boxes moved). With a ``target_fps`` or
+    ``detector_budget`` the interval is adapted from the measured cost of
+    inference and of the rest of the loop.
+    """
+
+    def __init__(self, detector: Detector, interval: int = 5,
+                 motion_threshold: Optional[float] = None,
+                 target_fps: Optional[float] = None, detector_budget: Optional[float] = None,
+                 min_interval: int = 1, max_interval: int = 30,
+                 propagate: Optional[Callable[[FrameData, List], List]] = None,
+                 motion_size: Tuple[int, int] = (64, 36)) -> None:
+        """
+        Initialise the scheduler.
+
+        Args:
+            detector (Detector): The detector to schedule.
+            interval (int): Number of frames per inference, the starting point
+                when adapting.
+            motion_threshold (Optional[float]): Mean absolute difference, from
+                0 to 1, between the thumbnail of a frame and that of the last
+                inferred frame above which inference runs early.
+            target_fps (Optional[float]): Frame rate of the calling loop to
+                adapt the interval for.
+            detector_budget (Optional[float]): Largest fraction of the loop time
+                to spend in inference, adapting the interval to stay below it.
+            min_interval (int): Smallest adapted interval.
+            max_interval (int): Largest adapted interval.
+            propagate (Optional[Callable[[FrameData, List], List]]): Called with
+                the frame and the previous results on skipped frames, its
+                return value is used as the results of the frame.
+            motion_size (Tuple[int, int]): Width and height of the thumbnails
+                the motion is measured on.
+        """
+        if not 1 <= min_interval <= interval <= max_interval:
+            raise ValueError("Intervals must satisfy 1 <= min_interval <= interval <= max_interval.")
+        if detector_budget is not None and not 0 < detector_budget <= 1:
+            raise ValueError("Detector budget must be in (0, 1].")
+        super().__init__(getattr(detector, "_model", None), getattr(detector, "streaming", False))
+        self.detector = detector
+        self.interval = interval
+        self.motion_threshold = motion_threshold
+        self.target_fps = target_fps
+        self.detector_budget = detector_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.propagate = propagate
+        self.motion_size = motion_size
+
+        self.inferred = False
+        self.motion = 0.0
+        self.stats = ScheduleStats(interval=interval)
+        self._results: Optional[List] = None
+        self._since_inference = 0
+        self._reference: Optional[np.ndarray] = None
+        self._thumbnail: Optional[np.ndarray] = None
+        self._inference_time: Optional[float] = None
+        self._skip_time: Optional[float] = None
+        self._other_time: Optional[float] = None
+        self._last_return: Optional[float] = None
+
+    @property
+    def adaptive(self) -> bool:
+        """Whether the interval is adapted to a target."""
+        return self.target_fps is not None or self.detector_budget is not None
+
+    def detect(self, frame: FrameData, *args, **kwargs) -> List:
+        """
+        Detect objects in the frame, or reuse the previous results.
+
+        Args:
+            frame (FrameData): The frame to detect objects in.
+            *args: Passed to the detector.
+            **kwargs: Passed to the detector.
+
+        Returns:
+            List: The detections. ``inferred`` tells whether they are new.
+        """
+        start = time.perf_counter()
+        if self._last_return is not None:
+            self._other_time = _average(self._other_time, start - self._last_return)
+
+        motion_triggered = self._measure_motion(frame)
+        self.inferred = self._results is None or motion_triggered or \
+            self._since_inference + 1 >= self.interval
+
+        if self.inferred:
+            self._results = self.detector.detect(frame, *args, **kwargs)
+            self._since_inference = 0
+            self._reference, self._thumbnail = self._thumbnail, self._reference
+            self.stats.inferences += 1
+            self.stats.motion_triggered += motion_triggered
+        else:
+            self._since_inference += 1
+            if self.propagate is not None:
+                self._results = self.propagate(frame, self._results)
+        self.stats.frames += 1
+
+        end = time.perf_counter()
+        if self.inferred:
+            self._inference_time = _average(self._inference_time, end - start)
+        else:
+            self._skip_time = _average(self._skip_time, end - start)
+        if self.adaptive:
+            self._adapt()
+        self._last_return = time.perf_counter()
+        return self._results
+
+    def visualize(self, frame: FrameData, results: Optional[List], *args, **kwargs) -> None:
+        """Visualize the results with the scheduled detector."""
+        self.detector.visualize(frame, results, *args, **kwargs)
+
+    def reset(self) -> None:
+        """Forget the previous results, so the next frame runs inference."""
+        self._results = None
+        self._since_inference = 0
+        self._reference = None
+        self._last_return = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        # Expose the attributes of the scheduled detector, e.g. its labels
+        if attribute == "detector":
+            raise AttributeError(attribute)
+        return getattr(self.detector, attribute)
+
+    def _measure_motion(self, frame: FrameData) -> bool:
+        if self.motion_threshold is None or frame is None or frame.frame is None:
+            return False
+
+        image = frame.frame
+        if self._thumbnail is None:
+            self._thumbnail = np.empty(self.motion_size[::-1], dtype=np.uint8)
+        small = cv2.resize(image, self.motion_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._thumbnail)
+        else:
+            self._thumbnail[...] = small
+
+        if self._reference is None:
+            self.motion = 0.0
+            return False
+        self.motion = cv2.norm(self._thumbnail, self._reference, cv2.NORM_L1) / \
+            (self._thumbnail.size * 255)
+        return self.motion > self.motion_threshold
+
+    def _adapt(self) -> None:
+        if self._inference_time is None or self._other_time is None:
+            return
+        skip_time = self._skip_time if self._skip_time is not None else 0.0
+        excess = max(self._inference_time - skip_time, 0.0)
+
+        # Average frame time with interval n is other + skip + excess / n
+        required = self.min_interval
+        if self.target_fps is not None:
+            spare = 1 / self.target_fps - self._other_time - skip_time
+            required = max(required, math.ceil(excess / spare) if spare > 0 else self.max_interval)
+        if self.detector_budget is not None:
+            # Fraction of time in inference is (inference / n) / average frame time
+            frame_time = self._other_time + skip_time
+            required = max(required, math.ceil(
+                (self._inference_time - self.detector_budget * excess) /
+                (self.detector_budget * frame_time)) if frame_time > 0 else self.max_interval)
+
+        self.interval = int(min(max(required, self.min_interval), self.max_interval))
+        self.stats.interval = self.interval
+
+
+def _average(average: Optional[float], value: float) -> float:
+    return value if average is None else average + _SMOOTHING * (value - average)
@@ -0,0 +1,260 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from makevision.core import Detector, FrameData, ObstructionDetector
+from .postprocess import Detections, as_detections, non_max_suppression
+
+Region = Tuple[int, int, int, int]
+
+
+class CropFrameData(FrameData):
+    """A region of a frame, viewing the pixels of the frame without copying them."""
+
+    def __init__(self, frame: np.ndarray, region: Region) -> None:
+        x1, y1, x2, y2 = region
+        self._frame = frame[y1:y2, x1:x2]
+        self.region = region
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Get the frame data."""
+        return self._frame
+
+    @frame.setter
+    def frame(self, value: np.ndarray):
+        self._frame = value
+
+
+def grid_regions(width: int, height: int, tile_size: Tuple[int, int],
+                 overlap: float = 0.2) -> List[Region]:
+    """
+    Cover an image with overlapping tiles.
+
+    Args:
+        width (int): Width of the image.
+        height (int): Height of the image.
+        tile_size (Tuple[int, int]): Width and height of the tiles, tiles are
+            shrunk to the image if it is smaller.
+        overlap (float): Fraction of a tile shared with its neighbours, so
+            objects cut by one tile are whole in another.
+
+    Returns:
+        List[Region]: The tiles as x1, y1, x2, y2.
+    """
+    tile_width, tile_height = min(tile_size[0], width), min(tile_size[1], height)
+    xs = _tile_starts(width, tile_width, overlap)
+    ys = _tile_starts(height, tile_height, overlap)
+    return [(x, y, x + tile_width, y + tile_height) for y in ys for x in xs]
+
+
+def merge_regions(regions: Sequence[Region]) -> List[Region]:
+    """
+    Replace overlapping regions by their bounding region until none overlap.
+
+    Args:
+        regions (Sequence[Region]): Regions as x1, y1, x2, y2.
+
+    Returns:
+        List[Region]: The merged regions.
+    """
+    boxes = np.array(regions, dtype=np.int64).reshape(-1, 4)
+    merged = True
+    while merged and len(boxes) > 1:
+        overlapping = (np.maximum(boxes[:, None, :2], boxes[None, :, :2]) <
+                       np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])).all(axis=2)
+        np.fill_diagonal(overlapping, False)
+        merged = overlapping.any()
+        if merged:
+            # Merge each region with the first region it overlaps, then repeat
+            group = np.where(overlapping.any(axis=1), overlapping.argmax(axis=1),
+                             np.arange(len(boxes)))
+            group = np.minimum(group, np.arange(len(boxes)))
+            _, group = np.unique(group, return_inverse=True)
+            result = np.empty((group.max() + 1, 4), dtype=np.int64)
+            result[:, :2] = np.iinfo(np.int64).max
+            result[:, 2:] = np.iinfo(np.int64).min
+            np.minimum.at(result[:, :2], group, boxes[:, :2])
+            np.maximum.at(result[:, 2:], group, boxes[:, 2:])
+            boxes = result
+    return [tuple(int(value) for value in box) for box in boxes]
+
+
+class TiledDetector(Detector):
+    """
+    Runs a detector on regions of a frame instead of the downscaled whole frame.
+
+    Regions are either static regions of interest, a grid of overlapping
+    tiles, or chosen dynamically around the previous detections and any
+    obstructions. Dynamic mode falls back to the full set of tiles (or the
+    whole frame) every ``refresh_interval`` frames, and whenever nothing is
+    tracked, to find new objects. All regions are detected in one batch,
+    and their detections are moved back into frame coordinates and merged
+    with NMS across regions.
+    """
+
+    def __init__(self, detector: Detector, regions: Optional[Sequence[Region]] = None,
+                 tile_size: Optional[Tuple[int, int]] = (640, 640), overlap: float = 0.2,
+                 dynamic: bool = False, margin: float = 0.5, min_region_size: int = 160,
+                 refresh_interval: int = 30, iou: float = 0.5, fragment_overlap: float = 0.8,
+                 class_agnostic: bool = False, obstruction_detector: Optional[ObstructionDetector] = None) -> None:
+        """
+        Initialise the tiled detector.
+
+        Args:
+            detector (Detector): A detector returning Detections or
+                ultralytics results, e.g. a YoloDetector or OnnxDetector.
+            regions (Optional[Sequence[Region]]): Static regions of interest as
+                x1, y1, x2, y2. Only these are detected on if given.
+            tile_size (Optional[Tuple[int, int]]): Width and height of the grid
+                tiles covering the frame when no regions are given, or None to
+                detect on the whole frame.
+            overlap (float): Fraction of a tile shared with its neighbours.
+            dynamic (bool): Detect around the previous detections only.
+            margin (float): Padding of dynamic regions around a detection,
+                relative to its size.
+            min_region_size (int): Minimum width and height of dynamic regions.
+            refresh_interval (int): Frames between detections on every tile in
+                dynamic mode.
+            iou (float): IoU threshold of the NMS across regions.
+            fragment_overlap (float): A box lying by more than this fraction of
+                its area inside a larger box, such as the part of an object
+                cut by a tile edge, is removed. 1 disables it.
+            class_agnostic (bool): Suppress overlapping boxes regardless of class.
+            obstruction_detector (Optional[ObstructionDetector]): Adds regions
+                around the obstructions it reports, as x1, y1, x2, y2, in
+                dynamic mode.
+        """
+        super().__init__(getattr(detector, "_model", None), getattr(detector, "streaming", False))
+        self.detector = detector
+        self.regions = list(regions) if regions else None
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.dynamic = dynamic
+        self.margin = margin
+        self.min_region_size = min_region_size
+        self.refresh_interval = refresh_interval
+        self.iou = iou
+        self.fragment_overlap = fragment_overlap
+        self.class_agnostic = class_agnostic
+        self.obstruction_detector = obstruction_detector
+        self.last_regions: List[Region] = []
+        self._previous: Optional[Detections] = None
+        self._since_refresh = 0
+
+    def detect(self, frame: FrameData, *args, **kwargs) -> List:
+        """
+        Detect objects in the regions of the frame.
+
+        Args:
+            frame (FrameData): The frame to detect objects in.
+            *args: Passed to the detector.
+            **kwargs: Passed to the detector.
+
+        Returns:
+            List: A single Detections in frame coordinates.
+        """
+        image = frame.frame
+        regions = self._choose_regions(frame)
+        self.last_regions = regions
+
+        crops = [CropFrameData(image, region) for region in regions]
+        results = self.detector.detect_batch(crops, *args, **kwargs)
+
+        detections = []
+        for (x1, y1, _, _), crop_results in zip(regions, results):
+            for result in crop_results:
+                result = as_detections(result)
+                result.xyxy = result.xyxy + np.array((x1, y1, x1, y1), dtype=result.xyxy.dtype)
+                if result.keypoints is not None:
+                    result.keypoints = result.keypoints.copy()
+                    result.keypoints[..., :2] += (x1, y1)
+                # Masks cover the region, not the frame
+                result.masks = None
+                detections.append(result)
+
+        merged = Detections.concatenate(detections)
+        if len(regions) > 1 and len(merged):
+            keep = non_max_suppression(
+                merged.xyxy, merged.conf, self.iou,
+                None if self.class_agnostic else merged.cls, max_detections=len(merged))
+            merged = merged[keep]
+            if self.fragment_overlap < 1:
+                merged = merged[self._without_fragments(merged)]
+        if not merged.names:
+            merged.names = dict(getattr(getattr(self.detector, "_model", None), "labels", {}) or {})
+        self._previous = merged
+        return [merged]
+
+    def visualize(self, frame: FrameData, results: Optional[List], *args, **kwargs) -> None:
+        """Visualize the results with the tiled detector."""
+        self.detector.visualize(frame, results, *args, **kwargs)
+
+    def reset(self) -> None:
+        """Forget the previous detections, so the next frame uses every tile."""
+        self._previous = None
+        self._since_refresh = 0
+
+    def _without_fragments(self, detections: Detections) -> np.ndarray:
+        boxes = detections.xyxy
+        top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+        bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+        intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+        areas = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+        # Fraction of box j inside box i, only counting larger boxes i
+        inside = intersection / np.maximum(areas[None, :], 1e-9)
+        larger = (areas[:, None] > areas[None, :]) | \
+            ((areas[:, None] == areas[None, :]) & np.triu(np.ones_like(inside, dtype=bool), k=1))
+        inside[~larger] = 0
+        if not self.class_agnostic:
+            inside[detections.cls[:, None] != detections.cls[None, :]] = 0
+        return np.flatnonzero(inside.max(axis=0, initial=0.0) <= self.fragment_overlap)
+
+    def _choose_regions(self, frame: FrameData) -> List[Region]:
+        height, width = frame.frame.shape[:2]
+        if self.regions is not None:
+            full = [_clip(region, width, height) for region in self.regions]
+        elif self.tile_size is not None:
+            full = grid_regions(width, height, self.tile_size, self.overlap)
+        else:
+            full = [(0, 0, width, height)]
+
+        if not self.dynamic:
+            return full
+
+        self._since_refresh += 1
+        dynamic = self._dynamic_regions(frame, width, height)
+        if not dynamic or self._since_refresh >= self.refresh_interval:
+            self._since_refresh = 0
+            return full
+        return dynamic
+
+    def _dynamic_regions(self, frame: FrameData, width: int, height: int) -> List[Region]:
+        boxes = [] if self._previous is None else list(self._previous.xyxy)
+        if self.obstruction_detector is not None:
+            boxes.extend(self.obstruction_detector.get_obstruction_coordinates(frame))
+        if not boxes:
+            return []
+
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        centre = (boxes[:, :2] + boxes[:, 2:]) / 2
+        size = np.maximum((boxes[:, 2:] - boxes[:, :2]) * (1 + 2 * self.margin),
+                          self.min_region_size)
+        padded = np.hstack([centre - size / 2, centre + size / 2]).round().astype(np.int64)
+        return merge_regions([_clip(region, width, height) for region in padded])
+
+
+def _tile_starts(length: int, tile: int, overlap: float) -> List[int]:
+    if tile >= length:
+        return [0]
+    stride = max(int(tile * (1 - overlap)), 1)
+    count = int(np.ceil((length - tile) / stride)) + 1
+    # Spread the tiles evenly so the last one ends at the edge
+    return [int(round(start)) for start in np.linspace(0, length - tile, count)]
+
+
+def _clip(region: Sequence[int], width: int, height: int) -> Region:
+    x1, y1, x2, y2 = (int(value) for value in region)
+    x1, x2 = min(max(x1, 0), width - 1), min(max(x2, 1), width)
+    y1, y2 = min(max(y1, 0), height - 1), min(max(y2, 1), height)
+    return x1, y1, max(x2, x1 + 1), max(y2, y1 + 1)
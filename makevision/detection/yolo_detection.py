@@ -1,8 +1,8 @@
 import cv2
-from typing import List, Any
+from typing import List
 
 from makevision.core import Detector, FrameData, Model
-import numpy as np
+from .drawing import draw_detections
 
 
 class YoloDetector(Detector):
@@ -32,34 +32,27 @@ class YoloDetector(Detector):
 
         return list(results)
 
-    def visualize(self, frame: FrameData, detections: List) -> None:
-        """Visualize the detection results on the frame."""
-        for result in detections:
-            boxes = result.boxes.xyxy.cpu().numpy().astype(np.int32)
-            confidences = result.boxes.conf.cpu().numpy()
-            class_ids = result.boxes.cls.cpu().numpy().astype(np.int32)
-
-            # Visualise keypoints if available
-            if hasattr(result, 'keypoints') and result.keypoints is not None:
-                self._visualise_keypoints(frame, result)
+    def detect_batch(self, frames: List[FrameData], verbose: bool = False, conf: float = 0.5, iou: float = 0.45, imgsz: int = 640) -> List[List]:
+        """Detect objects in several frames with a single forward pass of the YOLO model."""
+        if not frames:
+            return []
 
-            for _, (box, conf, cls_id) in enumerate(zip(boxes, confidences, class_ids)):
-                x1, y1, x2, y2 = box
-                label = f"{self._model.labels[cls_id]}: {conf:.2f}"
+        results = self.model(
+            [frame.frame for frame in frames],  # Batch of frames
+            verbose=verbose,
+            conf=conf,
+            iou=iou,
+            device=self.model.device,
+            stream=False,                       # Results are split back per frame
+            imgsz=imgsz,
+            half=self.use_half,
+            agnostic_nms=True,
+        )
 
-                cv2.rectangle(frame.frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame.frame, label, (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        # One result per frame, wrapped to match the output of detect
+        return [[result] for result in results]
 
+    def visualize(self, frame: FrameData, detections: List) -> None:
+        """Visualize the detection results on the frame."""
+        draw_detections(frame, detections, self._model.labels)
         cv2.imshow("Detection", frame.frame)
-
-    def _visualise_keypoints(self, frame: FrameData, result: Any) -> None:
-        """Visualize keypoints on the frame."""
-        for i, kpts in enumerate(result.keypoints.data):
-            if kpts is not None:
-                kpts = kpts.cpu().numpy()
-                # Draw each keypoint
-                for x, y, conf in kpts:
-                    if conf > 0.5:
-                        cv2.circle(
-                            frame.frame, (int(x), int(y)), 5, (0, 0, 255), -1)
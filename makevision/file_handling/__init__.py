@@ -1,8 +1,10 @@
 from .calibration_data_file_manager import (CalibrationDataFileManager,
                                             CalibrationDataJsonFileManager,
                                             CalibrationDataYamlFileManager,
-                                            CalibrationDataNumpyFileManager)
+                                            CalibrationDataNumpyFileManager,
+                                            CharucoCornerCacheFileManager)
 from .json_file_manager import JsonFileManager
 from .yaml_file_manager import YamlFileManager
 from .numpy_file_manager import NumpyFileManager
 from .data_file_manager import DefaultFileManagerFactory, DataFileManager
+from .undistort_map_cache import UndistortMapCache
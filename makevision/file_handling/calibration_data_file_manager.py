@@ -1,6 +1,6 @@
 from typing import Dict
 
-from makevision.core import CalibrationData
+from makevision.core import CalibrationData, CharucoCornerCache
 from .data_file_manager import DataFileManager, FileManagerFactory
 
 
@@ -50,3 +50,13 @@ class CalibrationDataNumpyFileManager(CalibrationDataFileManager):
         if not data:
             return None
         return CalibrationData(data)
+
+
+class CharucoCornerCacheFileManager(DataFileManager):
+    """File manager for cached ChArUco corner detections."""
+
+    def __init__(self, file_manager_factory: FileManagerFactory, path: str) -> None:
+        super().__init__(file_manager_factory, path)
+
+    def _create_data_object(self, data: Dict) -> CharucoCornerCache:
+        return CharucoCornerCache(data)
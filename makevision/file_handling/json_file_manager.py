@@ -1,4 +1,5 @@
 import json
+import os
 from typing import Dict
 
 from makevision.core import Data, FileManager
@@ -13,6 +14,9 @@ class JsonFileManager(FileManager):
         if not path.endswith('.json'):
             raise FileNotJsonError()
 
+        if not os.path.exists(path):
+            return {}
+
         try:
             with open(path, 'r') as file:
                 data = json.load(file)
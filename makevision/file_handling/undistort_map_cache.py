@@ -0,0 +1,75 @@
+import logging
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UndistortMapCache:
+    """
+    Stores undistortion maps next to the calibration data file.
+
+    Each map is saved as its own .npy file named after the calibration file
+    and the calibration fingerprint, so the maps can be memory mapped on
+    load instead of being rebuilt.
+    """
+
+    def __init__(self, calibration_path: str) -> None:
+        """
+        Initialise the cache.
+
+        Args:
+            calibration_path (str): Path to the calibration data file.
+        """
+        self.prefix = os.path.splitext(calibration_path)[0]
+
+    def paths(self, fingerprint: str) -> Tuple[str, str]:
+        """
+        Get the paths of the cached maps for a calibration.
+
+        Args:
+            fingerprint (str): Fingerprint of the calibration data.
+
+        Returns:
+            Tuple[str, str]: Paths of the x and y maps.
+        """
+        key = fingerprint[:16]
+        return (f"{self.prefix}.{key}.map1.npy", f"{self.prefix}.{key}.map2.npy")
+
+    def load(self, fingerprint: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Memory map the cached maps of a calibration.
+
+        Args:
+            fingerprint (str): Fingerprint of the calibration data.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: The read-only maps, or
+            None if they are not cached or cannot be read.
+        """
+        map1_path, map2_path = self.paths(fingerprint)
+        if not (os.path.exists(map1_path) and os.path.exists(map2_path)):
+            return None
+        try:
+            return (np.load(map1_path, mmap_mode="r"),
+                    np.load(map2_path, mmap_mode="r"))
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable undistort map cache: {e}")
+            return None
+
+    def save(self, fingerprint: str, maps: Tuple[np.ndarray, np.ndarray]) -> None:
+        """
+        Save the maps of a calibration.
+
+        Args:
+            fingerprint (str): Fingerprint of the calibration data.
+            maps (Tuple[np.ndarray, np.ndarray]): The x and y maps.
+        """
+        for path, undistort_map in zip(self.paths(fingerprint), maps):
+            # Write to a temporary file first so readers never see a partial map
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as file:
+                np.save(file, undistort_map)
+            os.replace(temp_path, path)
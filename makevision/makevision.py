@@ -29,47 +29,78 @@ def start():
                         help="Path to the YOLO model file.")
     parser.add_argument("--network", required=False,
                         help="Path to the network configuration file.")
+    parser.add_argument("--tracker", required=False, choices=["kalman"],
+                        help="Specify the tracker to use.")
     parser.add_argument("--filter", required=False,
                         help="Specify the filter to use.")
     parser.add_argument("--obstruction-detector", required=False,
                         help="Specify the obstruction detector to use.")
     parser.add_argument("--state", required=False,
                         help="Specify the state to use.")
+    parser.add_argument("--profile", nargs="?", const="makevision_profile.json",
+                        default=None, metavar="PATH",
+                        help="Time the pipeline components and write a report "
+                             "to PATH (default makevision_profile.json).")
+    parser.add_argument("--startup-profile", nargs="?", const="makevision_startup.json",
+                        default=None, metavar="PATH",
+                        help="Time the imports and the initialisation of each "
+                             "component up to the first frame, and write a report "
+                             "to PATH (default makevision_startup.json).")
+    parser.add_argument("--batch", required=False, metavar="VIDEOS",
+                        help="Process a directory or glob of videos as fast as "
+                             "possible, in keyframe-aligned chunks across worker "
+                             "processes, instead of --input.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of batch worker processes (default: number of CPUs).")
+    parser.add_argument("--chunk-frames", type=int, default=900,
+                        help="Target number of frames per batch chunk.")
+    parser.add_argument("--decoder", default="opencv", choices=["opencv", "pyav"],
+                        help="Video decoder of the batch chunks, pyav finds keyframes.")
+    parser.add_argument("--frame-step", type=int, default=1,
+                        help="Process every N-th frame of the batch videos.")
 
     args = parser.parse_args()
+    startup = StartupProfiler(args.startup_profile)
 
-    # Check what modules are within the plugin, use them.
-    # If not found, check other arguments for remaining modules.
-    pipeline = detect_pipeline()
+    # Find the pipeline registered by the main script, or the one named.
+    # Components are then created from the remaining arguments.
+    with startup.phase("pipeline"):
+        pipeline = detect_pipeline(args.pipeline)
+
+    if args.batch:
+        run_batch_mode(args)
+        return
 
     # Detect the source or assume user defines within pipeline
-    if args.input:
-        streaming, reader = detect_source(args.input, args.loop)
-    else:
-        streaming, reader = False, None
+    with startup.phase("reader"):
+        if args.input:
+            streaming, reader = detect_source(args.input, args.loop)
+        else:
+            streaming, reader = False, None
 
-    calibrator = detect_calibrator(args.calibration_data) \
-        if args.calibration_data else None
+    with startup.phase("calibrator"):
+        calibrator = detect_calibrator(args.calibration_data) \
+            if args.calibration_data else None
 
     # For model and detector
-    if args.model:
-        model = detect_model(args.model)
-    else:
-        model = None
+    with startup.phase("model"):
+        model = detect_model(args.model) if args.model else None
 
-    if args.model:
-        detector = detect_detector(model, streaming)
-    else:
-        detector = None
+    with startup.phase("detector"):
+        detector = detect_detector(model, streaming) if args.model else None
 
-    network = detect_network(args.network) if args.network else None
+    with startup.phase("network"):
+        network = detect_network(args.network) if args.network else None
 
-    filter = detect_filter(args.filter) if args.filter else None
+    with startup.phase("other"):
+        tracker = detect_tracker(args.tracker) if args.tracker else None
 
-    obstruction_detector = detect_obstruction_detector(args.obstruction_detector) \
-        if args.obstruction_detector else None
+        filter = detect_filter(args.filter) if args.filter else None
 
-    state = detect_state(args.state) if args.state else None
+        obstruction_detector = detect_obstruction_detector(args.obstruction_detector) \
+            if args.obstruction_detector else None
+
+        state = detect_state(args.state) if args.state else None
 
     # Build components dictionary with non-None items
     components = {
@@ -77,6 +108,7 @@ def start():
         "reader": reader,
         "calibrator": calibrator,
         "detector": detector,
+        "tracker": tracker,
         "network": network,
         "filter": filter,
         "obstruction_detector": obstruction_detector,
@@ -85,5 +117,43 @@ def start():
     # Remove None values
     components = {k: v for k, v in components.items() if v is not None}
 
-    # Inject dependencies and run the pipeline
-    inject_and_run(pipeline, components)
+    # Inject dependencies and run the pipeline, reporting the startup at the first frame
+    if args.startup_profile and reader is not None:
+        startup.watch_first_frame(reader)
+    try:
+        inject_and_run(pipeline, components, profile_path=args.profile)
+    finally:
+        if args.startup_profile:
+            startup.finish()
+
+
+def run_batch_mode(args: argparse.Namespace):
+    """
+    Run the pipeline over the videos given with --batch, sending the merged
+    outputs of the chunks to the network given with --network.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    if args.input:
+        raise ValueError("--batch and --input cannot be used together.")
+    if args.profile:
+        logging.getLogger(__name__).warning("--profile is not supported in batch mode.")
+
+    component_specs = {
+        "pipeline": args.pipeline,
+        "model": args.model,
+        "calibration_data": args.calibration_data,
+        "tracker": args.tracker,
+        "filter": args.filter,
+        "obstruction_detector": args.obstruction_detector,
+        "state": args.state,
+    }
+    network = detect_network(args.network) if args.network else None
+    try:
+        run_batch(args.batch, component_specs, network, workers=args.workers,
+                  chunk_frames=args.chunk_frames, decoder=args.decoder,
+                  frame_step=args.frame_step)
+    finally:
+        if network is not None:
+            network.disconnect()
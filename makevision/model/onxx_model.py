@@ -1,11 +1,97 @@
+import ast
+import os
+from typing import Dict, List, Optional, Tuple
+
 from makevision.core import Model
 
 
 class OnnxModel(Model):
-    def __init__(self, model_path: str):
-        """Initialize the ONNX model with the given model path."""
-        pass
+    """ONNX model class for running YOLO models exported to ONNX with ONNX Runtime."""
+
+    def __init__(self, model_path: str, task: str = None, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: int = 1, providers: Optional[List[str]] = None,
+                 allow_spinning: bool = True) -> None:
+        """
+        Initialize the ONNX model.
+
+        Args:
+            model_path (str): Path to the ONNX model file.
+            task (str): Task of the model ("detect" or "pose"), read from the
+                model metadata if not given.
+            intra_op_threads (Optional[int]): Threads used within an operator,
+                defaults to the number of CPUs.
+            inter_op_threads (int): Threads used to run operators in parallel,
+                1 runs the graph sequentially which is fastest for YOLO graphs.
+            providers (Optional[List[str]]): Execution providers in order of
+                preference, defaults to the CPU provider.
+            allow_spinning (bool): Let idle threads spin waiting for work,
+                lowering latency at the cost of CPU time.
+        """
+        self.intra_op_threads = intra_op_threads or os.cpu_count() or 1
+        self.inter_op_threads = inter_op_threads
+        self.providers = providers or ["CPUExecutionProvider"]
+        self.allow_spinning = allow_spinning
+        super().__init__(model_path, task)
+
+        self.device = "cpu" if self.model.get_providers()[0] == "CPUExecutionProvider" else "cuda"
+        metadata = self.model.get_modelmeta().custom_metadata_map
+        self.task = task or metadata.get("task", "detect")
+        self.labels = self._parse_labels(metadata.get("names"))
+        self.kpt_shape = self._parse_shape(metadata.get("kpt_shape"))
+
+        model_input = self.model.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = "float16" if model_input.type == "tensor(float16)" else "float32"
+        batch, _, height, width = model_input.shape
+        self.dynamic_batch = not isinstance(batch, int)
+        self.input_size = (height if isinstance(height, int) else 640,
+                           width if isinstance(width, int) else 640)
+        self.output_names = [output.name for output in self.model.get_outputs()]
+
+    def load_model(self, model_path: str, task: str):
+        """Load the ONNX model from the specified path into an inference session."""
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found at {model_path}.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL \
+            if self.inter_op_threads <= 1 else ort.ExecutionMode.ORT_PARALLEL
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.enable_mem_pattern = True
+        options.enable_cpu_mem_arena = True
+        options.add_session_config_entry(
+            "session.intra_op.allow_spinning", "1" if self.allow_spinning else "0")
+
+        available = ort.get_available_providers()
+        providers = [provider for provider in self.providers if provider in available]
+        if not providers:
+            raise ValueError(
+                f"None of the execution providers {self.providers} are available.")
+        return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+    @staticmethod
+    def _parse_labels(names: Optional[str]) -> Dict[int, str]:
+        """Parse the class names stored in the metadata of models exported by ultralytics."""
+        if not names:
+            return {}
+        try:
+            labels = ast.literal_eval(names)
+        except (ValueError, SyntaxError):
+            return {}
+        if isinstance(labels, list):
+            labels = dict(enumerate(labels))
+        return {int(key): str(value) for key, value in labels.items()}
 
-    def load_model(self, model_path: str):
-        """Load the ONNX model from the specified path."""
-        pass
+    @staticmethod
+    def _parse_shape(shape: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Parse the keypoint shape stored in the metadata of pose models."""
+        if not shape:
+            return None
+        try:
+            return tuple(ast.literal_eval(shape))
+        except (ValueError, SyntaxError):
+            return None
@@ -1 +1,5 @@
 from .socketio_network import SocketIONetwork
+from .async_sender import AsyncSender, SenderMetrics
+from .serialization import BinarySerializer, JsonSerializer, create_serializer
+from .file_network import FileNetwork, LogNetwork
+from .records import RecordReader, RecordWriter
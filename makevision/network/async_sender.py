@@ -0,0 +1,278 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from makevision.utils.profiler import StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+# What to do with a message when the outbound queue is full
+SEND_POLICIES = ("latest", "drop_oldest", "drop_newest", "block")
+
+
+@dataclass
+class SenderMetrics:
+    """Counters of an AsyncSender."""
+    queued: int = 0
+    sent: int = 0
+    dropped: int = 0
+    failed: int = 0
+    reconnects: int = 0
+    connected: bool = False
+
+
+class AsyncSender:
+    """
+    Sends messages from a background thread through a bounded queue.
+
+    ``submit`` never waits for the network (unless the policy is "block"),
+    so a slow or restarting server cannot stall the caller. Messages are
+    kept per endpoint. With the "latest" policy only the newest message of
+    each endpoint is kept, otherwise the queue holds up to ``queue_size``
+    messages and drops the oldest or newest when full. Messages arriving
+    within ``batch_window`` seconds of each other are sent together, as a
+    list per endpoint when ``batch`` is set. While disconnected, the sender
+    reconnects with exponential backoff and keeps queueing.
+    """
+
+    def __init__(self, emit: Callable[[str, Any], None], connect: Callable[[], None],
+                 is_connected: Callable[[], bool], queue_size: int = 64,
+                 policy: str = "latest", batch_window: float = 0.0, batch: bool = False,
+                 backoff_initial: float = 0.5, backoff_max: float = 10.0) -> None:
+        """
+        Initialise the sender.
+
+        Args:
+            emit (Callable[[str, Any], None]): Sends a message to an endpoint,
+                raising an exception on failure.
+            connect (Callable[[], None]): Opens the connection, raising an
+                exception on failure.
+            is_connected (Callable[[], bool]): Whether the connection is open.
+            queue_size (int): Maximum number of queued messages.
+            policy (str): "latest", "drop_oldest", "drop_newest" or "block".
+            batch_window (float): Time in seconds to wait for more messages
+                after the first one arrives.
+            batch (bool): Send the messages of an endpoint as a single list.
+            backoff_initial (float): First delay between reconnection attempts.
+            backoff_max (float): Largest delay between reconnection attempts.
+        """
+        if policy not in SEND_POLICIES:
+            raise ValueError(f"Unknown send policy: {policy}, expected one of {SEND_POLICIES}")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1.")
+        self._emit = emit
+        self._connect = connect
+        self._is_connected = is_connected
+        self.queue_size = queue_size
+        self.policy = policy
+        self.batch_window = batch_window
+        self.batch = batch
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.latency = StreamingHistogram()
+        self.send_time = StreamingHistogram()
+        self._metrics = SenderMetrics()
+        self._pending: Dict[str, Deque[Tuple[float, Any]]] = {}
+        self._count = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the sending thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._send_loop, name="makevision-network-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush_timeout: float = 1.0) -> None:
+        """
+        Stop the sending thread.
+
+        Args:
+            flush_timeout (float): Time in seconds to wait for the queued
+                messages to be sent first.
+        """
+        if not self._running:
+            return
+        self.flush(flush_timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the queued messages to be sent.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds.
+
+        Returns:
+            bool: Whether the queue was emptied.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._condition:
+            while self._count:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def submit(self, endpoint: str, message: Any) -> bool:
+        """
+        Queue a message for an endpoint.
+
+        Args:
+            endpoint (str): The endpoint to send the message to.
+            message (Any): The message.
+
+        Returns:
+            bool: False if the message was dropped.
+        """
+        now = time.perf_counter()
+        with self._condition:
+            pending = self._pending.setdefault(endpoint, deque())
+            if self.policy == "latest":
+                if pending:
+                    pending.clear()
+                    self._count -= 1
+                    self._metrics.dropped += 1
+            elif self._count >= self.queue_size:
+                if self.policy == "drop_newest" or (
+                        self.policy == "drop_oldest" and not any(self._pending.values())):
+                    # Everything queued is being sent, so the new message goes
+                    self._metrics.dropped += 1
+                    return False
+                if self.policy == "drop_oldest":
+                    self._drop_oldest()
+                else:
+                    while self._running and self._count >= self.queue_size:
+                        self._condition.wait()
+
+            pending.append((now, message))
+            self._count += 1
+            self._condition.notify_all()
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get the sender metrics.
+
+        Returns:
+            Dict[str, Any]: Queue depth, sent, dropped and failed message
+            counts, reconnections, connection state, and the percentiles of
+            the queueing plus sending latency and of the send time in seconds.
+        """
+        with self._condition:
+            self._metrics.queued = self._count
+            metrics = dict(vars(self._metrics))
+        metrics["latency"] = self.latency.summary()
+        metrics["send_time"] = self.send_time.summary()
+        return metrics
+
+    def _drop_oldest(self) -> None:
+        endpoint = min((pending[0][0], endpoint)
+                       for endpoint, pending in self._pending.items() if pending)[1]
+        self._pending[endpoint].popleft()
+        self._count -= 1
+        self._metrics.dropped += 1
+
+    def _take(self) -> Dict[str, List[Tuple[float, Any]]]:
+        with self._condition:
+            while self._running and not self._count:
+                self._condition.wait()
+            if self._count and self.batch_window > 0:
+                # Give other messages of the same batch time to arrive
+                deadline = time.perf_counter() + self.batch_window
+                while self._running and time.perf_counter() < deadline \
+                        and self._count < self.queue_size:
+                    self._condition.wait(deadline - time.perf_counter())
+
+            taken = {endpoint: list(pending) for endpoint, pending in self._pending.items() if pending}
+            for pending in self._pending.values():
+                pending.clear()
+            return taken
+
+    def _requeue(self, endpoint: str, messages: List[Tuple[float, Any]]) -> None:
+        """Put unsent messages back in front of newer ones, within the queue bounds."""
+        with self._condition:
+            pending = self._pending.setdefault(endpoint, deque())
+            if self.policy == "latest" and pending:
+                self._metrics.dropped += len(messages)
+                self._count -= len(messages)
+                return
+            space = self.queue_size - (self._count - len(messages)) if self.policy != "latest" else 1
+            kept = messages[-space:] if space > 0 else []
+            pending.extendleft(reversed(kept))
+            self._metrics.dropped += len(messages) - len(kept)
+            self._count -= len(messages) - len(kept)
+
+    def _ensure_connected(self, delay: float) -> float:
+        while self._running and not self._is_connected():
+            try:
+                self._connect()
+                self._metrics.reconnects += 1
+                logger.info("Network sender connected.")
+                return self.backoff_initial
+            except Exception as error:
+                logger.warning(f"Connection failed, retrying in {delay:.1f}s: {error}")
+                with self._condition:
+                    self._condition.wait_for(lambda: not self._running, delay)
+                delay = min(delay * 2, self.backoff_max)
+        return delay
+
+    def _send_loop(self) -> None:
+        delay = self.backoff_initial
+        while True:
+            delay = self._ensure_connected(delay)
+            self._metrics.connected = self._is_connected()
+            taken = self._take()
+
+            failed = False
+            for endpoint, messages in taken.items():
+                if failed or not self._is_connected():
+                    self._requeue(endpoint, messages)
+                else:
+                    failed = not self._send(endpoint, messages)
+
+            if not self._running:
+                break
+            if failed:
+                # Back off before retrying, the server may be restarting
+                with self._condition:
+                    self._condition.wait_for(lambda: not self._running, delay)
+                delay = min(delay * 2, self.backoff_max)
+            elif taken:
+                delay = self.backoff_initial
+
+    def _send(self, endpoint: str, messages: List[Tuple[float, Any]]) -> bool:
+        groups = [messages] if self.batch else [[message] for message in messages]
+        for index, group in enumerate(groups):
+            payload = [message for _, message in group] if self.batch else group[0][1]
+            start = time.perf_counter()
+            try:
+                self._emit(endpoint, payload)
+            except Exception as error:
+                logger.warning(f"Sending to '{endpoint}' failed: {error}")
+                self._metrics.failed += 1
+                self._requeue(endpoint, [message for unsent in groups[index:] for message in unsent])
+                return False
+
+            end = time.perf_counter()
+            self.send_time.record(end - start)
+            for queued_at, _ in group:
+                self.latency.record(end - queued_at)
+            with self._condition:
+                self._count -= len(group)
+                self._metrics.sent += len(group)
+                self._condition.notify_all()
+        return True
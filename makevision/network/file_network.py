@@ -0,0 +1,179 @@
+import json
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from makevision.core import Network
+from .records import RecordReader, RecordWriter, next_frame
+from .serialization import JsonSerializer, as_serializable, create_serializer
+
+
+class FileNetwork(Network):
+    """
+    Records the sent data to rotating files, for auditing and replay.
+
+    Each record holds the endpoint, frame number, timestamp and data, as a
+    JSON line or, with the "binary" format, as a BinarySerializer payload.
+    Writing happens on a background thread, see RecordWriter, and the
+    index of every segment allows seeking by frame number or time with
+    ``reader``.
+    """
+
+    default_path = "records/detections.jsonl"
+
+    def __init__(self, config: Dict):
+        """
+        Initialise the file network.
+
+        Args:
+            config (Dict): Network configuration with the optional keys
+                "path" (base path of the segments), "format" ("json" or
+                "binary"), "serializer_options", "endpoint" (used when
+                send_data is given none), "flush_interval" (seconds),
+                "buffer_size" and "max_buffer" (bytes), "max_bytes" and
+                "max_seconds" (rotation), "compression" (null or "gzip") and
+                "compression_level".
+        """
+        self.config = config
+        self.path = config.get("path", self.default_path)
+        self.format = config.get("format", "json")
+        if self.format not in ("json", "binary"):
+            raise ValueError(f"Unsupported record format: {self.format}")
+        # Records are read back individually, so none may depend on the previous one
+        options = dict(config.get("serializer_options", {}))
+        if self.format == "binary":
+            options.setdefault("delta", False)
+        self.serializer = create_serializer(self.format, options) if self.format == "binary" else None
+        self.writer: Optional[RecordWriter] = None
+        self.frame = 0
+        self.connect()
+
+    def connect(self):
+        """
+        Open the writer of the records. Frame numbers continue from the
+        records already written to the path, so they keep increasing across
+        restarts and seeking by frame stays valid.
+        """
+        if self.writer is not None:
+            return
+        self.frame = max(self.frame, next_frame(self.path, self.config.get("compression")))
+        self.writer = RecordWriter(
+            self.path,
+            flush_interval=self.config.get("flush_interval", 1.0),
+            buffer_size=self.config.get("buffer_size", 1 << 20),
+            max_buffer=self.config.get("max_buffer", 64 << 20),
+            max_bytes=self.config.get("max_bytes", 256 << 20),
+            max_seconds=self.config.get("max_seconds", 3600.0),
+            compression=self.config.get("compression"),
+            compression_level=self.config.get("compression_level", 6),
+        )
+
+    def send_data(self, data: Any, endpoint: Optional[str] = None,
+                  frame: Optional[int] = None, timestamp: Optional[float] = None):
+        """
+        Record data, returning before it is written to disk.
+
+        Args:
+            data (Any): The data to record.
+            endpoint (Optional[str]): The endpoint the data is for.
+            frame (Optional[int]): Frame number of the data, defaults to
+                counting the calls. Frame numbers should increase, for
+                RecordReader.find_frame.
+            timestamp (Optional[float]): Time of the data in seconds since the
+                epoch, defaults to now.
+
+        Raises:
+            ConnectionError: If the network is disconnected.
+        """
+        if self.writer is None:
+            raise ConnectionError("File network not connected. Call connect() first.")
+        frame = self.frame if frame is None else frame
+        self.frame = frame + 1
+        timestamp = time.time() if timestamp is None else timestamp
+        endpoint = endpoint or self.config.get("endpoint", "detections")
+        self.writer.write(self.encode(data, endpoint, frame, timestamp), frame, timestamp)
+
+    def encode(self, data: Any, endpoint: str, frame: int, timestamp: float) -> bytes:
+        """
+        Encode a record.
+
+        Args:
+            data (Any): The data.
+            endpoint (str): The endpoint of the data.
+            frame (int): Frame number of the data.
+            timestamp (float): Time of the data.
+
+        Returns:
+            bytes: The record.
+        """
+        if self.serializer is not None:
+            name = endpoint.encode()
+            return struct.pack("<B", len(name)) + name + self.serializer.encode(data)
+        return _json_line({"frame": frame, "timestamp": timestamp,
+                           "endpoint": endpoint, "data": as_serializable(data)})
+
+    def decode(self, record: bytes) -> Tuple[str, Any]:
+        """
+        Decode a record.
+
+        Args:
+            record (bytes): A record read from the files.
+
+        Returns:
+            Tuple[str, Any]: The endpoint and the data.
+        """
+        if self.serializer is not None:
+            length = record[0]
+            return record[1:1 + length].decode(), self.serializer.decode(record[1 + length:])
+        entry = json.loads(record)
+        return entry["endpoint"], entry["data"]
+
+    def reader(self) -> RecordReader:
+        """
+        Open the records written so far.
+
+        Returns:
+            RecordReader: Reads records by position, frame number or time.
+        """
+        return RecordReader(self.path, self.config.get("compression"))
+
+    def receive_data(self):
+        pass
+
+    def flush(self):
+        """Write the buffered records now."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def disconnect(self):
+        """Write the buffered records and close the files."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class LogNetwork(FileNetwork):
+    """
+    Records the sent data as readable log lines, e.g.
+    ``2026-01-01T12:00:00.000000 detections 42 {"xyxy": ...}``.
+    """
+
+    default_path = "records/detections.log"
+
+    def encode(self, data: Any, endpoint: str, frame: int, timestamp: float) -> bytes:
+        """Encode a record as a line with the time, endpoint, frame number and JSON data."""
+        time_text = datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds")
+        return f"{time_text} {endpoint} {frame} ".encode() + _json_line(data)
+
+    def decode(self, record: bytes) -> Tuple[str, Any]:
+        """Decode a log line into its endpoint and data."""
+        _, endpoint, _, data = record.decode().split(" ", 3)
+        return endpoint, json.loads(data)
+
+
+_JSON = JsonSerializer()
+
+
+def _json_line(data: Any) -> bytes:
+    return _JSON.encode(data) + b"\n"
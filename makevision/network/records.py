@@ -0,0 +1,363 @@
+import glob
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = (None, "gzip")
+
+# One entry per record: its frame number and timestamp, the file offset of
+# the block holding it, and its offset and length within the block
+INDEX_DTYPE = np.dtype([("frame", "<i8"), ("timestamp", "<f8"), ("block", "<u8"),
+                        ("offset", "<u4"), ("length", "<u4")])
+INDEX_SUFFIX = ".idx"
+
+
+class RecordWriter:
+    """
+    Appends records to rotating segment files from a background thread.
+
+    ``write`` only copies the record into a memory buffer, which is written
+    out every ``flush_interval`` seconds, or sooner once it holds
+    ``buffer_size`` bytes, so the calling loop never waits for the disk
+    unless it falls behind by ``max_buffer`` bytes. Each flush appends one
+    block to the current segment, compressed as a gzip member when
+    compression is enabled, and the index entries of its records to the
+    segment's index file. A new segment is started once the current one
+    reaches ``max_bytes`` or ``max_seconds``. Segments are numbered after
+    the base path, e.g. ``detections-00000.jsonl``, and existing segments are
+    never overwritten.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, buffer_size: int = 1 << 20,
+                 max_buffer: int = 64 << 20, max_bytes: Optional[int] = 256 << 20,
+                 max_seconds: Optional[float] = 3600.0, compression: Optional[str] = None,
+                 compression_level: int = 6) -> None:
+        """
+        Initialise the writer.
+
+        Args:
+            path (str): Base path of the segments, e.g. "records/detections.jsonl".
+            flush_interval (float): Maximum time in seconds a record stays in
+                memory.
+            buffer_size (int): Number of buffered bytes which triggers a flush.
+            max_buffer (int): Number of buffered bytes above which ``write``
+                waits for the flush, so records are never dropped.
+            max_bytes (Optional[int]): Size of a segment on disk which starts a
+                new one, or None to not rotate by size.
+            max_seconds (Optional[float]): Age of a segment which starts a new
+                one, or None to not rotate by time.
+            compression (Optional[str]): None or "gzip".
+            compression_level (int): gzip level from 1 (fastest) to 9.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}, expected one of {COMPRESSIONS}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.max_buffer = max_buffer
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.compression_level = compression_level
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        existing = segment_paths(path, compression)
+        self._segment_number = _segment_number(existing[-1]) + 1 if existing else 0
+        self._file = None
+        self._index = None
+        self._segment_start = 0.0
+
+        self._buffer: List[Tuple[int, float, bytes]] = []
+        self._buffered = 0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._running = True
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._flush_loop, name="makevision-record-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def segment(self) -> Optional[str]:
+        """Path of the segment being written."""
+        return None if self._file is None else self._file.name
+
+    def write(self, record: bytes, frame: int, timestamp: float) -> None:
+        """
+        Queue a record to be written.
+
+        Args:
+            record (bytes): The record.
+            frame (int): Frame number of the record, increasing.
+            timestamp (float): Time of the record in seconds since the epoch.
+        """
+        with self._condition:
+            if not self._running:
+                raise ValueError("The record writer is closed.")
+            while self._buffered >= self.max_buffer and self._error is None:
+                self._condition.notify_all()
+                self._condition.wait()
+            if self._error is not None:
+                raise IOError(f"Writing records to {self.path} failed.") from self._error
+            self._buffer.append((frame, timestamp, record))
+            self._buffered += len(record)
+            if self._buffered >= self.buffer_size:
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        """Write the buffered records now, on the calling thread."""
+        # Held from taking the records to writing them, so blocks stay in order
+        with self._write_lock:
+            with self._condition:
+                records, self._buffer, self._buffered = self._buffer, [], 0
+                self._condition.notify_all()
+            self._write(records)
+
+    def close(self) -> None:
+        """Write the buffered records and close the current segment."""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            self._close_segment()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: not self._running or self._buffered >= self.buffer_size,
+                    self.flush_interval)
+                if not self._running:
+                    return
+            try:
+                self.flush()
+            except Exception as error:
+                logger.error(f"Writing records to {self.path} failed: {error}")
+                with self._condition:
+                    self._error = error
+                    self._condition.notify_all()
+                return
+
+    def _write(self, records: List[Tuple[int, float, bytes]]) -> None:
+        if not records:
+            return
+        if self._file is None or self._should_rotate():
+            self._close_segment()
+            self._open_segment()
+
+        lengths = np.array([len(record) for _, _, record in records], dtype=np.uint32)
+        index = np.empty(len(records), dtype=INDEX_DTYPE)
+        index["frame"] = [frame for frame, _, _ in records]
+        index["timestamp"] = [timestamp for _, timestamp, _ in records]
+        index["block"] = self._file.tell()
+        index["offset"] = np.cumsum(lengths) - lengths
+        index["length"] = lengths
+
+        block = b"".join(record for _, _, record in records)
+        if self.compression == "gzip":
+            # Each block is a complete gzip member, so it can be read alone
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 31)
+            block = compressor.compress(block) + compressor.flush()
+        self._file.write(block)
+        self._file.flush()
+        # The index is written last, so it never points past the data
+        self._index.write(index.tobytes())
+        self._index.flush()
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+            return True
+        return self.max_seconds is not None and \
+            time.monotonic() - self._segment_start >= self.max_seconds
+
+    def _open_segment(self) -> None:
+        path = segment_path(self.path, self._segment_number, self.compression)
+        self._segment_number += 1
+        self._file = open(path, "xb")
+        self._index = open(path + INDEX_SUFFIX, "xb")
+        self._segment_start = time.monotonic()
+        logger.info(f"Writing records to {path}")
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._index.close()
+        self._file = self._index = None
+
+
+class RecordReader:
+    """
+    Reads the records of a RecordWriter, seeking by frame number or time
+    through the segment indices.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None) -> None:
+        """
+        Initialise the reader, loading the indices of every segment.
+
+        Args:
+            path (str): Base path the segments were written to.
+            compression (Optional[str]): Compression of the segments.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}, expected one of {COMPRESSIONS}")
+        self.compression = compression
+        self.segments = segment_paths(path, compression)
+        indices = [_load_index(segment + INDEX_SUFFIX) for segment in self.segments]
+        self.index = np.concatenate(indices) if indices else np.zeros(0, dtype=INDEX_DTYPE)
+        self._segment = np.repeat(np.arange(len(indices)), [len(index) for index in indices])
+        self._cache: Optional[Tuple[int, int, bytes]] = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, position: int) -> bytes:
+        entry = self.index[position]
+        block = self._block(int(self._segment[position]), int(entry["block"]))
+        return block[int(entry["offset"]):int(entry["offset"]) + int(entry["length"])]
+
+    def __iter__(self) -> Iterator[bytes]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def find_frame(self, frame: int) -> int:
+        """
+        Find the first record at or after a frame number. Frame numbers must
+        increase across the segments, as FileNetwork numbers them.
+
+        Args:
+            frame (int): The frame number.
+
+        Returns:
+            int: Position of the record, or the number of records if none is.
+        """
+        return int(np.searchsorted(self.index["frame"], frame, side="left"))
+
+    def find_time(self, timestamp: float) -> int:
+        """
+        Find the first record at or after a time.
+
+        Args:
+            timestamp (float): Time in seconds since the epoch.
+
+        Returns:
+            int: Position of the record, or the number of records if none is.
+        """
+        return int(np.searchsorted(self.index["timestamp"], timestamp, side="left"))
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, float, bytes]]:
+        """
+        Iterate over a range of records.
+
+        Args:
+            start (int): Position of the first record, e.g. from find_frame.
+            stop (Optional[int]): Position after the last record.
+
+        Returns:
+            Iterator[Tuple[int, float, bytes]]: Frame number, timestamp and
+            record of each record.
+        """
+        for position in range(start, len(self) if stop is None else min(stop, len(self))):
+            entry = self.index[position]
+            yield int(entry["frame"]), float(entry["timestamp"]), self[position]
+
+    def _block(self, segment: int, offset: int) -> bytes:
+        if self._cache is not None and self._cache[:2] == (segment, offset):
+            return self._cache[2]
+        with open(self.segments[segment], "rb") as file:
+            file.seek(offset)
+            if self.compression == "gzip":
+                decompressor = zlib.decompressobj(31)
+                block = b""
+                while not decompressor.eof:
+                    chunk = file.read(1 << 16)
+                    if not chunk:
+                        break
+                    block += decompressor.decompress(chunk)
+            else:
+                # Blocks end where the next one starts
+                following = self.index["block"][(self._segment == segment) &
+                                                (self.index["block"] > offset)]
+                block = file.read(int(following.min()) - offset if len(following) else -1)
+        self._cache = (segment, offset, block)
+        return block
+
+
+def segment_path(path: str, number: int, compression: Optional[str] = None) -> str:
+    """
+    Get the path of a segment.
+
+    Args:
+        path (str): Base path of the segments.
+        number (int): Number of the segment.
+        compression (Optional[str]): Compression of the segment.
+
+    Returns:
+        str: The path, e.g. "detections-00003.jsonl.gz".
+    """
+    stem, extension = os.path.splitext(path)
+    return f"{stem}-{number:05d}{extension}" + (".gz" if compression == "gzip" else "")
+
+
+def segment_paths(path: str, compression: Optional[str] = None) -> List[str]:
+    """
+    Find the existing segments of a base path, in order.
+
+    Args:
+        path (str): Base path of the segments.
+        compression (Optional[str]): Compression of the segments.
+
+    Returns:
+        List[str]: Paths of the segments.
+    """
+    pattern = segment_path(glob.escape(path), 0, compression).replace("-00000", "-[0-9]*", 1)
+    # Without an extension the pattern also matches the index files
+    return sorted((segment for segment in glob.glob(pattern) if not segment.endswith(INDEX_SUFFIX)),
+                  key=_segment_number)
+
+
+def next_frame(path: str, compression: Optional[str] = None) -> int:
+    """
+    Get the frame number following the records already written to a base path.
+
+    Args:
+        path (str): Base path of the segments.
+        compression (Optional[str]): Compression of the segments.
+
+    Returns:
+        int: One more than the last frame number indexed, or 0 if there are
+        no records.
+    """
+    # Later segments may be empty if a writer stopped before flushing
+    for segment in reversed(segment_paths(path, compression)):
+        if os.path.exists(segment + INDEX_SUFFIX):
+            index = _load_index(segment + INDEX_SUFFIX)
+            if len(index):
+                return int(index["frame"].max()) + 1
+    return 0
+
+
+def _load_index(path: str) -> np.ndarray:
+    with open(path, "rb") as file:
+        data = file.read()
+    # Ignore an entry being written
+    return np.frombuffer(data[:len(data) - len(data) % INDEX_DTYPE.itemsize], dtype=INDEX_DTYPE)
+
+
+def _segment_number(path: str) -> int:
+    return int(re.findall(r"-(\d+)", os.path.basename(path))[-1])
@@ -0,0 +1,527 @@
+import json
+import struct
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Type, Union
+
+import cv2
+import numpy as np
+
+from makevision.core import Serializer
+from makevision.detection.color_detection import ColorBlob, ColorMasks
+from makevision.detection.postprocess import Detections, as_detections
+
+BOX_FORMATS = ("int16", "float16")
+MASK_ENCODINGS = ("rle", "png")
+
+_MAGIC = b"MV"
+_VERSION = 1
+# Magic, version, payload kind, flags, sequence number, reference sequence number
+_HEADER = struct.Struct("<2sBBBII")
+
+# Payload kinds
+_JSON, _DETECTIONS_LIST, _DETECTIONS = 0, 1, 2
+
+# Frame flags
+_KEYFRAME, _COMPRESSED = 1, 2
+
+# Record flags
+_KEYPOINTS, _TRACK_ID, _MASKS, _DELTA, _FLOAT16 = 1, 2, 4, 8, 16
+
+_INT16 = np.iinfo(np.int16)
+
+
+class JsonSerializer(Serializer):
+    """
+    Encodes data as compact JSON, converting arrays and Detections to lists.
+
+    The blobs and masks of a ColorDetector are sent as Detections, masks
+    are left out, see BinarySerializer to send them.
+    """
+
+    def encode(self, data: Any) -> bytes:
+        """Encode the data as UTF-8 JSON."""
+        return json.dumps(as_serializable(data), default=_to_json, separators=(",", ":")).encode()
+
+    def decode(self, payload: bytes) -> Any:
+        """Decode a JSON payload."""
+        return json.loads(payload)
+
+
+@dataclass
+class _Reference:
+    """What the previous frame sent for one Detections record."""
+    names: Dict[int, str] = field(default_factory=dict)
+    track_id: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    boxes: np.ndarray = field(default_factory=lambda: np.zeros((0, 4), dtype=np.int16))
+
+
+class BinarySerializer(Serializer):
+    """
+    Encodes detections in a compact binary format.
+
+    Boxes and keypoints are packed as int16 pixel coordinates (or float16),
+    confidences as a byte, class ids as uint16 and track ids as uint32.
+    Masks are run-length or PNG encoded. When the detections have track
+    ids, boxes are sent as the difference from the box of the same track in
+    the previous frame, usually a single byte per coordinate, with a full
+    keyframe every ``keyframe_interval`` frames. Class names are only sent
+    on keyframes. The blobs of a ColorDetector are sent as Detections, and
+    its (name, mask) results as Detections with a mask per color. Anything
+    other than Detections, color results, or a list of Detections or
+    ultralytics results, is sent as JSON.
+
+    The decoder is stateful like the encoder: decode every payload of a
+    stream, in order, with the same instance. A payload whose reference
+    frame was not decoded raises a ValueError, and decoding resumes at the
+    next keyframe.
+    """
+
+    def __init__(self, box_format: str = "int16", mask_encoding: str = "rle",
+                 delta: bool = True, keyframe_interval: int = 30,
+                 compress: bool = False, compression_level: int = 1) -> None:
+        """
+        Initialise the serializer.
+
+        Args:
+            box_format (str): "int16" rounds coordinates to whole pixels,
+                "float16" keeps fractions but loses precision far from 0.
+            mask_encoding (str): "rle" for run lengths, fast and small for
+                blob-like masks, or "png", smaller for detailed masks.
+            delta (bool): Send boxes of tracked detections as differences
+                from the previous frame. Only used with int16 boxes.
+            keyframe_interval (int): Frames between full frames when sending
+                differences.
+            compress (bool): Compress the payload with zlib, worth it for
+                masks and many detections.
+            compression_level (int): zlib level from 1 (fastest) to 9.
+        """
+        if box_format not in BOX_FORMATS:
+            raise ValueError(f"Unknown box format: {box_format}, expected one of {BOX_FORMATS}")
+        if mask_encoding not in MASK_ENCODINGS:
+            raise ValueError(
+                f"Unknown mask encoding: {mask_encoding}, expected one of {MASK_ENCODINGS}")
+        if keyframe_interval < 1:
+            raise ValueError("Keyframe interval must be at least 1.")
+        self.box_format = box_format
+        self.mask_encoding = mask_encoding
+        self.delta = delta and box_format == "int16"
+        self.keyframe_interval = keyframe_interval
+        self.compress = compress
+        self.compression_level = compression_level
+
+        self._sequence = 0
+        self._since_keyframe = 0
+        self._encoded: Optional[List[_Reference]] = None
+        self._encoded_sequence = 0
+        self._decoded: Optional[List[_Reference]] = None
+        self._decoded_sequence: Optional[int] = None
+
+    def reset(self) -> None:
+        """Forget the previous frames, so the next payload is a keyframe."""
+        self._encoded = None
+        self._decoded = None
+        self._decoded_sequence = None
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Encode detections, or any JSON serialisable data.
+
+        Args:
+            data (Any): Detections, the results of a ColorDetector, a list of
+                Detections or ultralytics results, or other data sent as JSON.
+
+        Returns:
+            bytes: The payload. Color results decode to Detections.
+        """
+        detections = data if isinstance(data, Detections) else _color_detections(data)
+        records = _as_records(data) if detections is None else [detections]
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        if records is None:
+            body = json.dumps(data, default=_to_json, separators=(",", ":")).encode()
+            return self._frame(_JSON, _KEYFRAME, 0, body)
+
+        keyframe = not self.delta or self._encoded is None or \
+            self._since_keyframe + 1 >= self.keyframe_interval or \
+            len(self._encoded) != len(records) or \
+            any(reference.names != record.names for reference, record in zip(self._encoded, records))
+        references = [_Reference() for _ in records] if keyframe else self._encoded
+        self._since_keyframe = 0 if keyframe else self._since_keyframe + 1
+
+        parts = [struct.pack("<H", len(records))]
+        encoded = []
+        for record, reference in zip(records, references):
+            encoded.append(self._encode_record(record, reference, keyframe, parts))
+        reference_sequence = 0 if keyframe else self._encoded_sequence
+        self._encoded = encoded
+        self._encoded_sequence = self._sequence
+
+        kind = _DETECTIONS_LIST if detections is None else _DETECTIONS
+        return self._frame(kind, _KEYFRAME if keyframe else 0, reference_sequence, b"".join(parts))
+
+    def decode(self, payload: bytes) -> Any:
+        """
+        Decode a payload produced by encode.
+
+        Args:
+            payload (bytes): The payload.
+
+        Returns:
+            Any: Detections, a list of Detections, or the data sent as JSON.
+
+        Raises:
+            ValueError: If the payload is malformed or its reference frame was
+                not decoded.
+        """
+        if len(payload) < _HEADER.size:
+            raise ValueError("Payload is too short.")
+        magic, version, kind, flags, sequence, reference_sequence = _HEADER.unpack_from(payload)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Payload was not encoded by a BinarySerializer.")
+        body = memoryview(payload)[_HEADER.size:]
+        if flags & _COMPRESSED:
+            body = memoryview(zlib.decompress(body))
+        if kind == _JSON:
+            return json.loads(bytes(body))
+
+        keyframe = bool(flags & _KEYFRAME)
+        if not keyframe and (self._decoded is None or self._decoded_sequence != reference_sequence):
+            self._decoded = None
+            raise ValueError("The reference frame of the payload was not decoded, waiting for a keyframe.")
+
+        reader = _Reader(body)
+        count = reader.unpack("<H")
+        references = [_Reference() for _ in range(count)] if keyframe else self._decoded
+        if len(references) != count:
+            self._decoded = None
+            raise ValueError("The payload does not match its reference frame.")
+
+        records, decoded = [], []
+        for reference in references:
+            record, state = self._decode_record(reader, reference, keyframe)
+            records.append(record)
+            decoded.append(state)
+        self._decoded = decoded
+        self._decoded_sequence = sequence
+        return records[0] if kind == _DETECTIONS and records else records
+
+    def _frame(self, kind: int, flags: int, reference_sequence: int, body: bytes) -> bytes:
+        if self.compress:
+            body = zlib.compress(body, self.compression_level)
+            flags |= _COMPRESSED
+        return _HEADER.pack(_MAGIC, _VERSION, kind, flags, self._sequence, reference_sequence) + body
+
+    def _encode_record(self, detections: Detections, reference: _Reference,
+                       keyframe: bool, parts: List[bytes]) -> _Reference:
+        count = len(detections)
+        flags = 0
+        if detections.keypoints is not None:
+            flags |= _KEYPOINTS
+        if detections.track_id is not None:
+            flags |= _TRACK_ID
+        if detections.masks is not None:
+            flags |= _MASKS
+        if self.box_format == "float16":
+            flags |= _FLOAT16
+        elif self.delta and detections.track_id is not None:
+            flags |= _DELTA
+
+        if keyframe:
+            parts.append(_pack_names(detections.names))
+        parts.append(struct.pack("<IB", count, flags))
+
+        # Track ids as the decoder reads them back, so negative ids match their reference
+        track_id = None if detections.track_id is None else \
+            detections.track_id.astype(np.uint32).astype(np.int64)
+        boxes = None
+        if flags & _FLOAT16:
+            parts.append(detections.xyxy.astype(np.float16).tobytes())
+        else:
+            boxes = _quantize(detections.xyxy)
+            if flags & _DELTA:
+                parts.extend(_encode_delta(boxes, track_id, reference))
+            else:
+                parts.append(boxes.tobytes())
+
+        parts.append(_quantize_unit(detections.conf).tobytes())
+        parts.append(detections.cls.astype(np.uint16).tobytes())
+        if flags & _TRACK_ID:
+            parts.append(detections.track_id.astype(np.uint32).tobytes())
+        if flags & _KEYPOINTS:
+            parts.append(self._encode_keypoints(detections.keypoints))
+        if flags & _MASKS:
+            parts.append(self._encode_masks(detections.masks))
+
+        if boxes is None or track_id is None:
+            return _Reference(detections.names)
+        return _Reference(detections.names, track_id, boxes)
+
+    def _decode_record(self, reader: "_Reader", reference: _Reference, keyframe: bool):
+        names = _unpack_names(reader) if keyframe else reference.names
+        count, flags = reader.unpack("<IB")
+
+        boxes = None
+        if flags & _FLOAT16:
+            xyxy = reader.array(np.float16, (count, 4)).astype(np.float32)
+        elif flags & _DELTA:
+            boxes = _decode_delta(reader, count)
+        else:
+            boxes = reader.array(np.int16, (count, 4))
+
+        conf = reader.array(np.uint8, count).astype(np.float32) / 255
+        cls = reader.array(np.uint16, count).astype(np.int32)
+        track_id = reader.array(np.uint32, count).astype(np.int64) if flags & _TRACK_ID else None
+        if flags & _DELTA:
+            boxes = _apply_delta(boxes, track_id, reference)
+        if boxes is not None:
+            xyxy = boxes.astype(np.float32)
+        keypoints = self._decode_keypoints(reader, count, flags) if flags & _KEYPOINTS else None
+        masks = self._decode_masks(reader, count) if flags & _MASKS else None
+
+        detections = Detections(xyxy, conf, cls, keypoints, names, track_id, masks)
+        if boxes is None or track_id is None:
+            return detections, _Reference(names)
+        return detections, _Reference(names, track_id, boxes)
+
+    def _encode_keypoints(self, keypoints: np.ndarray) -> bytes:
+        count, points, values = keypoints.shape
+        header = struct.pack("<BB", points, values)
+        if self.box_format == "float16":
+            xy = keypoints[..., :2].astype(np.float16)
+        else:
+            xy = _quantize(keypoints[..., :2])
+        return header + xy.tobytes() + _quantize_unit(keypoints[..., 2:]).tobytes()
+
+    def _decode_keypoints(self, reader: "_Reader", count: int, flags: int) -> np.ndarray:
+        points, values = reader.unpack("<BB")
+        keypoints = np.empty((count, points, values), dtype=np.float32)
+        dtype = np.float16 if flags & _FLOAT16 else np.int16
+        keypoints[..., :2] = reader.array(dtype, (count, points, 2))
+        keypoints[..., 2:] = reader.array(np.uint8, (count, points, values - 2)) / 255
+        return keypoints
+
+    def _encode_masks(self, masks: np.ndarray) -> bytes:
+        count, height, width = masks.shape
+        parts = [struct.pack("<HHB", height, width, MASK_ENCODINGS.index(self.mask_encoding))]
+        for mask in masks:
+            mask = mask > 0
+            if self.mask_encoding == "png":
+                data = cv2.imencode(".png", mask.view(np.uint8))[1].tobytes()
+            else:
+                data = _run_lengths(mask.ravel())
+            parts.append(struct.pack("<I", len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    def _decode_masks(self, reader: "_Reader", count: int) -> np.ndarray:
+        height, width, encoding = reader.unpack("<HHB")
+        masks = np.empty((count, height, width), dtype=bool)
+        for index in range(count):
+            data = reader.bytes(reader.unpack("<I"))
+            if MASK_ENCODINGS[encoding] == "png":
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+                np.greater(image, 0, out=masks[index])
+            else:
+                masks[index] = _from_run_lengths(data, height * width).reshape(height, width)
+        return masks
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "binary": BinarySerializer,
+}
+
+
+def create_serializer(serializer: Union[str, Serializer, Type[Serializer], None],
+                      options: Optional[Dict[str, Any]] = None) -> Optional[Serializer]:
+    """
+    Create a serializer from its name or class.
+
+    Args:
+        serializer (Union[str, Serializer, Type[Serializer], None]): "json",
+            "binary", a Serializer class, created with the options, a
+            Serializer, returned as is, or None to send data unchanged.
+        options (Optional[Dict[str, Any]]): Keyword arguments of the
+            serializer, e.g. the box format of a BinarySerializer.
+
+    Returns:
+        Optional[Serializer]: The serializer.
+    """
+    if serializer is None or isinstance(serializer, Serializer):
+        return serializer
+    if isinstance(serializer, type) and issubclass(serializer, Serializer):
+        return serializer(**(options or {}))
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {serializer}, expected one of {list(SERIALIZERS)}")
+    return SERIALIZERS[serializer](**(options or {}))
+
+
+def as_serializable(data: Any) -> Any:
+    """
+    Convert the blobs or (name, mask) results of a ColorDetector to Detections.
+
+    Args:
+        data (Any): The data to send.
+
+    Returns:
+        Any: The Detections of color results, other data unchanged.
+    """
+    detections = _color_detections(data)
+    return data if detections is None else detections
+
+
+class _Reader:
+    """Reads values from a payload in order."""
+
+    def __init__(self, data: memoryview) -> None:
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, format: str) -> Any:
+        size = struct.calcsize(format)
+        if self.offset + size > len(self.data):
+            raise ValueError("Payload is truncated.")
+        values = struct.unpack_from(format, self.data, self.offset)
+        self.offset += size
+        return values[0] if len(values) == 1 else values
+
+    def bytes(self, length: int) -> bytes:
+        if self.offset + length > len(self.data):
+            raise ValueError("Payload is truncated.")
+        data = bytes(self.data[self.offset:self.offset + length])
+        self.offset += length
+        return data
+
+    def array(self, dtype: Any, shape: Any) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        if self.offset + count * dtype.itemsize > len(self.data):
+            raise ValueError("Payload is truncated.")
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += count * dtype.itemsize
+        return array.reshape(shape)
+
+
+def _as_records(data: Any) -> Optional[List[Detections]]:
+    if isinstance(data, Detections):
+        return [data]
+    if isinstance(data, (list, tuple)) and \
+            all(isinstance(item, Detections) or hasattr(item, "boxes") for item in data):
+        return [as_detections(item) for item in data]
+    return None
+
+
+def _color_detections(data: Any) -> Optional[Detections]:
+    """Detections of the blobs or (name, mask) results of a ColorDetector, else None."""
+    if isinstance(data, ColorMasks):
+        return Detections.from_color_masks(data)
+    if not isinstance(data, (list, tuple)) or not data:
+        return None
+    if all(isinstance(item, ColorBlob) for item in data):
+        names = dict(enumerate(dict.fromkeys(blob.name for blob in data)))
+        return Detections.from_blobs(data, names)
+    if all(isinstance(item, tuple) and len(item) == 2 and isinstance(item[0], str)
+           and isinstance(item[1], np.ndarray) and item[1].ndim == 2 for item in data):
+        return Detections.from_color_masks(data)
+    return None
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, ColorBlob):
+        return asdict(value)
+    if isinstance(value, ColorMasks):
+        return Detections.from_color_masks(value).to_dict()
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "boxes"):
+        return as_detections(value).to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _quantize(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values), _INT16.min, _INT16.max).astype(np.int16)
+
+
+def _quantize_unit(values: np.ndarray) -> np.ndarray:
+    return np.rint(np.clip(values, 0, 1) * 255).astype(np.uint8)
+
+
+def _pack_names(names: Dict[int, str]) -> bytes:
+    parts = [struct.pack("<H", len(names))]
+    for class_id, name in names.items():
+        encoded = str(name).encode()[:255]
+        parts.append(struct.pack("<HB", int(class_id), len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def _unpack_names(reader: _Reader) -> Dict[int, str]:
+    names = {}
+    for _ in range(reader.unpack("<H")):
+        class_id, length = reader.unpack("<HB")
+        names[class_id] = reader.bytes(length).decode()
+    return names
+
+
+def _encode_delta(boxes: np.ndarray, track_id: np.ndarray, reference: _Reference) -> List[bytes]:
+    """Pack which boxes have a reference, their differences, then the other boxes."""
+    index = _reference_index(track_id, reference.track_id)
+    referenced = index >= 0
+    residual = boxes[referenced].astype(np.int32) - reference.boxes[index[referenced]]
+    narrow = not residual.size or np.abs(residual).max() <= 127
+    return [np.packbits(referenced).tobytes(), struct.pack("<B", 1 if narrow else 2),
+            residual.astype(np.int8 if narrow else np.int16).tobytes(),
+            boxes[~referenced].tobytes()]
+
+
+def _decode_delta(reader: _Reader, count: int):
+    referenced = np.unpackbits(reader.array(np.uint8, (count + 7) // 8), count=count).astype(bool)
+    width = reader.unpack("<B")
+    residual = reader.array(np.int8 if width == 1 else np.int16, (int(referenced.sum()), 4))
+    absolute = reader.array(np.int16, (count - len(residual), 4))
+    return referenced, residual, absolute
+
+
+def _apply_delta(delta, track_id: np.ndarray, reference: _Reference) -> np.ndarray:
+    referenced, residual, absolute = delta
+    index = _reference_index(track_id, reference.track_id)
+    if not np.array_equal(index >= 0, referenced):
+        raise ValueError("The payload does not match its reference frame.")
+    boxes = np.empty((len(track_id), 4), dtype=np.int16)
+    boxes[referenced] = reference.boxes[index[referenced]] + residual
+    boxes[~referenced] = absolute
+    return boxes
+
+
+def _reference_index(track_id: np.ndarray, reference_ids: np.ndarray) -> np.ndarray:
+    """Index of each track id in the reference, or -1."""
+    if not len(reference_ids) or not len(track_id):
+        return np.full(len(track_id), -1, dtype=np.int64)
+    order = np.argsort(reference_ids, kind="stable")
+    position = np.minimum(np.searchsorted(reference_ids, track_id, sorter=order), len(order) - 1)
+    found = reference_ids[order[position]] == track_id
+    return np.where(found, order[position], -1)
+
+
+def _run_lengths(mask: np.ndarray) -> bytes:
+    """Lengths of the alternating runs of a flat mask, starting with a run of False."""
+    changes = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [mask.size]))
+    runs = np.diff(bounds)
+    if mask.size and mask[0]:
+        runs = np.concatenate(([0], runs))
+    dtype = np.uint16 if not runs.size or runs.max() <= 0xFFFF else np.uint32
+    return struct.pack("<B", np.dtype(dtype).itemsize) + runs.astype(dtype).tobytes()
+
+
+def _from_run_lengths(data: bytes, size: int) -> np.ndarray:
+    runs = np.frombuffer(data, dtype=np.uint16 if data[0] == 2 else np.uint32, offset=1)
+    values = np.arange(len(runs)) % 2 == 1
+    mask = np.repeat(values, runs.astype(np.int64))
+    if mask.size != size:
+        raise ValueError("Mask run lengths do not match its size.")
+    return mask
@@ -1,23 +1,64 @@
-from makevision.core import Network
-from typing import Dict
+from makevision.core import Network, Serializer
+from typing import Any, Dict, Optional
+
+from .async_sender import AsyncSender
+from .serialization import create_serializer
 
 
 class SocketIONetwork(Network):
     def __init__(self, config: Dict):
+        """
+        Initialise the Socket.IO network.
+
+        Args:
+            config (Dict): Network configuration with the server "url" and the
+                "endpoints" to join. Setting "async" to true sends from a
+                background thread, configured by the optional "queue_size",
+                "policy" ("latest", "drop_oldest", "drop_newest" or "block"),
+                "batch_window" (seconds), "batch", "backoff_initial" and
+                "backoff_max" (seconds) keys. The optional "serializer" key
+                ("json", "binary" or a Serializer class) encodes the data
+                before sending, with the keyword arguments in
+                "serializer_options". Each endpoint gets its own serializer,
+                as delta encoding keeps state per stream. A Serializer
+                instance is shared by every endpoint, so it must be stateless.
+        """
         self.config = config
         self.socket = None
+        self.sender: Optional[AsyncSender] = None
+        self.serializers: Dict[str, Serializer] = {}
         self.connect()
-        self.socket.on('connect', self.on_connect)
 
     def connect(self):
         """Establish a connection to the Socket.IO server."""
         import socketio
-        self.socket = socketio.Client()
-        self.socket.connect(self.config['url'])
+
+        if not self.config.get("async", False):
+            self.socket = socketio.Client()
+            self.socket.on('connect', self.on_connect)
+            self.socket.connect(self.config['url'])
+            return
+
+        # The sender reconnects with its own backoff, without blocking the caller
+        self.socket = socketio.Client(reconnection=False)
+        self.socket.on('connect', self.on_connect)
+        self.sender = AsyncSender(
+            self._emit,
+            lambda: self.socket.connect(self.config['url']),
+            lambda: self.socket.connected,
+            queue_size=self.config.get("queue_size", 64),
+            policy=self.config.get("policy", "latest"),
+            batch_window=self.config.get("batch_window", 0.0),
+            batch=self.config.get("batch", False),
+            backoff_initial=self.config.get("backoff_initial", 0.5),
+            backoff_max=self.config.get("backoff_max", 10.0),
+        )
+        self.sender.start()
 
     def send_data(self, data: Dict, endpoint: str):
         """
         Send data over the socketio network to a specific endpoint.
+        In async mode the data is queued and this returns immediately.
 
         Args:
             data (Dict): The data to send.
@@ -26,8 +67,10 @@ class SocketIONetwork(Network):
         Raises:
             ConnectionError: If the socket is not connected.
         """
-        if self.socket:
-            self.socket.emit(endpoint, data)
+        if self.sender:
+            self.sender.submit(endpoint, data)
+        elif self.socket:
+            self._emit(endpoint, data)
         else:
             raise ConnectionError(
                 "Socket not connected. Call connect() first.")
@@ -36,9 +79,47 @@ class SocketIONetwork(Network):
         pass
 
     def disconnect(self):
-        self.socket.disconnect()
+        if self.sender:
+            self.sender.stop(self.config.get("flush_timeout", 1.0))
+            self.sender = None
+        if self.socket.connected:
+            self.socket.disconnect()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get the metrics of the async sender.
+
+        Returns:
+            Dict[str, Any]: Queue depth, message counts and latencies, empty
+            when not sending asynchronously.
+        """
+        return self.sender.metrics() if self.sender else {}
+
+    def _emit(self, endpoint: str, data: Any) -> None:
+        """Encode the data with the serializer of the endpoint, and send it."""
+        serializer = self._serializer(endpoint)
+        if serializer is None:
+            self.socket.emit(endpoint, data)
+            return
+        try:
+            self.socket.emit(endpoint, serializer.encode(data))
+        except Exception:
+            # The other end may have missed the payload the next one refers to
+            serializer.reset()
+            raise
+
+    def _serializer(self, endpoint: str) -> Optional[Serializer]:
+        if endpoint not in self.serializers:
+            # Serializers may keep state per stream, so every endpoint has its own
+            self.serializers[endpoint] = create_serializer(
+                self.config.get("serializer"), self.config.get("serializer_options"))
+        return self.serializers[endpoint]
 
     def on_connect(self):
         """Handler for when connection is established."""
+        # A restarted server has lost the frames the next payloads refer to
+        for serializer in self.serializers.values():
+            if serializer is not None:
+                serializer.reset()
         for endpoint in self.config['endpoints']:
             self.socket.emit('join', endpoint)
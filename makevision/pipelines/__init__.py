@@ -1 +1,2 @@
 from .basic_pipeline import BasicPipeline
+from .parallel_pipeline import ParallelPipeline, Stage, StageExecutor, StageStats
@@ -1,16 +1,19 @@
+from typing import List, Optional
+
 import cv2
 
 from makevision.core import (ArucoBoardDef, Calibrator, Detector,
                              Filter, Network, ObstructionDetector,
-                             Pipeline, Reader, State)
+                             Pipeline, Reader, State, Tracker)
 
 
 class BasicPipeline(Pipeline):
     def run(self, calibrator: Calibrator, reader: Reader, detector: Detector,
             filter: Filter, obstruction: ObstructionDetector, state: State,
-            network: Network, calibration_path: str = "./data/images/",
+            network: Network, tracker: Optional[Tracker] = None,
+            calibration_path: str = "./data/images/",
             aruco_board: ArucoBoardDef = ArucoBoardDef()) -> None:
-        """Run the pipeline."""
+        """Run the pipeline, tracking the detections before filtering them if a tracker is given."""
         calibrator.calibrate(calibration_path, aruco_board)
 
         while True:
@@ -23,7 +26,7 @@ class BasicPipeline(Pipeline):
             obstruction_detected = obstruction.detect_obstruction(frame)
 
             detections = detector.detect(frame)
-            filtered_detections = filter.apply(detections)
+            filtered_detections = filter.apply(track(tracker, detector, detections))
 
             state.update(filtered_detections, obstruction_detected)
 
@@ -37,3 +40,23 @@ class BasicPipeline(Pipeline):
         reader.release()
         network.disconnect()
         cv2.destroyAllWindows()
+
+
+def track(tracker: Optional[Tracker], detector: Detector, detections: List) -> List:
+    """
+    Track the detections of a frame.
+
+    Args:
+        tracker (Optional[Tracker]): The tracker, the detections are returned
+            unchanged if None.
+        detector (Detector): The detector, whose ``inferred`` attribute, e.g.
+            of a ScheduledDetector, tells whether the detections are new.
+        detections (List): The detections of the frame.
+
+    Returns:
+        List: The tracked detections. Only the tracks are predicted on frames
+        the detector did not run on.
+    """
+    if tracker is None:
+        return detections
+    return tracker.update(detections if getattr(detector, "inferred", True) else None)
@@ -0,0 +1,476 @@
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from makevision.core import (ArucoBoardDef, Calibrator, Detector,
+                             Filter, FrameData, Network, ObstructionDetector,
+                             Pipeline, Reader, State, Tracker)
+from makevision.core.exceptions import PipelineError
+from .basic_pipeline import track
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("thread", "process")
+
+
+@dataclass
+class Stage:
+    """
+    A single step of a staged pipeline.
+
+    The stage function receives the frame and a context dictionary that is
+    passed along to the following stages. It may modify the frame in place,
+    replace ``frame.frame`` and add entries to the context. Returning False
+    stops the pipeline once the frames in flight have been processed.
+
+    A stage returning frames larger than it receives, e.g. upscaling or
+    converting gray to BGR, sets ``output_shape`` to a function mapping the
+    shape and dtype of its input frame to those of its output, so the frame
+    slots are made large enough.
+
+    In process mode the functions are pickled, so they must be defined at
+    module level (``functools.partial`` may be used to bind components).
+    """
+    name: str
+    fn: Callable[[FrameData, Dict[str, Any]], Optional[bool]]
+    output_shape: Optional[Callable[[Tuple[int, ...], np.dtype], Tuple[Tuple[int, ...], Any]]] = None
+
+
+@dataclass
+class StageStats:
+    """Throughput statistics for a pipeline stage."""
+    name: str
+    processed: int
+    busy_time: float
+    wait_time: float
+    elapsed: float
+
+    @property
+    def fps(self) -> float:
+        """Frames processed per second of wall time."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def utilisation(self) -> float:
+        """Fraction of the wall time the stage spent working."""
+        return self.busy_time / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class FramePool:
+    """
+    A fixed number of frame slots backed by a single buffer.
+
+    When ``shared`` is True the buffer lives in shared memory, and pickling
+    the pool (e.g. when passing it to a worker process) attaches to the same
+    memory instead of copying it. Only the pool that created the memory
+    unlinks it when closed.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, shared: bool = False) -> None:
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shared = shared
+        self.attached = False
+        if shared:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=slots * slot_bytes)
+            self._buffer = np.ndarray(
+                (slots, slot_bytes), dtype=np.uint8, buffer=self._shm.buf)
+        else:
+            self._shm = None
+            self._buffer = np.empty((slots, slot_bytes), dtype=np.uint8)
+
+    def __getstate__(self) -> Dict:
+        if not self.shared:
+            raise PipelineError("Only shared frame pools can be sent to other processes.")
+        return {"name": self._shm.name, "slots": self.slots, "slot_bytes": self.slot_bytes}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.slots = state["slots"]
+        self.slot_bytes = state["slot_bytes"]
+        self.shared = True
+        self.attached = True
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._buffer = np.ndarray(
+            (self.slots, self.slot_bytes), dtype=np.uint8, buffer=self._shm.buf)
+
+    def view(self, slot: int, shape: Tuple, dtype: str) -> np.ndarray:
+        """
+        Get an array view of a slot.
+
+        Args:
+            slot (int): Index of the slot.
+            shape (Tuple): Shape of the frame stored in the slot.
+            dtype (str): Data type of the frame stored in the slot.
+
+        Returns:
+            np.ndarray: A view on the slot memory.
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes > self.slot_bytes:
+            raise PipelineError(
+                f"Frame of {nbytes} bytes does not fit in a {self.slot_bytes} byte slot, "
+                f"declare the output shape of stages enlarging frames or set slot_bytes.")
+        return self._buffer[slot, :nbytes].view(dtype).reshape(shape)
+
+    def write(self, slot: int, frame: np.ndarray) -> None:
+        """Copy a frame into a slot."""
+        np.copyto(self.view(slot, frame.shape, frame.dtype.str), frame)
+
+    def close(self) -> None:
+        """Release the pool memory."""
+        if self._shm is not None:
+            self._buffer = None
+            self._shm.close()
+            if not self.attached:
+                self._shm.unlink()
+            self._shm = None
+
+
+class PooledFrameData(FrameData):
+    """Frame data stored in a slot of a FramePool."""
+
+    def __init__(self, pool: FramePool, slot: int, shape: Tuple, dtype: str) -> None:
+        self._pool = pool
+        self._slot = slot
+        self._frame = pool.view(slot, shape, dtype)
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Get the frame data."""
+        return self._frame
+
+    @frame.setter
+    def frame(self, value: np.ndarray):
+        # Frames replaced by a stage are copied back into the slot so the
+        # next stage can find them without pickling the array.
+        view = self._pool.view(self._slot, value.shape, value.dtype.str)
+        is_view = (value.__array_interface__["data"][0] == view.__array_interface__["data"][0]
+                   and value.shape == view.shape and value.strides == view.strides)
+        if not is_view:
+            # Crops and channels of the slot overlap the memory they are copied to
+            self._pool.write(self._slot, value.copy() if np.may_share_memory(value, view) else value)
+        self._frame = view
+
+
+def _stage_worker(stage: Stage, inbox: Any, outbox: Any, pool: FramePool,
+                  free_slots: Any, stats: Any, stop_event: Any, errors: Any) -> None:
+    """Process packets from the inbox until the end-of-stream marker arrives."""
+    wait_start = time.perf_counter()
+    while True:
+        packet = inbox.get()
+        busy_start = time.perf_counter()
+        stats[2] += busy_start - wait_start
+
+        if packet is None:
+            if outbox is not None:
+                outbox.put(None)
+            break
+
+        seq, slot, shape, dtype, context = packet
+        frame = PooledFrameData(pool, slot, shape, dtype)
+        frame.timestamp, frame.sequence, frame.source_id = context["frame_metadata"]
+
+        # After a failure or stop request the remaining frames are only
+        # forwarded so that their slots are released in order.
+        if not stop_event.is_set():
+            try:
+                if stage.fn(frame, context) is False:
+                    stop_event.set()
+            except Exception as e:
+                errors.put(f"Stage '{stage.name}' failed on frame {seq}: {e!r}")
+                stop_event.set()
+
+        frame_data = frame.frame
+        frame = None
+
+        # Time spent blocked on a full downstream queue counts as waiting
+        wait_start = time.perf_counter()
+        stats[0] += 1
+        stats[1] += wait_start - busy_start
+        if outbox is not None:
+            outbox.put((seq, slot, frame_data.shape,
+                       frame_data.dtype.str, context))
+        else:
+            free_slots.put(slot)
+
+    if pool.attached:
+        pool.close()
+
+
+class StageExecutor:
+    """
+    Runs pipeline stages concurrently, one worker per stage.
+
+    Frames are read on the calling thread, copied once into a pool of frame
+    slots and then handed from stage to stage through bounded queues which
+    only carry the slot index and the context. Each stage has a single
+    worker consuming its queue in order, so frames leave the pipeline in the
+    order they were read. When a stage falls behind its queue fills up and
+    the stages before it, and finally the reader, block.
+
+    The slots are sized once, from the first frame and the ``output_shape``
+    of the stages, or by ``slot_bytes``. A frame that does not fit, e.g. a
+    later frame larger than the first one or the output of a stage
+    enlarging frames without declaring it, stops the pipeline with a
+    PipelineError.
+    """
+
+    def __init__(self, stages: List[Stage], mode: str = "thread", queue_size: int = 4,
+                 slot_bytes: Optional[int] = None) -> None:
+        """
+        Initialise the executor.
+
+        Args:
+            stages (List[Stage]): Stages to run, in order.
+            mode (str): "thread" to run each stage on its own thread, or
+                "process" to run each stage in its own process.
+            queue_size (int): Maximum number of frames waiting before a stage.
+            slot_bytes (Optional[int]): Size of the frame slots, defaults to
+                the largest frame the stages make from the first frame.
+        """
+        if not stages:
+            raise ValueError("At least one stage is required.")
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unsupported execution mode: {mode}. Expected one of {EXECUTION_MODES}.")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1.")
+
+        self.stages = stages
+        self.mode = mode
+        self.queue_size = queue_size
+        self.slot_bytes = slot_bytes
+        self._context = mp.get_context()
+        self._stats: Dict[str, Any] = {}
+        self._start_time = 0.0
+        self._end_time = 0.0
+        self._stop_event = None
+
+    def stop(self) -> None:
+        """Stop reading new frames and let the frames in flight drain."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def stats(self) -> Dict[str, StageStats]:
+        """
+        Get the throughput statistics of the reader and every stage.
+
+        Returns:
+            Dict[str, StageStats]: Statistics keyed by stage name.
+        """
+        end = self._end_time or time.perf_counter()
+        elapsed = end - self._start_time if self._start_time else 0.0
+        return {name: StageStats(name, int(values[0]), values[1], values[2], elapsed)
+                for name, values in self._stats.items()}
+
+    def run(self, reader: Reader, max_frames: Optional[int] = None) -> Dict[str, StageStats]:
+        """
+        Read frames from the reader and push them through the stages.
+
+        Args:
+            reader (Reader): The source of frames.
+            max_frames (Optional[int]): Stop after this many frames.
+
+        Raises:
+            PipelineError: If a stage raised an exception.
+
+        Returns:
+            Dict[str, StageStats]: Statistics keyed by stage name.
+        """
+        self._stats = {name: self._context.Array("d", 3)
+                       for name in ["read"] + [stage.name for stage in self.stages]}
+        self._start_time = time.perf_counter()
+        self._end_time = 0.0
+
+        success, frame = reader.read()
+        read_stats = self._stats["read"]
+        read_stats[1] += time.perf_counter() - self._start_time
+        if not success:
+            self._end_time = time.perf_counter()
+            return self.stats()
+
+        # Enough slots for every queue to be full while each worker holds a frame
+        slots = len(self.stages) * (self.queue_size + 1) + 1
+        pool = FramePool(slots, self.slot_bytes or self._largest_frame(frame.frame),
+                         shared=self.mode == "process")
+
+        if self.mode == "process":
+            make_queue, worker_type = self._context.Queue, self._context.Process
+            self._stop_event = self._context.Event()
+            errors = self._context.Queue()
+        else:
+            make_queue, worker_type = queue.Queue, threading.Thread
+            self._stop_event = threading.Event()
+            errors = queue.Queue()
+
+        free_slots = make_queue()
+        for slot in range(slots):
+            free_slots.put(slot)
+        queues = [make_queue(self.queue_size) for _ in self.stages]
+
+        workers = []
+        for i, stage in enumerate(self.stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            worker = worker_type(
+                target=_stage_worker,
+                args=(stage, queues[i], outbox, pool, free_slots,
+                      self._stats[stage.name], self._stop_event, errors),
+                name=f"makevision-stage-{stage.name}",
+                daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        seq = 0
+        try:
+            while success and not self._stop_event.is_set():
+                wait_start = time.perf_counter()
+                slot = free_slots.get()
+                pool.write(slot, frame.frame)
+                # Readers' stamps travel with the frame, which is rebuilt by every stage
+                metadata = (frame.timestamp, seq if frame.sequence is None else frame.sequence,
+                            frame.source_id)
+                queues[0].put((seq, slot, frame.frame.shape,
+                              frame.frame.dtype.str, {"frame_metadata": metadata}))
+                seq += 1
+                read_stats[0] += 1
+                if max_frames is not None and seq >= max_frames:
+                    break
+
+                busy_start = time.perf_counter()
+                read_stats[2] += busy_start - wait_start
+                success, frame = reader.read()
+                read_stats[1] += time.perf_counter() - busy_start
+        finally:
+            queues[0].put(None)
+            for worker in workers:
+                worker.join()
+            self._end_time = time.perf_counter()
+            pool.close()
+
+        failures = []
+        while True:
+            try:
+                failures.append(errors.get_nowait())
+            except queue.Empty:
+                break
+        if failures:
+            raise PipelineError("; ".join(failures))
+
+        return self.stats()
+
+    def _largest_frame(self, frame: np.ndarray) -> int:
+        """Bytes of the largest frame the stages make from a frame like the given one."""
+        shape, dtype = frame.shape, frame.dtype
+        largest = frame.nbytes
+        for stage in self.stages:
+            if stage.output_shape is not None:
+                shape, dtype = stage.output_shape(shape, dtype)
+                dtype = np.dtype(dtype)
+                largest = max(largest, int(np.prod(shape)) * dtype.itemsize)
+        return largest
+
+
+class _ProbeFrameData(FrameData):
+    """Frame data a stage is tried on to find the shape of its output."""
+
+    def __init__(self, frame: np.ndarray) -> None:
+        self._frame = frame
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Get the frame data."""
+        return self._frame
+
+    @frame.setter
+    def frame(self, value: np.ndarray):
+        self._frame = value
+
+
+def _undistort_stage(calibrator: Calibrator, frame: FrameData, context: Dict) -> None:
+    calibrator.undistort(frame)
+
+
+def _undistorted_shape(calibrator: Calibrator, shape: Tuple[int, ...],
+                       dtype: np.dtype) -> Tuple[Tuple[int, ...], np.dtype]:
+    # Undistortion may resize and convert the frame, which only running it tells
+    probe = _ProbeFrameData(np.zeros(shape, dtype))
+    calibrator.undistort(probe)
+    return probe.frame.shape, probe.frame.dtype
+
+
+def _detect_stage(detector: Detector, obstruction: ObstructionDetector, filter: Filter,
+                  tracker: Optional[Tracker], frame: FrameData, context: Dict) -> None:
+    context["obstruction_detected"] = obstruction.detect_obstruction(frame)
+    context["detections"] = detector.detect(frame)
+    context["filtered_detections"] = filter.apply(
+        track(tracker, detector, context["detections"]))
+
+
+def _state_stage(state: State, frame: FrameData, context: Dict) -> None:
+    state.update(context["filtered_detections"],
+                 context["obstruction_detected"])
+
+
+def _network_stage(network: Network, frame: FrameData, context: Dict) -> None:
+    network.send_data(context["filtered_detections"])
+
+
+def _visualize_stage(detector: Detector, frame: FrameData, context: Dict) -> bool:
+    detector.visualize(frame, context["detections"])
+    return not cv2.waitKey(1) & 0xFF == ord('q')
+
+
+class ParallelPipeline(Pipeline):
+    """
+    The basic pipeline with its stages running concurrently.
+
+    Undistortion, detection, state updates, networking and visualisation
+    each run on their own worker, so a slow stage only limits the frame
+    rate once its queue is full instead of adding to every frame's latency.
+    In process mode every worker owns a copy of its components, e.g. the
+    state is only updated in the state worker. A tracker runs in the
+    detection stage, between the detector and the filter.
+    """
+
+    def run(self, calibrator: Calibrator, reader: Reader, detector: Detector,
+            filter: Filter, obstruction: ObstructionDetector, state: State,
+            network: Network, tracker: Optional[Tracker] = None,
+            calibration_path: str = "./data/images/",
+            aruco_board: ArucoBoardDef = ArucoBoardDef(), mode: str = "thread",
+            queue_size: int = 4) -> None:
+        """Run the pipeline."""
+        calibrator.calibrate(calibration_path, aruco_board)
+
+        stages = [
+            Stage("undistort", partial(_undistort_stage, calibrator),
+                  partial(_undistorted_shape, calibrator)),
+            Stage("detect", partial(_detect_stage,
+                  detector, obstruction, filter, tracker)),
+            Stage("state", partial(_state_stage, state)),
+            Stage("network", partial(_network_stage, network)),
+            Stage("visualize", partial(_visualize_stage, detector)),
+        ]
+        executor = StageExecutor(stages, mode, queue_size)
+
+        try:
+            stats = executor.run(reader)
+        finally:
+            reader.release()
+            network.disconnect()
+            cv2.destroyAllWindows()
+
+        for stage_stats in stats.values():
+            logger.info(
+                f"Stage '{stage_stats.name}' - Frames: {stage_stats.processed}, "
+                f"FPS: {stage_stats.fps:.2f}, Utilisation: {stage_stats.utilisation:.0%}")
@@ -1,3 +1,6 @@
 from .webcam_reader import WebcamReader
 from .video_reader import VideoReader
 from .image_reader import ImageReader
+from .multi_reader import MultiReader, FrameSet
+from .decoders import OpenCVDecoder, PyAVDecoder, create_decoder
+from .chunks import VideoChunk, ChunkReader, plan_chunks
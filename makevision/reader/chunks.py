@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from makevision.core import FrameData, Reader, VideoDecoder
+from .decoders import create_decoder
+from .video_reader import VideoReader
+
+
+@dataclass(frozen=True)
+class VideoChunk:
+    """A range of frames of a video, processed independently of the rest."""
+    path: str
+    index: int
+    start: int
+    stop: Optional[int]
+
+    @property
+    def frames(self) -> Optional[int]:
+        """Number of frames in the chunk, or None if it runs to the end of the video."""
+        return None if self.stop is None else self.stop - self.start
+
+
+def plan_chunks(path: str, chunk_frames: int, decoder: Union[str, VideoDecoder] = "opencv",
+                frame_step: int = 1, decoder_options: Optional[Dict[str, Any]] = None) -> List[VideoChunk]:
+    """
+    Split a video into chunks of about ``chunk_frames`` frames.
+
+    Chunks start on keyframes when the decoder can list them, so a worker
+    seeking to the start of its chunk decodes no frames of the previous
+    one. Otherwise the video is split evenly. Every chunk starts on a
+    multiple of ``frame_step``, so the chunks read the same frames as
+    reading the whole video with that step.
+
+    Args:
+        path (str): Path to the video file.
+        chunk_frames (int): Target number of frames per chunk.
+        decoder (Union[str, VideoDecoder]): Decoder used to find the frame
+            count and keyframes, see create_decoder.
+        frame_step (int): Step the chunks are read with.
+        decoder_options (Optional[Dict[str, Any]]): Keyword arguments of the decoder.
+
+    Returns:
+        List[VideoChunk]: The chunks, in order. A single chunk covering the
+        whole video if its frame count is unknown.
+    """
+    if chunk_frames < 1:
+        raise ValueError("Chunks must have at least 1 frame.")
+    video_decoder = create_decoder(decoder, path, frame_step, decoder_options)
+    try:
+        frame_count = video_decoder.frame_count
+        keyframes = video_decoder.keyframes() if frame_count else None
+    finally:
+        if video_decoder is not decoder:
+            video_decoder.release()
+    if not frame_count:
+        return [VideoChunk(path, 0, 0, None)]
+
+    starts = {0}
+    for target in range(chunk_frames, frame_count, chunk_frames):
+        if keyframes:
+            # Start on the last keyframe at or before the target
+            target = max((keyframe for keyframe in keyframes if keyframe <= target), default=0)
+        starts.add(-(-target // frame_step) * frame_step)
+    starts = sorted(start for start in starts if start < frame_count)
+    stops = starts[1:] + [frame_count]
+    return [VideoChunk(path, index, start, stop)
+            for index, (start, stop) in enumerate(zip(starts, stops))]
+
+
+class ChunkReader(Reader):
+    """
+    Reads the frames of a VideoChunk as fast as they decode.
+
+    Frames are stamped with their index in the video as sequence number,
+    so results of different chunks can be put back in order. The index of
+    the last frame read is kept in ``frame_index``.
+    """
+
+    def __init__(self, chunk: VideoChunk, decoder: Union[str, VideoDecoder] = "opencv",
+                 frame_step: int = 1, decoder_options: Optional[Dict[str, Any]] = None,
+                 **reader_options: Any) -> None:
+        """
+        Initialise the reader and seek to the start of the chunk.
+
+        Args:
+            chunk (VideoChunk): The chunk to read.
+            decoder (Union[str, VideoDecoder]): Decoding backend, see VideoReader.
+            frame_step (int): Read every frame_step-th frame only.
+            decoder_options (Optional[Dict[str, Any]]): Keyword arguments of the decoder.
+            **reader_options: Further arguments of VideoReader, e.g. prefetch.
+        """
+        self.chunk = chunk
+        self.reader = VideoReader(chunk.path, cap_fps=False, decoder=decoder, frame_step=frame_step,
+                                  decoder_options=decoder_options, **reader_options)
+        self.frame_index: Optional[int] = None
+        self.frames_read = 0
+        self.reset()
+
+    def read(self, *args, **kwargs) -> Tuple[bool, Optional[FrameData]]:
+        """Read the next frame of the chunk."""
+        success, frame = self.reader.read(*args, **kwargs)
+        if not success:
+            return False, None
+        # The frames read after a seek are start, start + step, start + 2 * step, ...
+        index = self.chunk.start if self.frame_index is None else \
+            self.frame_index + self.reader.decoder.step
+        if self.chunk.stop is not None and index >= self.chunk.stop:
+            return False, None
+        self.frame_index = index
+        self.frames_read += 1
+        frame.stamp(index, self.chunk.path, frame.timestamp)
+        return True, frame
+
+    def release(self) -> None:
+        """Release the video reader."""
+        self.reader.release()
+
+    def reset(self) -> None:
+        """Go back to the start of the chunk."""
+        self.reader.seek(self.chunk.start)
+        self.frame_index = None
+        self.frames_read = 0
@@ -0,0 +1,234 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import cv2
+import numpy as np
+
+from makevision.core import VideoDecoder
+
+SKIP_FRAMES = ("DEFAULT", "NONREF", "BIDIR", "NONINTRA", "NONKEY")
+
+
+class OpenCVDecoder(VideoDecoder):
+    """Decodes with cv2.VideoCapture, grabbing the skipped frames without converting them."""
+
+    def __init__(self, path: str, step: int = 1, backend: int = cv2.CAP_ANY) -> None:
+        """
+        Initialise the decoder.
+
+        Args:
+            path (str): Path to the video file.
+            step (int): Return every step-th frame only.
+            backend (int): OpenCV capture backend.
+        """
+        super().__init__(path, step)
+        self.cap = cv2.VideoCapture(path, backend)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file: {path}")
+
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Decode the next frame, into the buffer if given, then skip the frames up to the next step."""
+        success, frame = self.cap.read(buffer)
+        if success:
+            for _ in range(self.step - 1):
+                if not self.cap.grab():
+                    break
+        return success, frame
+
+    def seek(self, frame: int) -> None:
+        """Move to a frame, accurate as far as the OpenCV backend allows."""
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame)
+
+    @property
+    def position(self) -> int:
+        """Index of the next frame read."""
+        return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Number of frames reported by the container."""
+        count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return count if count > 0 else None
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Frame rate reported by the container."""
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        return fps if fps > 0 else None
+
+    def release(self) -> None:
+        """Release the capture."""
+        self.cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    """
+    Decodes with FFmpeg through PyAV, using frame and slice threading.
+
+    Skipped frames are decoded, as later frames depend on them, but are not
+    converted to BGR, which is most of the cost of a frame at high
+    resolutions. ``skip_frame`` lets FFmpeg skip decoding frames instead,
+    e.g. "NONREF" to drop the B-frames nothing depends on, or "NONKEY" to
+    decode keyframes only, which changes which frames are returned. Seeking
+    jumps to the keyframe before the target and decodes forward to it.
+    """
+
+    def __init__(self, path: str, step: int = 1, threads: int = 0,
+                 thread_type: str = "AUTO", skip_frame: str = "DEFAULT") -> None:
+        """
+        Initialise the decoder.
+
+        Args:
+            path (str): Path to the video file.
+            step (int): Return every step-th frame only.
+            threads (int): Number of decoding threads, 0 to let FFmpeg choose.
+            thread_type (str): "FRAME", "SLICE" or "AUTO" for both.
+            skip_frame (str): Frames FFmpeg does not decode, one of
+                "DEFAULT", "NONREF", "BIDIR", "NONINTRA" or "NONKEY".
+        """
+        import av
+
+        super().__init__(path, step)
+        if skip_frame not in SKIP_FRAMES:
+            raise ValueError(f"Unknown skip frame mode: {skip_frame}, expected one of {SKIP_FRAMES}")
+        try:
+            self.container = av.open(path)
+        except av.error.FFmpegError as error:
+            raise ValueError(f"Could not open video file: {path}") from error
+        if not self.container.streams.video:
+            raise ValueError(f"No video stream in file: {path}")
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = thread_type
+        self.stream.thread_count = threads
+        self.stream.codec_context.skip_frame = skip_frame
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self._fps = float(rate) if rate else None
+        self._time_base = float(self.stream.time_base)
+        self._start = self.stream.start_time or 0
+        self._frames: Optional[Iterator[Any]] = None
+        self._pending: Optional[Any] = None
+        self._position = 0
+
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Decode the next frame, into the buffer if given, then skip the frames up to the next step."""
+        frame = self._next()
+        if frame is None:
+            return False, None
+        image = _to_bgr(frame, buffer)
+        for _ in range(self.step - 1):
+            if self._next() is None:
+                break
+        return True, image
+
+    def seek(self, frame: int) -> None:
+        """Move to a frame, decoding from the keyframe before it."""
+        frame = max(frame, 0)
+        target = self._pts(frame) if self._fps is not None else self._start
+        self.container.seek(target, stream=self.stream, backward=True, any_frame=False)
+        self._frames = None
+        self._pending = None
+        self._position = 0
+        # Decode forward from the keyframe without converting the frames
+        while True:
+            decoded = self._next()
+            if decoded is None:
+                return
+            if self._position > frame:
+                self._pending = decoded
+                self._position -= 1
+                return
+
+    @property
+    def position(self) -> int:
+        """Index of the next frame read."""
+        return self._position
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Number of frames reported by the container."""
+        return self.stream.frames or None
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Average frame rate of the stream."""
+        return self._fps
+
+    def keyframes(self) -> Optional[List[int]]:
+        """Find the keyframes by reading the packets of the stream, without decoding them."""
+        if self._fps is None:
+            return None
+        position = self._position
+        self.container.seek(self._start, stream=self.stream, backward=True, any_frame=False)
+        keyframes = sorted(self._index(packet.pts) for packet in self.container.demux(self.stream)
+                           if packet.is_keyframe and packet.pts is not None)
+        self.seek(position)
+        return keyframes
+
+    def release(self) -> None:
+        """Close the container."""
+        self.container.close()
+
+    def _next(self) -> Optional[Any]:
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            self._position += 1
+            return frame
+        if self._frames is None:
+            self._frames = self.container.decode(self.stream)
+        try:
+            frame = next(self._frames)
+        except (StopIteration, EOFError):
+            return None
+        if frame.pts is not None and self._fps is not None:
+            # Timestamps stay right after seeks and skipped frames
+            self._position = self._index(frame.pts) + 1
+        else:
+            self._position += 1
+        return frame
+
+    def _index(self, pts: int) -> int:
+        return int(round((pts - self._start) * self._time_base * self._fps))
+
+    def _pts(self, frame: int) -> int:
+        return int(frame / self._fps / self._time_base) + self._start
+
+
+DECODERS: Dict[str, Type[VideoDecoder]] = {
+    "opencv": OpenCVDecoder,
+    "pyav": PyAVDecoder,
+}
+
+
+def create_decoder(decoder: Union[str, VideoDecoder], path: str, step: int = 1,
+                   options: Optional[Dict[str, Any]] = None) -> VideoDecoder:
+    """
+    Create a video decoder from its name.
+
+    Args:
+        decoder (Union[str, VideoDecoder]): "opencv", "pyav", or a decoder,
+            which is returned as is.
+        path (str): Path to the video file.
+        step (int): Return every step-th frame only.
+        options (Optional[Dict[str, Any]]): Keyword arguments of the decoder.
+
+    Returns:
+        VideoDecoder: The decoder.
+    """
+    if isinstance(decoder, VideoDecoder):
+        return decoder
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown video decoder: {decoder}, expected one of {list(DECODERS)}")
+    return DECODERS[decoder](path, step, **(options or {}))
+
+
+def _to_bgr(frame: Any, buffer: Optional[np.ndarray]) -> np.ndarray:
+    """Convert a decoded frame to BGR, copying the converted plane once into the buffer."""
+    converted = frame.reformat(format="bgr24")
+    plane = converted.planes[0]
+    height, width = converted.height, converted.width
+    rows = np.frombuffer(plane, dtype=np.uint8).reshape(height, plane.line_size)
+    image = rows[:, :width * 3].reshape(height, width, 3)
+    if buffer is None or buffer.shape != image.shape or buffer.dtype != np.uint8:
+        return image.copy()
+    np.copyto(buffer, image)
+    return buffer
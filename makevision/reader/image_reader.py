@@ -28,11 +28,14 @@ class ImageReader(Reader):
     def __init__(self, image_file: str, frame_type: FrameData = ImageFrameData) -> None:
         self.image_file = image_file
         self.frame_type = frame_type
+        self.sequence = 0
 
     def read(self) -> Tuple[bool, FrameData]:
         """Read an image from the file."""
         frame = cv2.imread(self.image_file)
-        return True, self.frame_type(frame)
+        frame_data = self.frame_type(frame).stamp(self.sequence, self.image_file)
+        self.sequence += 1
+        return True, frame_data
 
     def release(self) -> None:
         pass
@@ -0,0 +1,275 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Hashable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from makevision.core import FrameData, Reader
+from .prefetch import DROP_POLICIES, PrefetchStats
+
+logger = logging.getLogger(__name__)
+
+MULTI_READER_MODES = ("streams", "sync")
+
+
+@dataclass
+class FrameSet:
+    """Frames of several sources captured at about the same time."""
+    frames: Dict[Hashable, FrameData] = field(default_factory=dict)
+
+    @property
+    def timestamp(self) -> float:
+        """Mean capture time of the frames."""
+        return float(np.mean([frame.timestamp for frame in self.frames.values()]))
+
+    @property
+    def spread(self) -> float:
+        """Time between the first and last captured frames."""
+        timestamps = [frame.timestamp for frame in self.frames.values()]
+        return max(timestamps) - min(timestamps)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __iter__(self) -> Iterator[FrameData]:
+        return iter(self.frames.values())
+
+    def __getitem__(self, source: Hashable) -> FrameData:
+        return self.frames[source]
+
+
+class MultiReader(Reader):
+    """
+    Reads several sources concurrently, each on its own capture thread.
+
+    The source id of every frame is set to the name of its source, and
+    frames which were not stamped by their reader are stamped with the time
+    they were read. In "streams" mode ``read`` returns the oldest unread
+    frame of any source, so the sources are processed as independent
+    streams at their own rates. In "sync" mode ``read`` returns a FrameSet
+    holding one frame per source, all captured within ``tolerance`` seconds
+    of each other. Frames which cannot be matched are dropped.
+
+    The capture threads read the next frame as soon as the previous one is
+    queued, so the wrapped readers should not prefetch themselves: a
+    prefetching reader reuses the buffer of a frame on the next read.
+    """
+
+    def __init__(self, readers: Union[Mapping[Hashable, Reader], Sequence[Reader]],
+                 mode: str = "streams", tolerance: float = 0.02, queue_size: int = 4,
+                 drop_policy: str = "latest", require_all: bool = True) -> None:
+        """
+        Initialise the reader and start capturing.
+
+        Args:
+            readers (Union[Mapping[Hashable, Reader], Sequence[Reader]]): The
+                readers by source name, or a list of readers named by index.
+            mode (str): "streams" or "sync".
+            tolerance (float): Largest difference in seconds between the
+                capture times of the frames of a set.
+            queue_size (int): Number of unread frames kept per source.
+            drop_policy (str): "latest" to drop the oldest unread frame of a
+                source when its queue is full, for live sources, or "block"
+                to pause its capture thread, for video files.
+            require_all (bool): In "sync" mode, stop once any source ends.
+                Otherwise the sets hold the sources which have not ended.
+        """
+        if mode not in MULTI_READER_MODES:
+            raise ValueError(f"Unknown mode: {mode}, expected one of {MULTI_READER_MODES}")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unsupported drop policy: {drop_policy}. Expected one of {DROP_POLICIES}.")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1.")
+        self.readers: Dict[Hashable, Reader] = dict(readers) if isinstance(readers, Mapping) \
+            else dict(enumerate(readers))
+        if not self.readers:
+            raise ValueError("At least one reader is required.")
+        self.mode = mode
+        self.tolerance = tolerance
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.require_all = require_all
+        self.stats: Dict[Hashable, PrefetchStats] = {}
+
+        self._queues: Dict[Hashable, Deque[FrameData]] = {}
+        self._finished: Dict[Hashable, bool] = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._threads: List[threading.Thread] = []
+        self.start()
+
+    @property
+    def sources(self) -> List[Hashable]:
+        """Names of the sources."""
+        return list(self.readers)
+
+    def start(self) -> None:
+        """Start a capture thread per source."""
+        if self._running:
+            return
+        self._running = True
+        for source, reader in self.readers.items():
+            self._queues[source] = deque()
+            self._finished[source] = False
+            self.stats[source] = PrefetchStats()
+            thread = threading.Thread(target=self._capture_loop, args=(source, reader),
+                                      name=f"makevision-capture-{source}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the capture threads and discard the unread frames."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for queue in self._queues.values():
+            queue.clear()
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bool, Union[FrameData, FrameSet, None]]:
+        """
+        Read the next frame, or the next set of frames in "sync" mode.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds. Waits
+                indefinitely if None.
+
+        Returns:
+            Tuple[bool, Union[FrameData, FrameSet, None]]: A success
+            flag and the frame or set. The flag is False once the sources
+            have ended, or on timeout.
+        """
+        if self.mode == "sync":
+            return self.read_set(timeout)
+
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: any(self._queues.values()) or all(self._finished.values()), timeout)
+            if not ready or not any(self._queues.values()):
+                return False, None
+            source = min((queue[0].timestamp, index, source) for index, (source, queue)
+                         in enumerate(self._queues.items()) if queue)[2]
+            return True, self._take(source)
+
+    def read_set(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[FrameSet]]:
+        """
+        Read the next set of frames captured within the tolerance of each other.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds. Waits
+                indefinitely if None.
+
+        Returns:
+            Tuple[bool, Optional[FrameSet]]: A success flag and the set.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                sources = self._active_sources()
+                if sources is None:
+                    return False, None
+                if all(self._queues[source] for source in sources):
+                    frameset = self._match(sources)
+                    if frameset is not None:
+                        return True, frameset
+                    continue
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False, None
+                self._condition.wait(remaining)
+
+    def release(self) -> None:
+        """Stop capturing and release every reader."""
+        self.stop()
+        for reader in self.readers.values():
+            reader.release()
+
+    def reset(self) -> None:
+        """Reset every reader and restart capturing."""
+        self.stop()
+        for reader in self.readers.values():
+            reader.reset()
+        self.start()
+
+    def _active_sources(self) -> Optional[List[Hashable]]:
+        """Sources which can still contribute to a set, or None if no set can be made."""
+        ended = [source for source, finished in self._finished.items()
+                 if finished and not self._queues[source]]
+        if (ended and self.require_all) or len(ended) == len(self.readers):
+            return None
+        return [source for source in self.readers if source not in ended]
+
+    def _match(self, sources: List[Hashable]) -> Optional[FrameSet]:
+        """Take a set of frames if every source has one near the newest head, else drop stale frames."""
+        reference = max(self._queues[source][0].timestamp for source in sources)
+        chosen = {}
+        for source in sources:
+            queue = self._queues[source]
+            # Frames too old to match the reference can never be part of a set
+            while queue and queue[0].timestamp < reference - self.tolerance:
+                queue.popleft()
+                self.stats[source].dropped += 1
+                self._condition.notify_all()
+            if not queue:
+                return None
+            times = np.array([frame.timestamp for frame in queue])
+            closest = int(np.argmin(np.abs(times - reference)))
+            if abs(times[closest] - reference) > self.tolerance:
+                return None
+            chosen[source] = closest
+
+        frameset = FrameSet()
+        for source, closest in chosen.items():
+            for _ in range(closest):
+                self._queues[source].popleft()
+                self.stats[source].dropped += 1
+            frameset.frames[source] = self._take(source)
+        return frameset
+
+    def _take(self, source: Hashable) -> FrameData:
+        frame = self._queues[source].popleft()
+        self.stats[source].delivered += 1
+        self._condition.notify_all()
+        return frame
+
+    def _capture_loop(self, source: Hashable, reader: Reader) -> None:
+        sequence = 0
+        queue = self._queues[source]
+        while self._running:
+            try:
+                success, data = reader.read()
+            except Exception as error:
+                logger.error(f"Reading source {source} failed: {error}")
+                success, data = False, None
+            timestamp = time.monotonic()
+            if success:
+                # Keep the capture time and sequence number stamped by the reader
+                data.stamp(sequence if data.sequence is None else data.sequence, source,
+                           timestamp if data.timestamp is None else data.timestamp)
+
+            with self._condition:
+                if not success:
+                    self._finished[source] = True
+                    self._condition.notify_all()
+                    return
+                if len(queue) >= self.queue_size:
+                    if self.drop_policy == "latest":
+                        queue.popleft()
+                        self.stats[source].dropped += 1
+                    else:
+                        self.stats[source].stalled += 1
+                        self._condition.wait_for(
+                            lambda: len(queue) < self.queue_size or not self._running)
+                        if not self._running:
+                            return
+                queue.append(data)
+                self.stats[source].captured += 1
+                sequence += 1
+                self._condition.notify_all()
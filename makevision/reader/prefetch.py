@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+DROP_POLICIES = ("block", "latest")
+
+
+@dataclass
+class PrefetchStats:
+    """Counters describing the behaviour of a frame prefetcher."""
+    captured: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    stalled: int = 0
+
+
+class FramePrefetcher:
+    """
+    Decodes frames on a background thread into a bounded ring of
+    preallocated buffers.
+
+    The ring holds ``capacity`` frame buffers which are allocated once the
+    shape of the first frame is known. The frame returned by ``read`` stays
+    valid until the next call to ``read``, after which its buffer is handed
+    back to the capture thread. Callers that keep frames for longer must
+    copy them. ``last_timestamp`` holds the time.monotonic() time the frame
+    returned by ``read`` was captured, and ``last_sequence`` its number in
+    the order frames were captured. Frames dropped by the ``"latest"``
+    policy keep their numbers, so they show as gaps in the sequence.
+
+    Two drop policies are supported:
+        - ``"block"``: the capture thread waits for a free buffer, so no
+          frame is ever lost. Use this for video files.
+        - ``"latest"``: when the ring is full, the oldest unread frame is
+          overwritten, so ``read`` always returns the most recent frames.
+          Use this for live sources.
+    """
+
+    def __init__(self, grab: Callable[[Optional[np.ndarray]], Tuple[bool, Optional[np.ndarray]]],
+                 capacity: int = 4, policy: str = "block") -> None:
+        """
+        Initialise the prefetcher.
+
+        Args:
+            grab (Callable): Function decoding the next frame. It receives a
+                buffer to decode into (or None before the ring is allocated)
+                and returns a success flag and the decoded frame.
+            capacity (int): Number of frame buffers in the ring.
+            policy (str): Drop policy, either "block" or "latest".
+        """
+        if capacity < 2:
+            raise ValueError("Prefetch capacity must be at least 2.")
+        if policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Unsupported drop policy: {policy}. Expected one of {DROP_POLICIES}.")
+
+        self._grab = grab
+        self.capacity = capacity
+        self.policy = policy
+        self.stats = PrefetchStats()
+        self.last_timestamp: Optional[float] = None
+        self.last_sequence: Optional[int] = None
+
+        self._slots: List[Optional[np.ndarray]] = [None] * capacity
+        self._times: List[float] = [0.0] * capacity
+        self._sequences: List[int] = [0] * capacity
+        self._free = deque(range(capacity))
+        self._ready = deque()
+        self._held: Optional[int] = None
+        self._finished = False
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the capture thread."""
+        if self._running:
+            return
+        self._running = True
+        self._finished = False
+        self._thread = threading.Thread(
+            target=self._capture_loop, name="makevision-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the capture thread and discard any frames still queued."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            self._free = deque(range(self.capacity))
+            self._ready.clear()
+            self._held = None
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Get the next decoded frame.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait for a frame in
+                seconds. Waits indefinitely if None.
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray]]: A success flag and the frame.
+            The flag is False once the source is exhausted or on timeout.
+        """
+        with self._cond:
+            # Hand the buffer returned by the previous read back to the ring
+            if self._held is not None:
+                self._free.append(self._held)
+                self._held = None
+                self._cond.notify_all()
+
+            if not self._ready and not self._finished:
+                self.stats.stalled += 1
+                self._cond.wait_for(
+                    lambda: self._ready or self._finished or not self._running, timeout)
+
+            if not self._ready:
+                return False, None
+
+            self._held = self._ready.popleft()
+            self.last_timestamp = self._times[self._held]
+            self.last_sequence = self._sequences[self._held]
+            self.stats.delivered += 1
+            self._cond.notify_all()
+            return True, self._slots[self._held]
+
+    def _acquire_slot(self) -> Optional[int]:
+        """Get a buffer for the next frame according to the drop policy."""
+        with self._cond:
+            if not self._free and self.policy == "latest" and self._ready:
+                self.stats.dropped += 1
+                return self._ready.popleft()
+
+            self._cond.wait_for(lambda: self._free or not self._running)
+            if not self._running:
+                return None
+            return self._free.popleft()
+
+    def _preallocate(self, frame: np.ndarray) -> None:
+        """Allocate the unused buffers of the ring to match the given frame."""
+        for i in self._free:
+            slot = self._slots[i]
+            if slot is None or slot.shape != frame.shape or slot.dtype != frame.dtype:
+                self._slots[i] = np.empty_like(frame)
+
+    def _capture_loop(self) -> None:
+        while self._running:
+            index = self._acquire_slot()
+            if index is None:
+                break
+
+            success, frame = self._grab(self._slots[index])
+            timestamp = time.monotonic()
+            if not success or frame is None:
+                with self._cond:
+                    self._free.appendleft(index)
+                    self._finished = True
+                    self._cond.notify_all()
+                break
+
+            with self._cond:
+                # The decoder may allocate a new array on the first frame or
+                # when the frame size changes, keep it as the slot's buffer
+                self._slots[index] = frame
+                self._times[index] = timestamp
+                self._sequences[index] = self.stats.captured
+                self._preallocate(frame)
+                self._ready.append(index)
+                self.stats.captured += 1
+                self._cond.notify_all()
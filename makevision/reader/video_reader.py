@@ -1,9 +1,10 @@
-import cv2
 import numpy as np
-from typing import Tuple
+from typing import Any, Dict, Optional, Tuple, Union
 import time
 
-from makevision.core import Reader, FrameData
+from makevision.core import Reader, FrameData, VideoDecoder
+from .decoders import create_decoder
+from .prefetch import FramePrefetcher
 
 
 class VideoFrameData(FrameData):
@@ -25,17 +26,44 @@ class VideoFrameData(FrameData):
 class VideoReader(Reader):
     """Video reader class for reading video files."""
 
-    def __init__(self, video_path: str, loop: bool = False, cap_fps: bool = True, fps: int = 30, frame_type: FrameData = VideoFrameData) -> None:
+    def __init__(self, video_path: str, loop: bool = False, cap_fps: bool = True, fps: int = 30, frame_type: FrameData = VideoFrameData,
+                 prefetch: bool = False, prefetch_size: int = 4, drop_policy: str = "block",
+                 decoder: Union[str, VideoDecoder] = "opencv", frame_step: int = 1,
+                 decoder_options: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Initialise the video reader.
+
+        Args:
+            video_path (str): Path to the video file.
+            loop (bool): Whether to restart the video when it ends.
+            cap_fps (bool): Whether to pace reads to the given fps.
+            fps (int): Frame rate used when pacing reads.
+            frame_type (FrameData): Class used to wrap the frames.
+            prefetch (bool): Decode frames ahead of time on a background thread.
+            prefetch_size (int): Number of frames buffered when prefetching.
+            drop_policy (str): "block" to never lose frames, or "latest" to
+                overwrite the oldest unread frame when the buffer is full.
+            decoder (Union[str, VideoDecoder]): Decoding backend, "opencv",
+                "pyav" for multi-threaded FFmpeg decoding, or a VideoDecoder.
+            frame_step (int): Read every frame_step-th frame only.
+            decoder_options (Optional[Dict[str, Any]]): Keyword arguments of
+                the decoder, e.g. the number of threads of the "pyav" decoder.
+        """
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(video_path)
-        if not self.cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
+        self.decoder = create_decoder(decoder, video_path, frame_step, decoder_options)
+        # The OpenCV capture, kept for code using it directly
+        self.cap = getattr(self.decoder, "cap", None)
         self.loop = loop
         self.fps = fps
         self.cap_fps = cap_fps
         self.time_per_frame = 1 / fps if cap_fps else 0
         self.last_frame_time = time.time()
         self.frame_type = frame_type
+        self.sequence = 0
+        self.prefetcher = FramePrefetcher(
+            self._grab, prefetch_size, drop_policy) if prefetch else None
+        if self.prefetcher:
+            self.prefetcher.start()
 
     def read(self, *args, **kwargs) -> Tuple[bool, FrameData]:
         """Read a frame from the video."""
@@ -51,18 +79,60 @@ class VideoReader(Reader):
             # Update last frame time
             self.last_frame_time = time.time()
 
-        ret, frame = self.cap.read()
+        if self.prefetcher:
+            ret, frame = self.prefetcher.read()
+            if not ret:
+                return False, None
+            return True, self._stamp(self.frame_type(frame, *args, **kwargs),
+                                     self.prefetcher.last_timestamp, self.prefetcher.last_sequence)
+
+        ret, frame = self.decoder.read()
         if not ret:
             if self.loop:
                 self.reset()
                 return self.read()
             return False, None
-        return True, self.frame_type(frame, *args, **kwargs)
+        return True, self._stamp(self.frame_type(frame, *args, **kwargs))
 
     def release(self) -> None:
         """Release the video capture object."""
-        self.cap.release()
+        if self.prefetcher:
+            self.prefetcher.stop()
+        self.decoder.release()
 
     def reset(self) -> None:
         """Reset the video capture to the beginning."""
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.seek(0)
+
+    def seek(self, frame: int) -> None:
+        """
+        Move to a frame of the video, so it is the next one read.
+
+        Args:
+            frame (int): Index of the frame.
+        """
+        if self.prefetcher:
+            self.prefetcher.stop()
+        self.decoder.seek(frame)
+        if self.prefetcher:
+            self.prefetcher.start()
+
+    def _stamp(self, frame: FrameData, timestamp: Optional[float] = None,
+               sequence: Optional[int] = None) -> FrameData:
+        """
+        Stamp the frame with its capture time, sequence number and the video path.
+        Prefetched frames keep the number they were given when decoded.
+        """
+        if sequence is not None:
+            self.sequence = sequence
+        frame.stamp(self.sequence, self.video_path, timestamp)
+        self.sequence += 1
+        return frame
+
+    def _grab(self, buffer: Optional[np.ndarray]) -> Tuple[bool, Optional[np.ndarray]]:
+        """Decode the next frame into the given buffer, used by the prefetcher."""
+        ret, frame = self.decoder.read(buffer)
+        if not ret and self.loop:
+            self.decoder.seek(0)
+            ret, frame = self.decoder.read(buffer)
+        return ret, frame
@@ -1,9 +1,10 @@
 import cv2
 import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
 
 from makevision.core import Reader, FrameData
 from makevision.core.exceptions import InvalidWebcamSourceError
+from .prefetch import FramePrefetcher
 
 
 class WebcamFrameData(FrameData):
@@ -23,7 +24,22 @@ class WebcamFrameData(FrameData):
 
 
 class WebcamReader(Reader):
-    def __init__(self, source: int = 0, backend: int = cv2.CAP_MSMF, dimensions: Tuple[int, int] = (1920, 1080), fps: int = 30, frame_type: FrameData = WebcamFrameData) -> None:
+    def __init__(self, source: int = 0, backend: int = cv2.CAP_MSMF, dimensions: Tuple[int, int] = (1920, 1080), fps: int = 30, frame_type: FrameData = WebcamFrameData,
+                 prefetch: bool = False, prefetch_size: int = 2, drop_policy: str = "latest") -> None:
+        """
+        Initialise the webcam reader.
+
+        Args:
+            source (int): Index of the webcam.
+            backend (int): OpenCV capture backend.
+            dimensions (Tuple[int, int]): Requested frame width and height.
+            fps (int): Requested frame rate.
+            frame_type (FrameData): Class used to wrap the frames.
+            prefetch (bool): Capture frames on a background thread.
+            prefetch_size (int): Number of frames buffered when prefetching.
+            drop_policy (str): "latest" to always return the newest frames,
+                or "block" to never lose frames.
+        """
         self.source = source
         self.cap = cv2.VideoCapture(self.source, backend)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, dimensions[0])
@@ -32,17 +48,35 @@ class WebcamReader(Reader):
         if not self.cap.isOpened():
             raise InvalidWebcamSourceError(source)
         self.frame_type = frame_type
+        self.sequence = 0
+        self.prefetcher = FramePrefetcher(
+            self.cap.read, prefetch_size, drop_policy) if prefetch else None
+        if self.prefetcher:
+            self.prefetcher.start()
 
     def read(self, *args, **kwargs) -> Tuple[bool, FrameData]:
         """Reads a frame from the webcam."""
-        success, frame = self.cap.read()
+        timestamp: Optional[float] = None
+        if self.prefetcher:
+            success, frame = self.prefetcher.read()
+            timestamp = self.prefetcher.last_timestamp
+            if success:
+                # Numbered when captured, so dropped frames leave a gap
+                self.sequence = self.prefetcher.last_sequence
+        else:
+            success, frame = self.cap.read()
         if not success:
             return False, None
 
-        return True, self.frame_type(frame, *args, **kwargs)
+        frame_data = self.frame_type(frame, *args, **kwargs)
+        frame_data.stamp(self.sequence, self.source, timestamp)
+        self.sequence += 1
+        return True, frame_data
 
     def release(self):
         """Releases the webcam."""
+        if self.prefetcher:
+            self.prefetcher.stop()
         if self.cap.isOpened():
             self.cap.release()
 
@@ -0,0 +1 @@
+from .kalman_tracker import KalmanTracker, match
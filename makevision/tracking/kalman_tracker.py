@@ -0,0 +1,279 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from makevision.core import Tracker
+from makevision.detection.color_detection import ColorBlob
+from makevision.detection.postprocess import Detections, as_detections, box_iou
+
+ASSIGNMENT_METHODS = ("greedy", "hungarian")
+
+# Constant velocity model over centre x, centre y, width and height
+_TRANSITION = np.eye(8, dtype=np.float64)
+_TRANSITION[range(4), range(4, 8)] = 1.0
+
+# Noise as a fraction of the box size, per frame
+_POSITION_NOISE = 1 / 20
+_VELOCITY_NOISE = 1 / 160
+
+
+def match(similarity: np.ndarray, method: str = "greedy") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Match rows to columns of a similarity matrix, ignoring pairs with a
+    similarity of -inf.
+
+    Args:
+        similarity (np.ndarray): Similarity of each row to each column.
+        method (str): "greedy" repeatedly matches the pairs which are each
+            other's most similar, all at once, which is fast and exact for
+            unambiguous scenes. "hungarian" maximises the total similarity
+            and requires scipy.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Indices of the matched rows and of
+        their columns.
+    """
+    if method not in ASSIGNMENT_METHODS:
+        raise ValueError(f"Unknown assignment method: {method}, expected one of {ASSIGNMENT_METHODS}")
+    if not similarity.size:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    if method == "hungarian":
+        from scipy.optimize import linear_sum_assignment
+
+        valid = np.isfinite(similarity)
+        rows, cols = linear_sum_assignment(np.where(valid, -similarity, 1e9))
+        keep = valid[rows, cols]
+        return rows[keep], cols[keep]
+
+    similarity = similarity.copy()
+    matched_rows, matched_cols = [], []
+    while True:
+        best_cols = similarity.argmax(axis=1)
+        best_rows = similarity.argmax(axis=0)
+        rows = np.flatnonzero((best_rows[best_cols] == np.arange(len(best_cols)))
+                              & np.isfinite(similarity[np.arange(len(best_cols)), best_cols]))
+        if not rows.size:
+            break
+        cols = best_cols[rows]
+        matched_rows.append(rows)
+        matched_cols.append(cols)
+        similarity[rows, :] = -np.inf
+        similarity[:, cols] = -np.inf
+    if not matched_rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
+
+
+class KalmanTracker(Tracker):
+    """
+    Tracks detections with a constant velocity Kalman filter per track.
+
+    Every track is predicted forward each frame, all tracks at once. The
+    detections of a frame are associated with the predicted boxes of the
+    same class by IoU, or by centre distance for small or fast objects
+    which no longer overlap their prediction. Matched detections get the
+    stable id of their track, unmatched ones start new tracks, and tracks
+    missing for ``max_age`` detection frames are dropped.
+
+    On frames where detection was skipped, pass None to ``update`` to get
+    the predicted boxes of the tracks instead.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, centroid_threshold: float = 0.5,
+                 max_age: int = 5, min_hits: int = 2, class_agnostic: bool = False,
+                 assignment: str = "greedy") -> None:
+        """
+        Initialise the tracker.
+
+        Args:
+            iou_threshold (float): Minimum IoU between a predicted box and a
+                detection to match them.
+            centroid_threshold (float): Maximum distance between the centre of
+                a predicted box and a detection, relative to the size of the
+                box, to match them without enough overlap. 0 disables it.
+            max_age (int): Number of consecutive detection frames a track may
+                go unmatched before it is dropped.
+            min_hits (int): Number of matches before a track is reported.
+            class_agnostic (bool): Match detections of any class to a track.
+            assignment (str): "greedy" or "hungarian", see match.
+        """
+        if assignment not in ASSIGNMENT_METHODS:
+            raise ValueError(
+                f"Unknown assignment method: {assignment}, expected one of {ASSIGNMENT_METHODS}")
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.class_agnostic = class_agnostic
+        self.assignment = assignment
+        self.names: Dict[int, str] = {}
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def reset(self) -> None:
+        """Forget every track."""
+        self._mean = np.zeros((0, 8))
+        self._covariance = np.zeros((0, 8, 8))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._cls = np.zeros(0, dtype=np.int32)
+        self._conf = np.zeros(0, dtype=np.float32)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._misses = np.zeros(0, dtype=np.int64)
+        self._next_id = 1
+
+    def update(self, results: Optional[List]) -> List:
+        """
+        Predict the tracks to the new frame and associate its detections.
+
+        Args:
+            results (Optional[List]): Detection results of the frame, as
+                Detections, ultralytics results or ColorBlob records, or None
+                if detection was skipped on this frame.
+
+        Returns:
+            List: A single Detections holding the tracked detections and their
+            track ids, or the predicted boxes of the tracks if results is None.
+        """
+        self._predict()
+        if results is None:
+            return [self.predicted()]
+
+        detections = self._to_detections(results)
+        track_boxes = self._boxes()
+        rows, cols = match(self._similarity(track_boxes, detections), self.assignment)
+
+        # Correct the matched tracks with their detections
+        self._correct(rows, detections.xyxy[cols])
+        self._conf[rows] = detections.conf[cols]
+        self._cls[rows] = detections.cls[cols]
+        self._hits[rows] += 1
+        self._misses += 1
+        self._misses[rows] = 0
+
+        # Report the detections of established tracks, before adding new ones
+        reported = self._hits[rows] >= self.min_hits
+        output = detections[cols[reported]]
+        output.track_id = self._ids[rows[reported]]
+
+        unmatched = np.setdiff1d(np.arange(len(detections)), cols)
+        self._start(detections[unmatched])
+        self._drop(self._misses > self.max_age)
+        return [output]
+
+    def predicted(self) -> Detections:
+        """
+        Get the predicted boxes of the established tracks on the current frame.
+
+        Returns:
+            Detections: The boxes, last confidences, classes and ids of the tracks.
+        """
+        established = self._hits >= self.min_hits
+        return Detections(self._boxes()[established].astype(np.float32),
+                          self._conf[established].copy(), self._cls[established].copy(),
+                          names=self.names, track_id=self._ids[established].copy())
+
+    def _to_detections(self, results: List) -> Detections:
+        detections = []
+        blobs = [result for result in results if isinstance(result, ColorBlob)]
+        if blobs:
+            for blob in blobs:
+                if blob.name not in self.names.values():
+                    self.names[len(self.names)] = blob.name
+            detections.append(Detections.from_blobs(blobs, self.names))
+
+        for result in results:
+            if not isinstance(result, ColorBlob):
+                detections.append(as_detections(result))
+        if not detections:
+            return Detections.empty(self.names)
+
+        merged = Detections.concatenate(detections)
+        if not blobs:
+            self.names = merged.names
+        return merged
+
+    def _boxes(self) -> np.ndarray:
+        centre, size = self._mean[:, :2], np.maximum(self._mean[:, 2:4], 1.0)
+        return np.hstack([centre - size / 2, centre + size / 2])
+
+    def _similarity(self, track_boxes: np.ndarray, detections: Detections) -> np.ndarray:
+        iou = box_iou(track_boxes, detections.xyxy.astype(np.float64))
+        valid = iou >= self.iou_threshold
+        similarity = iou.copy()
+
+        if self.centroid_threshold > 0 and len(track_boxes) and len(detections):
+            # Rank close but not overlapping pairs below every IoU match
+            track_centres = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+            centres = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2
+            scale = np.sqrt(np.prod(track_boxes[:, 2:] - track_boxes[:, :2], axis=1))
+            distance = np.linalg.norm(track_centres[:, None] - centres[None], axis=2) / scale[:, None]
+            close = ~valid & (distance < self.centroid_threshold)
+            similarity[close] = self.iou_threshold * (1 - distance[close] / self.centroid_threshold) - 1
+            valid |= close
+
+        if not self.class_agnostic:
+            valid &= self._cls[:, None] == detections.cls[None, :]
+        similarity[~valid] = -np.inf
+        return similarity
+
+    def _predict(self) -> None:
+        if not len(self._ids):
+            return
+        noise = self._noise(_POSITION_NOISE, _VELOCITY_NOISE)
+        self._mean = self._mean @ _TRANSITION.T
+        self._covariance = _TRANSITION @ self._covariance @ _TRANSITION.T
+        self._covariance[:, range(8), range(8)] += noise
+
+    def _correct(self, rows: np.ndarray, boxes: np.ndarray) -> None:
+        if not len(rows):
+            return
+        mean, covariance = self._mean[rows], self._covariance[rows]
+        measurement = np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+
+        size = np.maximum(mean[:, 2:4].max(axis=1), 1.0)
+        innovation_covariance = covariance[:, :4, :4].copy()
+        innovation_covariance[:, range(4), range(4)] += (_POSITION_NOISE * size[:, None]) ** 2
+
+        # Kalman gain, solved rather than inverted as the covariance is symmetric
+        gain = np.linalg.solve(innovation_covariance, covariance[:, :4, :]).transpose(0, 2, 1)
+        self._mean[rows] = mean + (gain @ (measurement - mean[:, :4])[..., None])[..., 0]
+        self._covariance[rows] = covariance - gain @ covariance[:, :4, :]
+
+    def _start(self, detections: Detections) -> None:
+        count = len(detections)
+        if not count:
+            return
+        boxes = detections.xyxy.astype(np.float64)
+        size = np.maximum(boxes[:, 2:] - boxes[:, :2], 1.0)
+        mean = np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, size, np.zeros((count, 4))])
+
+        scale = size.max(axis=1)[:, None]
+        std = np.hstack([np.repeat(2 * _POSITION_NOISE * scale, 4, axis=1),
+                         np.repeat(10 * _VELOCITY_NOISE * scale, 4, axis=1)])
+        covariance = np.zeros((count, 8, 8))
+        covariance[:, range(8), range(8)] = std ** 2
+
+        self._mean = np.vstack([self._mean, mean])
+        self._covariance = np.concatenate([self._covariance, covariance])
+        self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + count)])
+        self._cls = np.concatenate([self._cls, detections.cls.astype(np.int32)])
+        self._conf = np.concatenate([self._conf, detections.conf.astype(np.float32)])
+        self._hits = np.concatenate([self._hits, np.ones(count, dtype=np.int64)])
+        self._misses = np.concatenate([self._misses, np.zeros(count, dtype=np.int64)])
+        self._next_id += count
+
+    def _drop(self, dropped: np.ndarray) -> None:
+        if not dropped.any():
+            return
+        keep = ~dropped
+        self._mean, self._covariance = self._mean[keep], self._covariance[keep]
+        self._ids, self._cls, self._conf = self._ids[keep], self._cls[keep], self._conf[keep]
+        self._hits, self._misses = self._hits[keep], self._misses[keep]
+
+    def _noise(self, position: float, velocity: float) -> np.ndarray:
+        size = np.maximum(self._mean[:, 2:4].max(axis=1), 1.0)[:, None]
+        return np.hstack([np.repeat((position * size) ** 2, 4, axis=1),
+                          np.repeat((velocity * size) ** 2, 4, axis=1)])
@@ -3,11 +3,18 @@ from .utils import (
     detect_detector,
     detect_network,
     detect_filter,
+    detect_tracker,
     detect_obstruction_detector,
     detect_state,
     detect_pipeline,
     detect_calibrator,
     detect_model,
     inject_and_run,
+    write_profile_report,
 )
 from .timer import Timer
+from .profiler import Profiler, StreamingHistogram
+from .instrumentation import InstrumentedComponent, instrument_components
+from .latency import LatencyTracker
+from .batch import BatchStats, find_videos, run_batch
+from .startup import StartupProfiler
@@ -0,0 +1,272 @@
+import glob
+import inspect
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from makevision.core import Network, Pipeline
+from .utils import (detect_calibrator, detect_detector, detect_filter, detect_model,
+                    detect_obstruction_detector, detect_pipeline, detect_state,
+                    detect_tracker, inject_and_run)
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+@dataclass
+class ChunkResult:
+    """What the pipeline sent while processing a chunk."""
+    path: str
+    index: int
+    end: int
+    frames: int
+    elapsed: float
+    outputs: List[Tuple[int, tuple, Dict[str, Any]]] = field(default_factory=list)
+
+
+@dataclass
+class BatchStats:
+    """Throughput of a batch run, and the frame number of the first frame of each video."""
+    videos: int = 0
+    chunks: int = 0
+    frames: int = 0
+    elapsed: float = 0.0
+    frame_offsets: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def fps(self) -> float:
+        """Frames processed per second of wall time."""
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def find_videos(inputs: str) -> List[str]:
+    """
+    Find the videos of a directory, or matching a glob pattern.
+
+    Args:
+        inputs (str): A directory, searched recursively, a glob pattern, e.g.
+            "archive/2026-*/*.mp4", or the path of a single video.
+
+    Returns:
+        List[str]: The paths of the videos, sorted.
+    """
+    if os.path.isdir(inputs):
+        paths = glob.glob(os.path.join(glob.escape(inputs), "**", "*"), recursive=True)
+    else:
+        paths = glob.glob(inputs, recursive=True)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and path.lower().endswith(VIDEO_EXTENSIONS))
+
+
+def run_batch(inputs: str, component_specs: Dict[str, Optional[str]],
+              network: Optional[Network] = None, workers: Optional[int] = None,
+              chunk_frames: int = 900, decoder: str = "opencv", frame_step: int = 1,
+              decoder_options: Optional[Dict[str, Any]] = None) -> BatchStats:
+    """
+    Run the pipeline of the main script over videos as fast as they decode.
+
+    Every video is split into chunks of about ``chunk_frames`` frames,
+    starting on keyframes when the decoder can list them (see plan_chunks).
+    Worker processes each build the pipeline and its components once, then
+    run the pipeline on one chunk after another, with a ChunkReader as the
+    reader. The data the pipeline sends is collected per chunk and passed
+    on to the network in the order of the videos and frames. If the network
+    takes a frame number (e.g. the file network), the frames of all the
+    videos are numbered in turn, continuing from the network's own frame
+    counter, so the numbers keep increasing across videos. The first frame
+    number of each video is logged and kept in ``BatchStats.frame_offsets``.
+    Trackers and detectors with a ``reset`` method are reset
+    before each chunk, as chunks do not follow on from each other in a
+    worker.
+
+    Args:
+        inputs (str): Directory or glob pattern of the videos, see find_videos.
+        component_specs (Dict[str, Optional[str]]): Command line values the
+            components of the workers are built from, under the keys
+            "pipeline" (a pipeline name, see detect_pipeline), "model",
+            "calibration_data", "tracker", "filter", "obstruction_detector"
+            and "state".
+        network (Optional[Network]): Network the outputs are sent to in
+            order. The outputs are discarded if None.
+        workers (Optional[int]): Number of worker processes, defaults to
+            the number of CPUs. With 1 the chunks run in this process.
+        chunk_frames (int): Target number of frames per chunk.
+        decoder (str): Decoding backend of the chunks, "opencv" or "pyav".
+            Only "pyav" lists keyframes.
+        frame_step (int): Process every frame_step-th frame only.
+        decoder_options (Optional[Dict[str, Any]]): Keyword arguments of the decoder.
+
+    Returns:
+        BatchStats: The number of videos, chunks and frames processed, and
+        the time taken.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from makevision.reader import plan_chunks
+
+    paths = find_videos(inputs)
+    if not paths:
+        raise ValueError(f"No videos found for batch input: {inputs}")
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1.")
+
+    def chunks() -> Iterator:
+        for path in paths:
+            video_chunks = plan_chunks(path, chunk_frames, decoder, frame_step, decoder_options)
+            logger.info(f"Processing {path} in {len(video_chunks)} chunks")
+            yield from video_chunks
+
+    reader_options = {"decoder": decoder, "frame_step": frame_step,
+                      "decoder_options": decoder_options}
+    stats = BatchStats(videos=len(paths))
+    merger = _OutputMerger(network, stats)
+    start = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(component_specs, threads=None)
+        for chunk in chunks():
+            merger.forward(_run_chunk(chunk, reader_options))
+    else:
+        # Workers are spawned, as the network may already be running threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(component_specs, 1)) as executor:
+            pending: Deque[Future] = deque()
+            for chunk in chunks():
+                pending.append(executor.submit(_run_chunk, chunk, reader_options))
+                # Keep every worker busy, without holding the outputs of the whole archive
+                if len(pending) >= 2 * workers:
+                    merger.forward(pending.popleft().result())
+            while pending:
+                merger.forward(pending.popleft().result())
+    merger.finish()
+
+    stats.elapsed = time.perf_counter() - start
+    logger.info(f"Processed {stats.frames} frames of {stats.videos} videos in "
+                f"{stats.elapsed:.1f}s ({stats.fps:.1f} FPS)")
+    return stats
+
+
+class _OutputMerger:
+    """Sends the outputs of the chunks to the network in order, numbering the frames of the videos in turn."""
+
+    def __init__(self, network: Optional[Network], stats: BatchStats) -> None:
+        self.network = network
+        self.stats = stats
+        self.takes_frame = network is not None and \
+            "frame" in inspect.signature(network.send_data).parameters
+        self.offset = getattr(network, "frame", 0) if self.takes_frame else 0
+        self.path: Optional[str] = None
+        self.length = 0
+
+    def forward(self, result: ChunkResult) -> None:
+        """Send the outputs of a chunk, in the order they were sent in the worker."""
+        if result.path != self.path:
+            self.finish()
+            self.path = result.path
+            self.stats.frame_offsets[result.path] = self.offset
+        self.length = max(self.length, result.end)
+        self.stats.chunks += 1
+        self.stats.frames += result.frames
+        logger.debug(f"Chunk {result.index} of {result.path}: {result.frames} frames "
+                     f"in {result.elapsed:.2f}s")
+        if self.network is None:
+            return
+        for frame, args, kwargs in result.outputs:
+            if self.takes_frame and frame is not None:
+                kwargs.setdefault("frame", self.offset + frame)
+            self.network.send_data(*args, **kwargs)
+
+    def finish(self) -> None:
+        """End the current video, the next one is numbered after it."""
+        if self.path is None:
+            return
+        if self.takes_frame:
+            logger.info(f"Frames {self.offset} to {self.offset + self.length - 1} are {self.path}")
+        self.offset += self.length
+        self.path = None
+        self.length = 0
+
+
+class _ChunkOutputs(Network):
+    """Collects the data sent by the pipeline of a worker, with the frame it was sent for."""
+
+    def __init__(self, reader: Any) -> None:
+        self.reader = reader
+        self.outputs: List[Tuple[int, tuple, Dict[str, Any]]] = []
+
+    def connect(self, *args, **kwargs) -> None:
+        pass
+
+    def disconnect(self, *args, **kwargs) -> None:
+        pass
+
+    def send_data(self, data: Any, *args, **kwargs) -> None:
+        self.outputs.append((self.reader.frame_index, (data,) + args, kwargs))
+
+    def receive_data(self, *args, **kwargs) -> Any:
+        return None
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(component_specs: Dict[str, Optional[str]], threads: Optional[int]) -> None:
+    """Build the pipeline and components of a worker, once for all its chunks."""
+    import cv2
+
+    if threads is not None:
+        # The workers already use every core
+        cv2.setNumThreads(threads)
+
+    model = detect_model(component_specs["model"]) if component_specs.get("model") else None
+    components = {
+        "calibrator": detect_calibrator(component_specs["calibration_data"])
+        if component_specs.get("calibration_data") else None,
+        "detector": detect_detector(model, False) if model is not None else None,
+        "tracker": detect_tracker(component_specs["tracker"])
+        if component_specs.get("tracker") else None,
+        "filter": detect_filter(component_specs["filter"])
+        if component_specs.get("filter") else None,
+        "obstruction_detector": detect_obstruction_detector(component_specs["obstruction_detector"])
+        if component_specs.get("obstruction_detector") else None,
+        "state": detect_state(component_specs["state"])
+        if component_specs.get("state") else None,
+    }
+    _worker["pipeline"] = detect_pipeline(component_specs.get("pipeline"))
+    _worker["components"] = {name: component for name, component in components.items()
+                             if component is not None}
+
+
+def _run_chunk(chunk: Any, reader_options: Dict[str, Any]) -> ChunkResult:
+    """Run the pipeline of the worker on a chunk."""
+    from makevision.reader import ChunkReader
+
+    pipeline: Pipeline = _worker["pipeline"]
+    components = dict(_worker["components"])
+    for name in ("tracker", "detector"):
+        reset = getattr(components.get(name), "reset", None)
+        if callable(reset):
+            reset()
+
+    start = time.perf_counter()
+    reader = ChunkReader(chunk, **reader_options)
+    outputs = _ChunkOutputs(reader)
+    components.update({"pipeline": pipeline, "reader": reader, "network": outputs})
+    try:
+        inject_and_run(pipeline, components)
+    finally:
+        reader.release()
+    if chunk.stop is not None:
+        end = chunk.stop
+    else:
+        end = chunk.start if reader.frame_index is None else reader.frame_index + 1
+    return ChunkResult(chunk.path, chunk.index, end, reader.frames_read,
+                       time.perf_counter() - start, outputs.outputs)
@@ -0,0 +1,130 @@
+import functools
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .latency import LatencyTracker
+from .profiler import Profiler
+
+# Methods timed for each injected component, keyed by component name
+INSTRUMENTED_METHODS = {
+    "reader": ("read",),
+    "calibrator": ("undistort",),
+    "detector": ("detect", "detect_batch", "visualize"),
+    "tracker": ("update",),
+    "filter": ("apply",),
+    "state": ("update",),
+    "network": ("send_data",),
+    "obstruction_detector": ("detect_obstruction",),
+}
+
+# Components whose instrumented calls output the results of a frame
+LATENCY_STAGES = ("network", "state")
+
+
+class InstrumentedComponent:
+    """
+    Transparent proxy timing calls to selected methods of a component.
+
+    Every attribute is read from and written to the wrapped component, and
+    ``isinstance`` checks see the component's class, so pipelines can use the
+    proxy exactly like the component. Each call to an instrumented method is
+    recorded as a ``<name>.<method>`` span in the profiler. With a latency
+    tracker, frames returned by the reader are opened, and the end-to-end
+    latency of the current frame is closed after each call of the network
+    and state.
+    """
+
+    def __init__(self, component: Any, name: str, methods: Iterable[str],
+                 profiler: Profiler, marks_frames: bool = False,
+                 latency: Optional[LatencyTracker] = None) -> None:
+        """
+        Initialise the proxy.
+
+        Args:
+            component (Any): The component to wrap.
+            name (str): Name of the component used in span names.
+            methods (Iterable[str]): Names of the methods to time.
+            profiler (Profiler): The profiler recording the spans.
+            marks_frames (bool): Mark the start of a new frame in the profiler
+                before every call, used for the reader.
+            latency (Optional[LatencyTracker]): Tracker of the end-to-end
+                latency of frames.
+        """
+        object.__setattr__(self, "_component", component)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_methods", frozenset(methods))
+        object.__setattr__(self, "_profiler", profiler)
+        object.__setattr__(self, "_marks_frames", marks_frames)
+        object.__setattr__(self, "_latency", latency)
+        object.__setattr__(self, "_wrapped", {})
+
+    @property
+    def __class__(self) -> type:
+        return type(self._component)
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._component, attribute)
+        if attribute not in self._methods or not callable(value):
+            return value
+
+        wrapped = self._wrapped.get(attribute)
+        if wrapped is None or wrapped.__wrapped__ != value:
+            wrapped = self._wrap(attribute, value)
+            self._wrapped[attribute] = wrapped
+        return wrapped
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(self._component, attribute, value)
+
+    def __delattr__(self, attribute: str) -> None:
+        delattr(self._component, attribute)
+
+    def __repr__(self) -> str:
+        return f"InstrumentedComponent({self._component!r})"
+
+    def _wrap(self, method_name: str, method: Callable) -> Callable:
+        span_name = f"{self._name}.{method_name}"
+        profiler = self._profiler
+        marks_frames = self._marks_frames
+        latency = self._latency
+        opens = latency is not None and marks_frames
+        closes = latency is not None and self._name in LATENCY_STAGES
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if marks_frames:
+                profiler.mark_frame()
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                profiler.record(span_name, start, time.perf_counter())
+            if opens and isinstance(result, tuple) and len(result) == 2:
+                latency.open(result[1])
+            elif closes:
+                latency.close(self._name)
+            return result
+
+        return timed
+
+
+def instrument_components(components: Dict[str, Any], profiler: Profiler,
+                          latency: Optional[LatencyTracker] = None) -> Dict[str, Any]:
+    """
+    Wrap the injectable components in timing proxies.
+
+    Args:
+        components (Dict[str, Any]): Components keyed by their parameter name.
+        profiler (Profiler): The profiler recording the spans.
+        latency (Optional[LatencyTracker]): Tracker of the end-to-end latency
+            of the frames read by the reader.
+
+    Returns:
+        Dict[str, Any]: The components, with the known ones wrapped.
+    """
+    return {
+        name: InstrumentedComponent(component, name, INSTRUMENTED_METHODS[name],
+                                    profiler, marks_frames=name == "reader", latency=latency)
+        if name in INSTRUMENTED_METHODS else component
+        for name, component in components.items()
+    }
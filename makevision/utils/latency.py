@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from makevision.core import FrameData
+from .profiler import StreamingHistogram
+
+
+class LatencyTracker:
+    """
+    Measures the end-to-end latency of frames, from their capture to the
+    stages that output their results.
+
+    Latency is the time between the capture timestamp a reader stamped on
+    the frame and the call to ``close``, recorded per stage, e.g. "network"
+    when the results were sent or "state" when the state was updated. Code
+    which does not have the frame at hand, like ``Network.send_data``, can
+    ``close`` the frame last opened with ``open`` on the same thread.
+    """
+
+    def __init__(self, slo: Optional[float] = None) -> None:
+        """
+        Initialise the tracker.
+
+        Args:
+            slo (Optional[float]): Latency objective in seconds, latencies above
+                it are counted as violations.
+        """
+        self.slo = slo
+        self.histograms: Dict[str, StreamingHistogram] = {}
+        self.violations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def open(self, frame: Optional[FrameData]) -> None:
+        """
+        Make a frame the current frame of the calling thread.
+
+        Args:
+            frame (Optional[FrameData]): The frame being processed.
+        """
+        self._local.frame = frame
+
+    def close(self, stage: str, frame: Optional[FrameData] = None,
+              now: Optional[float] = None) -> Optional[float]:
+        """
+        Record the latency of a frame at a stage.
+
+        Args:
+            stage (str): Name of the stage the frame reached.
+            frame (Optional[FrameData]): The frame, defaults to the current
+                frame of the calling thread.
+            now (Optional[float]): Time from time.monotonic(), defaults to now.
+
+        Returns:
+            Optional[float]: The latency in seconds, or None if the frame has
+            no capture timestamp.
+        """
+        if frame is None:
+            frame = getattr(self._local, "frame", None)
+        timestamp = getattr(frame, "timestamp", None)
+        if timestamp is None:
+            return None
+        latency = (time.monotonic() if now is None else now) - timestamp
+
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = StreamingHistogram()
+                self.violations[stage] = 0
+            histogram.record(latency)
+            if self.slo is not None and latency > self.slo:
+                self.violations[stage] += 1
+        return latency
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the latency statistics of every stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Count, total, mean, p50, p95, p99
+            and max latency in seconds of each stage, and the number of SLO
+            violations if an SLO is set.
+        """
+        with self._lock:
+            summary = {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+            if self.slo is not None:
+                for stage, stats in summary.items():
+                    stats["slo_violations"] = self.violations[stage]
+            return summary
+
+    def reset(self) -> None:
+        """Discard the recorded latencies."""
+        with self._lock:
+            self.histograms.clear()
+            self.violations.clear()
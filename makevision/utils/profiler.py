@@ -0,0 +1,322 @@
+import csv
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingHistogram:
+    """
+    Fixed memory histogram of durations with logarithmic bins.
+
+    Every bin covers durations a constant factor apart, so percentiles are
+    accurate to within that relative error no matter how many values are
+    recorded. The exact count, total, minimum and maximum are also kept.
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 100.0,
+                 relative_error: float = 0.02) -> None:
+        """
+        Initialise the histogram.
+
+        Args:
+            min_value (float): Smallest duration resolved in seconds, smaller
+                values fall in the first bin.
+            max_value (float): Largest duration resolved in seconds, larger
+                values fall in the last bin.
+            relative_error (float): Maximum relative error of percentiles.
+        """
+        self.min_value = min_value
+        self._log_min = math.log(min_value)
+        self._log_growth = math.log1p(2 * relative_error)
+        self._bins = np.zeros(
+            int(math.ceil((math.log(max_value) - self._log_min) / self._log_growth)) + 1,
+            dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Record a duration in seconds."""
+        index = 0 if value <= self.min_value else int(
+            (math.log(value) - self._log_min) / self._log_growth) + 1
+        self._bins[min(index, len(self._bins) - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        """Mean of the recorded durations."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Estimate a percentile of the recorded durations.
+
+        Args:
+            percentile (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The estimated duration in seconds, 0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(percentile / 100 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self._bins), rank))
+        if index == 0:
+            value = self.min_value
+        else:
+            # Geometric middle of the bin
+            value = math.exp(self._log_min + (index - 0.5) * self._log_growth)
+        return min(max(value, self.min), self.max)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the statistics of the recorded durations.
+
+        Returns:
+            Dict[str, float]: Count, total, mean, p50, p95, p99 and max.
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Profiler:
+    """
+    Records nested timing spans, per-frame latency breakdowns and frame rate.
+
+    Spans opened within other spans are named after their parents, e.g. a
+    ``detect`` span inside a ``frame`` span is recorded as ``frame/detect``.
+    All statistics use fixed memory: durations go into streaming histograms,
+    and only the last ``history`` frame breakdowns and ``trace_events``
+    spans (for Chrome traces) are kept.
+    """
+
+    def __init__(self, history: int = 300, trace_events: int = 100000,
+                 fps_window: float = 1.0) -> None:
+        """
+        Initialise the profiler.
+
+        Args:
+            history (int): Number of frame breakdowns kept.
+            trace_events (int): Number of spans kept for Chrome trace export.
+            fps_window (float): Length of the sliding window used to measure
+                the frame rate in seconds.
+        """
+        self.fps_window = fps_window
+        self.histograms: Dict[str, StreamingHistogram] = {}
+        self.frames: Deque[Dict[str, float]] = deque(maxlen=history)
+        self._events: Deque[Tuple[str, float, float, int]] = deque(maxlen=trace_events)
+        self._frame_ends: Deque[float] = deque()
+        self._frame_spans: Optional[Dict[str, float]] = None
+        self._frame_start: Optional[float] = None
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Name of the span.
+        """
+        stack = self._stack()
+        path = f"{stack[-1]}/{name}" if stack else name
+        stack.append(path)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self.record(path, start, end)
+
+    @contextmanager
+    def frame(self, name: str = "frame") -> Iterator[None]:
+        """
+        Time the processing of a frame, collecting the time spent in each
+        span opened within it as the frame's latency breakdown.
+
+        Args:
+            name (str): Name of the frame span.
+        """
+        with self._lock:
+            self._frame_spans = {}
+        try:
+            with self.span(name):
+                yield
+        finally:
+            now = time.perf_counter()
+            with self._lock:
+                self.frames.append(self._frame_spans)
+                self._frame_spans = None
+                self._add_frame_end(now)
+
+    def mark_frame(self, name: str = "frame") -> None:
+        """
+        Mark the start of a new frame, for loops which cannot be wrapped in
+        frame(). The time since the previous mark is recorded as the latency
+        of the previous frame, and the spans recorded in between as its
+        breakdown.
+
+        Args:
+            name (str): Name of the frame span.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._frame_start
+            self._frame_start = now
+        if previous is not None:
+            self.record(name, previous, now)
+
+        with self._lock:
+            frame_spans = self._frame_spans
+            self._frame_spans = {}
+            if previous is not None and frame_spans is not None:
+                self.frames.append(frame_spans)
+                self._add_frame_end(now)
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """
+        Record a span measured elsewhere.
+
+        Args:
+            name (str): Name of the span.
+            start (float): Start time from time.perf_counter.
+            end (float): End time from time.perf_counter.
+        """
+        duration = end - start
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = StreamingHistogram()
+            histogram.record(duration)
+            if self._frame_spans is not None:
+                self._frame_spans[name] = self._frame_spans.get(name, 0.0) + duration
+            self._events.append((name, start, duration, threading.get_ident()))
+
+    @property
+    def fps(self) -> float:
+        """Frames completed per second over the sliding window."""
+        with self._lock:
+            if len(self._frame_ends) < 2:
+                return 0.0
+            elapsed = self._frame_ends[-1] - self._frame_ends[0]
+            return (len(self._frame_ends) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def last_frame(self) -> Dict[str, float]:
+        """
+        Get the latency breakdown of the last completed frame.
+
+        Returns:
+            Dict[str, float]: Time in seconds spent in each span of the frame.
+        """
+        with self._lock:
+            return dict(self.frames[-1]) if self.frames else {}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the statistics of every span.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Count, total, mean, p50, p95, p99
+            and max of each span, keyed by span name.
+        """
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def summary(self) -> None:
+        """Log the statistics of every span."""
+        for name, stats in self.stats().items():
+            logger.info(
+                f"Span '{name}' - Count: {stats['count']}, Mean: {stats['mean'] * 1000:.2f}ms, "
+                f"p50: {stats['p50'] * 1000:.2f}ms, p95: {stats['p95'] * 1000:.2f}ms, "
+                f"p99: {stats['p99'] * 1000:.2f}ms, Max: {stats['max'] * 1000:.2f}ms")
+        if self.frames:
+            logger.info(f"FPS: {self.fps:.2f}")
+
+    def export_json(self, path: str) -> None:
+        """
+        Write the span statistics, frame rate and frame breakdowns to a JSON file.
+
+        Args:
+            path (str): Path to the JSON file.
+        """
+        with self._lock:
+            frames = list(self.frames)
+        report = {"fps": self.fps, "spans": self.stats(), "frames": frames}
+        with open(path, "w") as file:
+            json.dump(report, file, indent=4)
+
+    def export_csv(self, path: str) -> None:
+        """
+        Write the span statistics to a CSV file, one row per span.
+
+        Args:
+            path (str): Path to the CSV file.
+        """
+        fields = ["count", "total", "mean", "p50", "p95", "p99", "max"]
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["span"] + fields)
+            for name, stats in self.stats().items():
+                writer.writerow([name] + [stats[field] for field in fields])
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Write the recorded spans as a Chrome trace, which can be opened in
+        chrome://tracing or Perfetto.
+
+        Args:
+            path (str): Path to the trace file.
+        """
+        with self._lock:
+            events: List[Dict] = [
+                {"name": name.rsplit("/", 1)[-1], "cat": name, "ph": "X",
+                 "ts": (start - self._origin) * 1e6, "dur": duration * 1e6,
+                 "pid": os.getpid(), "tid": thread}
+                for name, start, duration, thread in self._events]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        with self._lock:
+            self.histograms.clear()
+            self.frames.clear()
+            self._events.clear()
+            self._frame_ends.clear()
+            self._frame_spans = None
+            self._frame_start = None
+
+    def _add_frame_end(self, now: float) -> None:
+        self._frame_ends.append(now)
+        while self._frame_ends and now - self._frame_ends[0] > self.fps_window:
+            self._frame_ends.popleft()
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Times the startup of a pipeline, from the start of the process to the
+    first frame read.
+
+    The startup is split into the time the process ran before
+    ``makevision.start`` was called (interpreter start up and the imports of
+    the script), named phases timed with ``phase``, e.g. the initialisation
+    of each component, and the time until the reader returned its first
+    frame. Each phase lists the packages first imported during it, which
+    shows where lazily imported dependencies are loaded.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initialise the profiler, the start of its timeline is now.
+
+        Args:
+            path (Optional[str]): JSON file the report is written to once the
+                first frame is read, or by ``finish``.
+        """
+        self.path = path
+        self.started = time.perf_counter()
+        self.process_age = _process_age()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.first_frame: Optional[float] = None
+        self._written = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the startup.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        modules = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = {
+                "seconds": time.perf_counter() - start,
+                "imported": _packages(set(sys.modules) - modules),
+            }
+
+    def watch_first_frame(self, reader: Any) -> None:
+        """
+        Record the time the reader first returns a frame, then write the report.
+
+        Args:
+            reader (Any): The reader, whose ``read`` is wrapped until it
+                returns a frame.
+        """
+        read = reader.read
+
+        def first_read(*args, **kwargs):
+            result = read(*args, **kwargs)
+            if result[0]:
+                self.first_frame = time.perf_counter() - self.started
+                # Reads go straight to the reader again
+                del reader.read
+                self.finish()
+            return result
+
+        reader.read = first_read
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get the startup times.
+
+        Returns:
+            Dict[str, Any]: Seconds the process ran before the profiler was
+            created ("before_start", None if unknown), the time the
+            makevision package took to import ("import"), each phase, the
+            total of the phases ("initialisation"), the time from the
+            profiler's creation to the first frame ("first_frame") and from
+            the start of the process to it ("time_to_first_frame").
+        """
+        from makevision import import_time
+
+        time_to_first_frame = None
+        if self.first_frame is not None and self.process_age is not None:
+            time_to_first_frame = self.process_age + self.first_frame
+        return {
+            "before_start": self.process_age,
+            "import": import_time,
+            "phases": self.phases,
+            "initialisation": sum(phase["seconds"] for phase in self.phases.values()),
+            "first_frame": self.first_frame,
+            "time_to_first_frame": time_to_first_frame,
+        }
+
+    def finish(self) -> None:
+        """Log the report and write it to the path, once."""
+        if self._written:
+            return
+        self._written = True
+        report = self.report()
+        logger.info(f"Startup 'import makevision': {report['import'] * 1000:.1f}ms")
+        for name, phase in report["phases"].items():
+            imported = f", imported {', '.join(phase['imported'])}" if phase["imported"] else ""
+            logger.info(f"Startup '{name}': {phase['seconds'] * 1000:.1f}ms{imported}")
+        if report["time_to_first_frame"] is not None:
+            logger.info(f"Time to first frame: {report['time_to_first_frame'] * 1000:.1f}ms "
+                        f"({report['before_start'] * 1000:.1f}ms before start)")
+        if self.path:
+            with open(self.path, "w") as file:
+                json.dump(report, file, indent=4)
+            logger.info(f"Startup report written to {self.path}")
+
+
+def _packages(modules: set) -> List[str]:
+    """Top-level packages of the module names, and subpackages of makevision, without private ones."""
+    return sorted({".".join(name.split(".")[:2 if name.startswith("makevision.") else 1])
+                   for name in modules if not name.startswith("_")})
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since the process started, read from /proc on Linux, else None."""
+    try:
+        with open("/proc/self/stat") as file:
+            # Fields after the parenthesised command name, which may contain spaces
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return max(uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, IndexError, ValueError):
+        return None
@@ -3,11 +3,13 @@ from collections import defaultdict
 from typing import Optional
 import logging
 
+from .profiler import StreamingHistogram
+
 logger = logging.getLogger(__name__)
 
 
 class Timer:
-    _timings = defaultdict(list)
+    _timings = defaultdict(StreamingHistogram)
 
     def __init__(self, name: Optional[str] = None, accumulate: bool = False):
         self.name = name
@@ -28,7 +30,7 @@ class Timer:
         elapsed = time.perf_counter() - self.start_time
         if self.name:
             if self.accumulate:
-                Timer._timings[self.name].append(elapsed)
+                Timer._timings[self.name].record(elapsed)
             else:
                 logger.info(
                     f"Timer '{self.name}' elapsed time: {elapsed:.4f} seconds")
@@ -36,9 +38,9 @@ class Timer:
 
     @classmethod
     def summary(cls):
-        for name, records in cls._timings.items():
-            total_time = sum(records)
-            count = len(records)
-            avg = total_time / count if count > 0 else 0
+        for name, histogram in cls._timings.items():
             logger.info(
-                f"Timer '{name}' - Total: {total_time:.4f} seconds, Count: {count}, Average: {avg:.4f} seconds")
+                f"Timer '{name}' - Total: {histogram.total:.4f} seconds, Count: {histogram.count}, "
+                f"Average: {histogram.mean:.4f} seconds, p50: {histogram.percentile(50):.4f}, "
+                f"p95: {histogram.percentile(95):.4f}, p99: {histogram.percentile(99):.4f}, "
+                f"Max: {histogram.max:.4f} seconds")
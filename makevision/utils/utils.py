@@ -1,13 +1,10 @@
 import inspect
-import importlib.util
 import json
 import logging
 import os
 import sys
-from types import ModuleType
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
-from makevision.calibration import WebcamCalibrator
 from makevision.core import (
     Calibrator,
     Detector,
@@ -19,50 +16,53 @@ from makevision.core import (
     Pipeline,
     Reader,
     State,
+    Tracker,
 )
-from makevision.model import OnnxModel, TfModel, YoloModel
+from .instrumentation import instrument_components
+from .latency import LatencyTracker
+from .profiler import Profiler
 
 logger = logging.getLogger(__name__)
 
 
-def detect_pipeline() -> Pipeline:
+def detect_pipeline(name: Optional[str] = None) -> Pipeline:
     """
-    Detects and returns the first Pipeline subclass found in the current directory.
+    Detects and returns the pipeline of the main script.
+
+    Pipelines register themselves when their class is defined, see
+    Pipeline.registry, so the main script is not imported again. The first
+    pipeline defined in the main script is used, or else the first one it
+    imported.
+
+    Args:
+        name (Optional[str]): Name of the pipeline class to use instead, e.g.
+            "BasicPipeline", looked up among every registered pipeline.
 
     Returns:
-        Pipeline: The first found Pipeline subclass, or None if none found.
+        Pipeline: An instance of the pipeline.
     """
-    # Get the main script file that was executed
+    if name:
+        if not any(pipeline.__name__ == name for pipeline in Pipeline.registered()):
+            # Register the pipelines shipped with makevision
+            import makevision.pipelines
+        for key, pipeline in Pipeline.registry.items():
+            if name in (pipeline.__name__, key):
+                return pipeline()
+        raise exceptions.PipelineError(f"No Pipeline class named '{name}' was found.")
+
+    # Spawned worker processes run the main script as __mp_main__
     main_module = sys.modules['__main__']
-    main_file = getattr(main_module, '__file__', None)
-
-    if main_file:
-        try:
-            module_name = os.path.basename(
-                main_file)[:-3]  # Remove .py extension
-            module = load_module(main_file, module_name)
-
-            for _, obj in inspect.getmembers(module, inspect.isclass):
-                if issubclass(obj, Pipeline) and obj != Pipeline:
-                    return obj()
-
-        except Exception as e:
-            logger.error(f"Error analyzing main module {main_file}: {e}")
+    pipelines = Pipeline.registered(main_module.__name__)
+    if not pipelines:
+        pipelines = [obj for obj in vars(main_module).values()
+                     if inspect.isclass(obj) and obj in Pipeline.registry.values()]
+    if pipelines:
+        return pipelines[0]()
 
     raise exceptions.PipelineError(
         "No Pipeline class was found in the main script file.")
 
 
-def load_module(module_path: str, module_name: str) -> ModuleType:
-    spec = importlib.util.spec_from_file_location(module_name, module_path)
-    if spec is None or spec.loader is None:
-        raise ImportError(
-            f"Could not load module {module_name} from {module_path}")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 def detect_source(input_path: str, loop: bool) -> Tuple[bool, Reader]:
     """Determine the detector based on the input type."""
     if input_path == "webcam":
@@ -90,24 +90,37 @@ def detect_model(model_path: str) -> Model:
     elif file_ext in ['.pb', '.tflite']:  # TensorFlow extensions
         raise NotImplementedError("TensorFlow model not yet supported.")
     elif file_ext in ['.onnx']:  # ONNX format
-        raise NotImplementedError("ONNX model not yet supported.")
+        from makevision.model import OnnxModel
+        return OnnxModel(model_path)
     else:
         return None
 
 
 def detect_detector(model: Model, streaming: bool) -> Detector:
     """Determine the detector based on the model path."""
+    from makevision.model import OnnxModel, TfModel, YoloModel
+
     if isinstance(model, YoloModel):
         from makevision.detection import YoloDetector
         return YoloDetector(model, streaming)
     elif isinstance(model, TfModel):  # TensorFlow extensions
         raise NotImplementedError("TensorFlow model not yet supported.")
     elif isinstance(model, OnnxModel):  # ONNX format
-        raise NotImplementedError("ONNX model not yet supported.")
+        from makevision.detection import OnnxDetector
+        return OnnxDetector(model, streaming)
     else:
         return None
 
 
+def detect_tracker(tracker_name: str) -> Tracker:
+    """Determine the tracker based on its name."""
+    if tracker_name == "kalman":
+        from makevision.tracking import KalmanTracker
+        return KalmanTracker()
+    else:
+        raise ValueError(f"Unsupported tracker type: {tracker_name}")
+
+
 def detect_filter(filter_name: str) -> Filter:
     return None
 
@@ -121,6 +134,8 @@ def detect_obstruction_detector(config: str) -> ObstructionDetector:
 
 
 def detect_calibrator(calibration_path: str) -> Calibrator:
+    from makevision.calibration import WebcamCalibrator
+
     return WebcamCalibrator(calibration_path)
 
 
@@ -139,9 +154,11 @@ def detect_network(network_path: str) -> Network:
         elif network_type == "database":
             raise NotImplementedError("Database network not yet supported.")
         elif network_type == "file":
-            raise NotImplementedError("File network not yet supported.")
+            from makevision.network import FileNetwork
+            return FileNetwork(config)
         elif network_type == "log":
-            raise NotImplementedError("Log network not yet supported.")
+            from makevision.network import LogNetwork
+            return LogNetwork(config)
         else:
             raise ValueError(f"Unsupported network type: {network_type}")
     except json.JSONDecodeError:
@@ -149,7 +166,8 @@ def detect_network(network_path: str) -> Network:
             f"Invalid JSON format in network configuration file: {network_path}")
 
 
-def inject_and_run(pipeline: Pipeline, available_components: Dict):
+def inject_and_run(pipeline: Pipeline, available_components: Dict,
+                   profile_path: Optional[str] = None):
     """
     Inject the components into the pipeline and run it.
 
@@ -157,7 +175,20 @@ def inject_and_run(pipeline: Pipeline, available_components: Dict):
         pipeline (Pipeline): The pipeline to run.
         available_components (Dict): A dictionary of available components 
                                     to inject into the pipeline.
+        profile_path (Optional[str]): If given, time the calls made to the
+                                    components and write a profiling report
+                                    to this JSON file when the pipeline stops.
+                                    A Chrome trace is written alongside it.
+                                    The report includes the end-to-end latency
+                                    of frames at the state and network.
     """
+    profiler = None
+    latency = None
+    if profile_path:
+        profiler = Profiler()
+        latency = LatencyTracker()
+        available_components = instrument_components(available_components, profiler, latency)
+
     # Determine the parameters of the pipeline's run method
     sig = inspect.signature(pipeline.run)
     param_names = [key for key in sig.parameters.keys() if key != "self"]
@@ -175,4 +206,38 @@ def inject_and_run(pipeline: Pipeline, available_components: Dict):
                 f"Missing required parameter '{param_name}' for pipeline run method.")
 
     # Run the pipeline with the initialized components
-    pipeline.run(**kwargs)
+    try:
+        pipeline.run(**kwargs)
+    finally:
+        if profiler is not None:
+            write_profile_report(profiler, profile_path, latency)
+
+
+def write_profile_report(profiler: Profiler, path: str,
+                         latency: Optional[LatencyTracker] = None):
+    """
+    Log the profiler summary and write it to a JSON report and a Chrome trace.
+
+    Args:
+        profiler (Profiler): The profiler to report.
+        path (str): Path to the JSON report, the trace is written next to it
+                    with a .trace.json extension.
+        latency (Optional[LatencyTracker]): End-to-end latencies added to the
+                    report under "latency".
+    """
+    profiler.summary()
+    profiler.export_json(path)
+    if latency is not None:
+        latencies = latency.summary()
+        for stage, stats in latencies.items():
+            logger.info(
+                f"Latency to '{stage}' - p50: {stats['p50'] * 1000:.2f}ms, "
+                f"p95: {stats['p95'] * 1000:.2f}ms, p99: {stats['p99'] * 1000:.2f}ms")
+        with open(path) as file:
+            report = json.load(file)
+        report["latency"] = latencies
+        with open(path, "w") as file:
+            json.dump(report, file, indent=4)
+    trace_path = f"{os.path.splitext(path)[0]}.trace.json"
+    profiler.export_chrome_trace(trace_path)
+    logger.info(f"Profiling report written to {path} and {trace_path}")
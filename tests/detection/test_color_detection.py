@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+from makevision.detection import ColorDetector, ColorMasks
+from makevision.model.color_model import ColorModel
+from makevision.reader.image_reader import ImageFrameData
+
+# Overlapping ranges, including one covering every hue and one touching the limits
+COLORS = {
+    "red": (np.array([0, 80, 80]), np.array([10, 255, 255])),
+    "orange": (np.array([8, 100, 100]), np.array([25, 255, 255])),
+    "blue": (np.array([100, 50, 50]), np.array([130, 255, 255])),
+    "bright": (np.array([0, 0, 200]), np.array([179, 60, 255])),
+    "edges": (np.array([170, 0, 0]), np.array([179, 255, 255])),
+}
+
+
+@pytest.fixture
+def hsv() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    image[..., 0] %= 180
+    return image
+
+
+def test_fast_labels_match_in_range(hsv):
+    detector = ColorDetector(ColorModel(COLORS), fast=True, hsv_input=True)
+    masks = detector.detect(ImageFrameData(hsv))
+
+    assert isinstance(masks, ColorMasks)
+    assert [name for name, _ in masks] == list(COLORS)
+    for name, mask in masks:
+        lower, upper = COLORS[name]
+        np.testing.assert_array_equal(mask > 0, cv2.inRange(hsv, lower, upper) > 0)
+
+
+def test_fast_masks_match_plain_masks(hsv):
+    plain = ColorDetector(ColorModel(COLORS), hsv_input=True).detect(ImageFrameData(hsv))
+    fast = ColorDetector(ColorModel(COLORS), fast=True, hsv_input=True).detect(ImageFrameData(hsv))
+
+    for (name, expected), (fast_name, mask) in zip(plain, fast):
+        assert fast_name == name
+        np.testing.assert_array_equal(mask > 0, expected > 0)
+
+
+def test_fast_labels_support_32_colors(hsv):
+    colors = {f"hue{i}": (np.array([i * 5, 0, 0]), np.array([i * 5 + 7, 255, 255]))
+              for i in range(32)}
+    masks = ColorDetector(ColorModel(colors), fast=True, hsv_input=True).detect(ImageFrameData(hsv))
+
+    for name, mask in masks:
+        lower, upper = colors[name]
+        np.testing.assert_array_equal(mask > 0, cv2.inRange(hsv, lower, upper) > 0)
@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+import pytest
+
+from makevision.detection import non_max_suppression
+
+
+def random_boxes(count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(0, 200, (count, 2))
+    wh = rng.integers(10, 80, (count, 2))
+    boxes = np.concatenate([xy, xy + wh], axis=1).astype(np.float32)
+    # Distinct scores, so the order boxes are kept in is unambiguous
+    scores = rng.permutation(count).astype(np.float32) / count + 0.01
+    return boxes, scores
+
+
+def to_xywh(boxes: np.ndarray):
+    return [[float(x1), float(y1), float(x2 - x1), float(y2 - y1)] for x1, y1, x2, y2 in boxes]
+
+
+@pytest.mark.parametrize("iou", [0.3, 0.5, 0.7])
+def test_greedy_matches_opencv(iou):
+    boxes, scores = random_boxes(300, seed=1)
+
+    kept = non_max_suppression(boxes, scores, iou)
+    expected = cv2.dnn.NMSBoxes(to_xywh(boxes), scores.tolist(), 0.0, iou)
+
+    assert kept.tolist() == np.asarray(expected).ravel().tolist()
+
+
+def test_class_aware_matches_opencv_batched():
+    boxes, scores = random_boxes(300, seed=2)
+    class_ids = np.random.default_rng(3).integers(0, 4, len(boxes))
+
+    kept = non_max_suppression(boxes, scores, 0.5, class_ids)
+    expected = cv2.dnn.NMSBoxesBatched(to_xywh(boxes), scores.tolist(), class_ids.tolist(), 0.0, 0.5)
+
+    assert sorted(kept.tolist()) == sorted(np.asarray(expected).ravel().tolist())
+
+
+def test_fast_keeps_a_subset_of_greedy():
+    boxes, scores = random_boxes(300, seed=4)
+
+    greedy = set(non_max_suppression(boxes, scores, 0.5).tolist())
+    fast = non_max_suppression(boxes, scores, 0.5, method="fast")
+
+    assert set(fast.tolist()) <= greedy
+    assert np.all(np.diff(scores[fast]) <= 0)
+
+
+def test_max_detections_keeps_the_highest_scores():
+    boxes, scores = random_boxes(300, seed=5)
+
+    kept = non_max_suppression(boxes, scores, 0.5, max_detections=5)
+
+    assert kept.tolist() == non_max_suppression(boxes, scores, 0.5)[:5].tolist()
+
+
+def test_no_boxes():
+    kept = non_max_suppression(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), 0.5)
+
+    assert kept.shape == (0,)
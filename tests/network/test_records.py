@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from makevision.network import RecordReader, RecordWriter
+from makevision.network.records import next_frame, segment_paths
+
+
+def write_records(path, compression=None, frames=60, per_frame=2):
+    """Write a few records per frame, flushing every frame so segments rotate between them."""
+    writer = RecordWriter(path, flush_interval=60, max_bytes=200, max_seconds=None,
+                          compression=compression)
+    for frame in range(frames):
+        for part in range(per_frame):
+            writer.write(f"frame {frame} part {part}".encode(), frame, 1000.0 + frame)
+        writer.flush()
+    writer.close()
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_find_frame_across_segments(tmp_path, compression):
+    path = str(tmp_path / "records.jsonl")
+    write_records(path, compression)
+
+    reader = RecordReader(path, compression)
+
+    assert len(reader.segments) > 3
+    assert len(reader) == 120
+    for frame in (0, 1, 17, 30, 59):
+        position = reader.find_frame(frame)
+        assert reader[position] == f"frame {frame} part 0".encode()
+        assert reader[position + 1] == f"frame {frame} part 1".encode()
+    assert reader.find_frame(60) == len(reader)
+    assert reader[reader.find_time(1042.5)] == b"frame 43 part 0"
+
+
+def test_records_are_read_in_order(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    write_records(path, frames=20, per_frame=1)
+
+    assert list(RecordReader(path)) == [f"frame {frame} part 0".encode() for frame in range(20)]
+    assert [frame for frame, _, _ in RecordReader(path).records(5, 8)] == [5, 6, 7]
+
+
+def test_next_frame_follows_the_last_segment(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    assert next_frame(path) == 0
+
+    write_records(path, frames=25)
+
+    assert next_frame(path) == 25
+
+
+def test_segments_of_a_path_without_extension(tmp_path):
+    path = str(tmp_path / "records")
+    write_records(path, frames=20)
+
+    segments = segment_paths(path)
+
+    assert segments and not any(segment.endswith(".idx") for segment in segments)
+    assert all(os.path.exists(segment + ".idx") for segment in segments)
+    assert RecordReader(path)[RecordReader(path).find_frame(12)] == b"frame 12 part 0"
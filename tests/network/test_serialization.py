@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from makevision.detection.postprocess import Detections
+from makevision.network import BinarySerializer, JsonSerializer
+
+NAMES = {0: "person", 1: "car"}
+
+
+def tracked_frames(count: int):
+    """Tracked detections moving a few pixels per frame, with tracks starting and ending."""
+    rng = np.random.default_rng(0)
+    ids = np.array([3, 7, -1, 40], dtype=np.int64)
+    boxes = rng.uniform(0, 600, (len(ids), 2))
+    boxes = np.concatenate([boxes, boxes + rng.uniform(20, 90, (len(ids), 2))], axis=1)
+    frames = []
+    for index in range(count):
+        boxes = boxes + rng.integers(-4, 5, boxes.shape)
+        keep = np.ones(len(ids), dtype=bool)
+        # Track 7 leaves and track 50 appears half way through
+        keep[1] = index < count // 2
+        frame_ids, frame_boxes = ids[keep], boxes[keep]
+        if index >= count // 2:
+            frame_ids = np.append(frame_ids, 50)
+            frame_boxes = np.vstack([frame_boxes, [100, 100, 140, 180]])
+        frames.append(Detections(
+            np.rint(frame_boxes).astype(np.float32),
+            rng.uniform(0, 1, len(frame_ids)).astype(np.float32),
+            (np.arange(len(frame_ids)) % 2).astype(np.int32), names=NAMES,
+            track_id=frame_ids))
+    return frames
+
+
+def is_keyframe(payload: bytes) -> bool:
+    # Flags follow the magic, version and payload kind
+    return bool(payload[4] & 1)
+
+
+def assert_same(decoded: Detections, expected: Detections):
+    np.testing.assert_array_equal(decoded.xyxy, expected.xyxy)
+    np.testing.assert_allclose(decoded.conf, expected.conf, atol=1 / 255)
+    np.testing.assert_array_equal(decoded.cls, expected.cls)
+    np.testing.assert_array_equal(decoded.track_id, expected.track_id.astype(np.uint32))
+    assert decoded.names == expected.names
+
+
+def test_delta_round_trip_with_keyframes():
+    encoder, decoder = BinarySerializer(keyframe_interval=4), BinarySerializer()
+    frames = tracked_frames(10)
+
+    payloads = [encoder.encode(detections) for detections in frames]
+
+    assert [is_keyframe(payload) for payload in payloads] == \
+        [True, False, False, False, True, False, False, False, True, False]
+    for payload, expected in zip(payloads, frames):
+        assert_same(decoder.decode(payload), expected)
+    assert len(payloads[1]) < len(payloads[0])
+
+
+def test_delta_without_reference_waits_for_keyframe():
+    encoder = BinarySerializer(keyframe_interval=3)
+    payloads = [encoder.encode(detections) for detections in tracked_frames(6)]
+    decoder = BinarySerializer()
+
+    with pytest.raises(ValueError):
+        decoder.decode(payloads[1])
+    with pytest.raises(ValueError):
+        decoder.decode(payloads[2])
+    assert_same(decoder.decode(payloads[3]), tracked_frames(6)[3])
+    assert_same(decoder.decode(payloads[4]), tracked_frames(6)[4])
+
+
+def test_reset_sends_a_keyframe():
+    encoder = BinarySerializer()
+    frames = tracked_frames(3)
+    encoder.encode(frames[0])
+    encoder.reset()
+
+    assert is_keyframe(encoder.encode(frames[1]))
+
+
+@pytest.mark.parametrize("mask_encoding", ["rle", "png"])
+@pytest.mark.parametrize("compress", [False, True])
+def test_masks_and_keypoints_round_trip(mask_encoding, compress):
+    rng = np.random.default_rng(1)
+    masks = np.zeros((3, 48, 64), dtype=bool)
+    masks[0, 5:20, 10:30] = True
+    masks[1] = rng.random((48, 64)) > 0.5
+    masks[2, 0, 0] = True
+    keypoints = np.dstack([rng.integers(0, 64, (3, 5, 2)), rng.random((3, 5, 1))]).astype(np.float32)
+    detections = Detections(np.array([[1, 2, 30, 40], [0, 0, 64, 48], [0, 0, 1, 1]], np.float32),
+                            np.array([0.9, 0.5, 0.1], np.float32), np.array([0, 1, 1], np.int32),
+                            keypoints, NAMES, masks=masks)
+    serializer = BinarySerializer(mask_encoding=mask_encoding, compress=compress)
+
+    decoded = BinarySerializer().decode(serializer.encode(detections))
+
+    np.testing.assert_array_equal(decoded.masks, masks)
+    np.testing.assert_array_equal(decoded.keypoints[..., :2], keypoints[..., :2])
+    np.testing.assert_allclose(decoded.keypoints[..., 2], keypoints[..., 2], atol=1 / 255)
+    np.testing.assert_array_equal(decoded.xyxy, detections.xyxy)
+
+
+def test_lists_and_other_data():
+    serializer = BinarySerializer()
+    frames = tracked_frames(2)
+
+    decoded = serializer.decode(serializer.encode(frames))
+    assert isinstance(decoded, list) and len(decoded) == 2
+    assert_same(decoded[1], frames[1])
+    assert serializer.decode(serializer.encode({"count": np.int64(3)})) == {"count": 3}
+
+
+def test_json_converts_detections():
+    detections = tracked_frames(1)[0]
+
+    data = JsonSerializer().decode(JsonSerializer().encode({"detections": detections}))
+
+    assert data["detections"]["labels"] == [NAMES[int(c)] for c in detections.cls]
+    assert data["detections"]["track_id"] == detections.track_id.tolist()
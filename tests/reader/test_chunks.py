@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from makevision.reader import ChunkReader, VideoChunk, plan_chunks
+
+FRAMES = 50
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory) -> str:
+    """A video whose frame i is filled with the gray level 4 * i."""
+    path = str(tmp_path_factory.mktemp("video") / "numbered.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+    for index in range(FRAMES):
+        writer.write(np.full((48, 64, 3), 4 * index, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def frame_number(frame: np.ndarray) -> int:
+    return int(round(float(frame.mean()) / 4))
+
+
+def read_chunks(chunks, frame_step=1, **options):
+    """Read every chunk, returning the sequence and content number of each frame."""
+    frames = []
+    for chunk in chunks:
+        reader = ChunkReader(chunk, frame_step=frame_step, **options)
+        while True:
+            success, frame = reader.read()
+            if not success:
+                break
+            frames.append((frame.sequence, frame_number(frame.frame)))
+        assert reader.frames_read == len(range(chunk.start, chunk.stop, frame_step))
+        reader.release()
+    return frames
+
+
+@pytest.mark.parametrize("chunk_frames", [7, 16, 100])
+def test_chunks_cover_the_video(video, chunk_frames):
+    chunks = plan_chunks(video, chunk_frames)
+
+    assert chunks[0].start == 0 and chunks[-1].stop == FRAMES
+    assert all(previous.stop == chunk.start for previous, chunk in zip(chunks, chunks[1:]))
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+
+@pytest.mark.parametrize("frame_step", [1, 3])
+def test_chunk_reader_indices(video, frame_step):
+    chunks = plan_chunks(video, 12, frame_step=frame_step)
+
+    frames = read_chunks(chunks, frame_step=frame_step)
+
+    assert all(chunk.start % frame_step == 0 for chunk in chunks)
+    # Stamped with their index in the video, the same frames as reading it with the step
+    assert [sequence for sequence, _ in frames] == list(range(0, FRAMES, frame_step))
+    assert all(sequence == number for sequence, number in frames)
+
+
+def test_chunk_reader_reset(video):
+    reader = ChunkReader(VideoChunk(video, 0, 20, 30))
+    first = [reader.read()[1].sequence for _ in range(3)]
+    reader.reset()
+
+    assert [reader.read()[1].sequence for _ in range(3)] == first == [20, 21, 22]
+    reader.release()
+
+
+def test_pyav_chunks_start_on_keyframes(video):
+    pytest.importorskip("av")
+
+    chunks = plan_chunks(video, 12, decoder="pyav", frame_step=2)
+    frames = read_chunks(chunks, decoder="pyav", frame_step=2)
+
+    assert [sequence for sequence, _ in frames] == list(range(0, FRAMES, 2))
+    assert all(sequence == number for sequence, number in frames)
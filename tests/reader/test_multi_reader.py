@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from makevision.core import FrameData, Reader
+from makevision.reader import MultiReader
+from makevision.reader.image_reader import ImageFrameData
+
+
+class StampedReader(Reader):
+    """Returns frames captured at the given times."""
+
+    def __init__(self, timestamps: List[float]) -> None:
+        self.timestamps = timestamps
+        self.position = 0
+
+    def read(self) -> Tuple[bool, Optional[FrameData]]:
+        if self.position >= len(self.timestamps):
+            return False, None
+        frame = ImageFrameData(np.zeros((2, 2, 3), dtype=np.uint8))
+        frame.stamp(self.position, timestamp=self.timestamps[self.position])
+        self.position += 1
+        return True, frame
+
+    def release(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        self.position = 0
+
+
+def read_sets(reader: MultiReader):
+    sets = []
+    while True:
+        success, frameset = reader.read(timeout=5)
+        if not success:
+            break
+        sets.append({source: frame.sequence for source, frame in frameset.frames.items()})
+    reader.release()
+    return sets
+
+
+def test_sync_matches_frames_within_tolerance():
+    reader = MultiReader({"left": StampedReader([0.00, 0.10, 0.20, 0.30, 0.40]),
+                          "right": StampedReader([0.105, 0.16, 0.205, 0.31, 0.45])},
+                         mode="sync", tolerance=0.02, drop_policy="block")
+
+    sets = read_sets(reader)
+
+    # Unmatched frames are dropped, left 0.00 and 0.40 and right 0.16, then left has ended
+    assert sets == [{"left": 1, "right": 0}, {"left": 2, "right": 2}, {"left": 3, "right": 3}]
+    assert reader.stats["left"].dropped == 2 and reader.stats["right"].dropped == 1
+
+
+def test_sync_sets_have_a_small_spread():
+    reader = MultiReader([StampedReader([0.0, 0.1, 0.2]), StampedReader([0.01, 0.11, 0.19]),
+                          StampedReader([0.005, 0.095, 0.2])],
+                         mode="sync", tolerance=0.02, drop_policy="block")
+
+    sets = []
+    while True:
+        success, frameset = reader.read(timeout=5)
+        if not success:
+            break
+        assert frameset.spread <= 0.02
+        assert [frame.source_id for frame in frameset] == [0, 1, 2]
+        sets.append(frameset)
+    reader.release()
+
+    assert len(sets) == 3
+
+
+def test_sync_without_require_all_continues_with_remaining_sources():
+    reader = MultiReader({"a": StampedReader([0.0, 0.1, 0.2, 0.3]), "b": StampedReader([0.0, 0.1])},
+                         mode="sync", tolerance=0.02, drop_policy="block", require_all=False)
+
+    sets = read_sets(reader)
+
+    assert sets == [{"a": 0, "b": 0}, {"a": 1, "b": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_sync_stops_when_a_source_ends():
+    reader = MultiReader({"a": StampedReader([0.0, 0.1, 0.2]), "b": StampedReader([0.0])},
+                         mode="sync", tolerance=0.02, drop_policy="block")
+
+    assert read_sets(reader) == [{"a": 0, "b": 0}]
+
+
+def test_streams_returns_every_frame_in_order_per_source():
+    reader = MultiReader({"a": StampedReader([0.0, 0.2]), "b": StampedReader([0.1, 0.3])},
+                         drop_policy="block")
+
+    order = []
+    while True:
+        success, frame = reader.read(timeout=5)
+        if not success:
+            break
+        order.append((frame.source_id, frame.sequence))
+    reader.release()
+
+    assert sorted(order) == [("a", 0), ("a", 1), ("b", 0), ("b", 1)]
+    assert [item for item in order if item[0] == "a"] == [("a", 0), ("a", 1)]